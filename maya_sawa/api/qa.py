@@ -526,7 +526,7 @@ async def query_document(request: QueryRequest, http_request: Request):
     if request.analysis_type and request.analysis_type.startswith("page_"):
         logger.info(f"收到頁面分析請求: {request.analysis_type}")
         page_analyzer = PageAnalyzer()
-        page_result = page_analyzer.analyze_page_content(
+        page_result = await page_analyzer.analyze_page_content_async(
             content=request.text,
             analysis_type=request.analysis_type.replace("page_", ""),
             language=request.language
@@ -572,7 +572,9 @@ async def query_document(request: QueryRequest, http_request: Request):
         initial_k = Config.ARTICLE_MATCH_COUNT
         # Use a more practical threshold for better recall
         initial_threshold = max(Config.SIMILARITY_THRESHOLD, 0.5)
-        documents = vector_store.similarity_search(request.text, k=initial_k, threshold=initial_threshold)
+        # 查詢向量只生成一次，fallback 重試時重用
+        query_embedding = vector_store.embedding_service.embed_query(request.text)
+        documents = vector_store.similarity_search_by_vector(query_embedding, k=initial_k, threshold=initial_threshold)
         logger.info(f"啟用文章QA功能，搜索到 {len(documents)} 個相關文檔 (k={initial_k}, threshold={initial_threshold})")
 
         # Fallback：若沒有找到文檔，放寬條件再試一次
@@ -581,7 +583,7 @@ async def query_document(request: QueryRequest, http_request: Request):
             # Ensure some results populate data[]
             fallback_threshold = 0.0
             logger.info(f"首次檢索無結果，使用 fallback 條件重試 (k={fallback_k}, threshold={fallback_threshold})")
-            documents = vector_store.similarity_search(request.text, k=fallback_k, threshold=fallback_threshold)
+            documents = vector_store.similarity_search_by_vector(query_embedding, k=fallback_k, threshold=fallback_threshold)
             logger.info(f"fallback 檢索返回 {len(documents)} 個文檔")
     else:
         # 禁用文章QA功能，不搜索文件
@@ -23,11 +23,11 @@ async def get_visit_count():
     Matches Django VisitCountView.
     """
     try:
-        r = get_pool_manager().get_redis_connection()
+        r = get_pool_manager().get_async_redis_connection()
         if not r:
              raise HTTPException(status_code=503, detail="Redis connection unavailable")
              
-        count = r.get('visit_count')
+        count = await r.get('visit_count')
         logger.info(f"Current visit count: {count}")
         if count is None:
             count = 0
@@ -45,11 +45,11 @@ async def increment_visit_count():
     Matches Django IncrementView.
     """
     try:
-        r = get_pool_manager().get_redis_connection()
+        r = get_pool_manager().get_async_redis_connection()
         if not r:
              raise HTTPException(status_code=503, detail="Redis connection unavailable")
 
-        count = r.incr('visit_count')
+        count = await r.incr('visit_count')
         logger.info(f"Incremented visit count to: {count}")
         return {'count': int(count)}
     except HTTPException:
@@ -66,7 +66,7 @@ async def push_to_queue(value: int = Form(1)):
     Supports Form data (application/x-www-form-urlencoded) for backward compatibility.
     """
     try:
-        r = get_pool_manager().get_redis_connection()
+        r = get_pool_manager().get_async_redis_connection()
         if not r:
              raise HTTPException(status_code=503, detail="Redis connection unavailable")
 
@@ -75,8 +75,8 @@ async def push_to_queue(value: int = Form(1)):
              # Fallback if config is missing, though Config has default
              queue_name = "voyeur_queue"
 
-        r.rpush(queue_name, value)
-        length = r.llen(queue_name)
+        # RPUSH 本身返回推入後的隊列長度，無需再以 LLEN 往返一次
+        length = await r.rpush(queue_name, value)
         logger.info(f"Pushed {value} to queue {queue_name}, current length: {length}")
         
         return {
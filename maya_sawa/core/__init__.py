@@ -37,28 +37,12 @@
 版本: 0.3.0
 """
 
-# ==================== 導出主要組件 ====================
-
-# 配置管理
-from .config.config import Config
-from .config.config_manager import config_manager
-
-# 數據庫連接
-from .database.connection_pool import get_pool_manager
+# 標準庫導入
+import importlib
 
-# QA 系統
-from .qa.qa_chain import QAChain
-
-# 處理模組
-from .processing.loader import DocumentLoader
-from .processing.page_analyzer import PageAnalyzer
-from .processing.langchain_shim import Document, PromptTemplate, ChatOpenAI
-
-# 服務層
-from .services.chat_history import ChatHistoryManager
-from .services.scheduler import ArticleSyncScheduler
+# ==================== 導出主要組件 ====================
 
-# 錯誤處理
+# 錯誤處理（輕量，直接導入）
 from .errors.errors import (
     ErrorCode,
     AppException,
@@ -73,7 +57,59 @@ from .errors.errors import (
     raise_remote_api_error,
 )
 
-# ==================== 向後兼容性 ====================
+# 其餘組件按需懶加載（PEP 562），避免導入任一子模組時就拖入 LangChain / OpenAI 等重型依賴
+_LAZY_IMPORTS = {
+    # 配置管理
+    "Config": (".config.config", "Config"),
+    "config_manager": (".config.config_manager", "config_manager"),
+    # 數據庫連接
+    "get_pool_manager": (".database.connection_pool", "get_pool_manager"),
+    # QA 系統
+    "QAChain": (".qa.qa_chain", "QAChain"),
+    # 處理模組
+    "DocumentLoader": (".processing.loader", "DocumentLoader"),
+    "PageAnalyzer": (".processing.page_analyzer", "PageAnalyzer"),
+    "Document": (".processing.langchain_shim", "Document"),
+    "PromptTemplate": (".processing.langchain_shim", "PromptTemplate"),
+    "ChatOpenAI": (".processing.langchain_shim", "ChatOpenAI"),
+    # 服務層
+    "ChatHistoryManager": (".services.chat_history", "ChatHistoryManager"),
+    "ArticleSyncScheduler": (".services.scheduler", "ArticleSyncScheduler"),
+    # ==================== 向後兼容性 ====================
+    # 為舊的導入提供別名
+    "qa_chain": (".qa.qa_chain", "QAChain"),
+}
+
+__all__ = [
+    "ErrorCode",
+    "AppException",
+    "ErrorResponse",
+    "ErrorDetail",
+    "register_exception_handlers",
+    "raise_not_found",
+    "raise_db_unavailable",
+    "raise_validation_error",
+    "raise_already_exists",
+    "raise_operation_failed",
+    "raise_remote_api_error",
+    *_LAZY_IMPORTS,
+]
+
+
+def __getattr__(name):
+    """
+    懶加載模組屬性（PEP 562）
+
+    首次訪問時導入對應子模組，並緩存到模組全局變量中
+    """
+    try:
+        module_name, attr = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
 
-# 為舊的導入提供別名
-qa_chain = QAChain
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -8,28 +8,69 @@ Author: Maya Sawa Team
 Version: 0.1.0
 """
 
+import functools
+import logging
 import os
 from pathlib import Path
-try:
-    from dotenv import load_dotenv
-    # Load environment-specific .env file
-    project_root = Path(__file__).resolve().parents[3]
-    env_type = os.getenv("ENV_TYPE", "development")  # Default to development
-    
-    # Try to load environment-specific file first
-    env_file = project_root / f".env.{env_type}"
-    if env_file.exists():
-        load_dotenv(env_file, override=False)
-        print(f"Loaded environment configuration from: {env_file}")
-    else:
-        # Fallback to default .env file
-        default_env = project_root / ".env"
-        if default_env.exists():
-            load_dotenv(default_env, override=False)
-            print(f"Loaded default configuration from: {default_env}")
-except ImportError:
-    # dotenv not installed – ignore
-    pass
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# Project root, resolved once at import
+project_root = Path(__file__).resolve().parents[3]
+
+# Containerized deployments inject env vars directly; MAYA_SKIP_DOTENV=1 skips
+# the .env lookup (and its stat calls) entirely. Once a process has loaded the
+# file it records MAYA_DOTENV_LOADED, so child processes (Celery workers,
+# uvicorn reloaders) inherit the values and skip re-reading it
+if os.getenv("MAYA_SKIP_DOTENV") != "1" and "MAYA_DOTENV_LOADED" not in os.environ:
+    try:
+        from dotenv import dotenv_values
+        # Prefer the environment-specific file, fall back to the default .env
+        env_type = os.getenv("ENV_TYPE", "development")  # Default to development
+        env_file = project_root / f".env.{env_type}"
+        if not env_file.exists():
+            env_file = project_root / ".env"
+        if env_file.exists():
+            # Parse once; existing variables win (same as override=False)
+            for key, value in dotenv_values(env_file).items():
+                if value is not None:
+                    os.environ.setdefault(key, value)
+            os.environ["MAYA_DOTENV_LOADED"] = str(env_file)
+            logger.debug(f"Loaded environment configuration from: {env_file}")
+    except ImportError:
+        # dotenv not installed – ignore
+        pass
+
+# Snapshot of the environment taken once, after .env loading. A plain dict
+# lookup avoids os.environ's per-access key encode / value decode; Config is
+# materialised from it in a single pass at import
+_environ = dict(os.environ)
+
+
+def _env(name: str, default=None, cast=str):
+    """Read an environment variable and cast it, returning ``default`` if unset"""
+    value = _environ.get(name)
+    if value is None:
+        return default
+    return cast(value)
+
+
+_TRUTHY = frozenset({"1", "true", "yes", "on", "t", "y"})
+
+
+def _envbool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag; accepts 1/true/yes/on/t/y (case-insensitive)"""
+    value = _environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUTHY
+
+
+def _csv(value: str) -> tuple:
+    """Split a comma-separated setting into a tuple of stripped, non-empty items"""
+    return tuple(item for item in (part.strip() for part in value.split(",")) if item)
+
 
 class Config:
     """
@@ -38,12 +79,12 @@ class Config:
     
     # Main Database Configuration (for articles table)
     # Build PostgreSQL connection string from individual parameters
-    DB_HOST = os.getenv("DB_HOST")
-    DB_PORT = os.getenv("DB_PORT", "5432")
-    DB_DATABASE = os.getenv("DB_DATABASE")
-    DB_USERNAME = os.getenv("DB_USERNAME")
-    DB_PASSWORD = os.getenv("DB_PASSWORD")
-    DB_SSLMODE = os.getenv("DB_SSLMODE", "require")
+    DB_HOST = _environ.get("DB_HOST")
+    DB_PORT = _environ.get("DB_PORT", "5432")
+    DB_DATABASE = _environ.get("DB_DATABASE")
+    DB_USERNAME = _environ.get("DB_USERNAME")
+    DB_PASSWORD = _environ.get("DB_PASSWORD")
+    DB_SSLMODE = _environ.get("DB_SSLMODE", "require")
     
     # Construct main database connection string
     if all([DB_HOST, DB_DATABASE, DB_USERNAME, DB_PASSWORD]):
@@ -53,12 +94,12 @@ class Config:
         DB_CONNECTION_STRING = None
     
     # People Database Configuration (for people and weapon tables)
-    PEOPLE_DB_HOST = os.getenv("PEOPLE_DB_HOST")
-    PEOPLE_DB_PORT = os.getenv("PEOPLE_DB_PORT", "5432")
-    PEOPLE_DB_DATABASE = os.getenv("PEOPLE_DB_DATABASE")
-    PEOPLE_DB_USERNAME = os.getenv("PEOPLE_DB_USERNAME")
-    PEOPLE_DB_PASSWORD = os.getenv("PEOPLE_DB_PASSWORD")
-    PEOPLE_DB_SSLMODE = os.getenv("PEOPLE_DB_SSLMODE", "require")
+    PEOPLE_DB_HOST = _environ.get("PEOPLE_DB_HOST")
+    PEOPLE_DB_PORT = _environ.get("PEOPLE_DB_PORT", "5432")
+    PEOPLE_DB_DATABASE = _environ.get("PEOPLE_DB_DATABASE")
+    PEOPLE_DB_USERNAME = _environ.get("PEOPLE_DB_USERNAME")
+    PEOPLE_DB_PASSWORD = _environ.get("PEOPLE_DB_PASSWORD")
+    PEOPLE_DB_SSLMODE = _environ.get("PEOPLE_DB_SSLMODE", "require")
     
     # Construct people database connection string
     if all([PEOPLE_DB_HOST, PEOPLE_DB_DATABASE, PEOPLE_DB_USERNAME, PEOPLE_DB_PASSWORD]):
@@ -68,189 +109,220 @@ class Config:
         PEOPLE_DB_CONNECTION_STRING = None
     
     # OpenAI Configuration
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
-    OPENAI_MODELS = os.getenv("OPENAI_MODELS", "gpt-4o-mini,gpt-4o,gpt-4.1-nano").split(",")
-    OPENAI_AVAILABLE_MODELS = os.getenv("OPENAI_AVAILABLE_MODELS", "gpt-4o-mini,gpt-4.1-nano").split(",")
-    OPENAI_DEFAULT_MODEL = os.getenv("OPENAI_DEFAULT_MODEL", "gpt-4o-mini")
+    OPENAI_API_KEY = _environ.get("OPENAI_API_KEY")
+    OPENAI_API_BASE = _environ.get("OPENAI_API_BASE")
+    OPENAI_MODELS = _csv(_environ.get("OPENAI_MODELS", "gpt-4o-mini,gpt-4o,gpt-4.1-nano"))
+    OPENAI_AVAILABLE_MODELS = _csv(_environ.get("OPENAI_AVAILABLE_MODELS", "gpt-4o-mini,gpt-4.1-nano"))
+    OPENAI_DEFAULT_MODEL = _environ.get("OPENAI_DEFAULT_MODEL", "gpt-4o-mini")
     
     # Gemini Configuration
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    GEMINI_MODELS = os.getenv("GEMINI_MODELS", "gemini-1.5-flash,gemini-1.5-pro").split(",")
-    GEMINI_AVAILABLE_MODELS = os.getenv("GEMINI_AVAILABLE_MODELS", "gemini-1.5-flash").split(",")
-    GEMINI_DEFAULT_MODEL = os.getenv("GEMINI_DEFAULT_MODEL", "gemini-1.5-flash")
-    GEMINI_ENABLED = os.getenv("GEMINI_ENABLED", "false").lower() == "true"
+    GEMINI_API_KEY = _environ.get("GEMINI_API_KEY")
+    GEMINI_MODELS = _csv(_environ.get("GEMINI_MODELS", "gemini-1.5-flash,gemini-1.5-pro"))
+    GEMINI_AVAILABLE_MODELS = _csv(_environ.get("GEMINI_AVAILABLE_MODELS", "gemini-1.5-flash"))
+    GEMINI_DEFAULT_MODEL = _environ.get("GEMINI_DEFAULT_MODEL", "gemini-1.5-flash")
+    GEMINI_ENABLED = _envbool("GEMINI_ENABLED", False)
     
     # Qwen (DashScope) Configuration
-    QWEN_API_KEY = os.getenv("DASHSCOPE_API_KEY") or os.getenv("QWEN_API_KEY")
-    QWEN_MODELS = os.getenv("QWEN_MODELS", "qwen-turbo,qwen-plus").split(",")
-    QWEN_AVAILABLE_MODELS = os.getenv("QWEN_AVAILABLE_MODELS", "qwen-turbo").split(",")
-    QWEN_DEFAULT_MODEL = os.getenv("QWEN_DEFAULT_MODEL", "qwen-turbo")
-    QWEN_ENABLED = os.getenv("QWEN_ENABLED", "false").lower() == "true"
+    QWEN_API_KEY = _environ.get("DASHSCOPE_API_KEY") or _environ.get("QWEN_API_KEY")
+    QWEN_MODELS = _csv(_environ.get("QWEN_MODELS", "qwen-turbo,qwen-plus"))
+    QWEN_AVAILABLE_MODELS = _csv(_environ.get("QWEN_AVAILABLE_MODELS", "qwen-turbo"))
+    QWEN_DEFAULT_MODEL = _environ.get("QWEN_DEFAULT_MODEL", "qwen-turbo")
+    QWEN_ENABLED = _envbool("QWEN_ENABLED", False)
     
     # Enabled AI Providers
-    ENABLED_PROVIDERS = os.getenv("ENABLED_PROVIDERS", "openai").split(",")
+    ENABLED_PROVIDERS = _csv(_environ.get("ENABLED_PROVIDERS", "openai"))  # ordered; first is the default
+    ENABLED_PROVIDERS_SET = frozenset(ENABLED_PROVIDERS)  # for membership checks
     
     # Redis Configuration
-    REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
-    REDIS_PORT = int(os.getenv("REDIS_CUSTOM_PORT", 6379))
-    REDIS_PASSWORD = (os.getenv("REDIS_PASSWORD") or "").strip() or None
+    REDIS_HOST = _environ.get("REDIS_HOST", "127.0.0.1")
+    REDIS_PORT = _env("REDIS_CUSTOM_PORT", 6379, int)
+    REDIS_PASSWORD = (_environ.get("REDIS_PASSWORD") or "").strip() or None
+    # Opt-in background writer for chat history: saves return once queued and are
+    # written in batches, so a read right after a save may not see the record yet
+    CHAT_HISTORY_ASYNC_SAVE = _envbool("CHAT_HISTORY_ASYNC_SAVE", False)
     
     # Celery Configuration
-    CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL") or os.getenv("RABBITMQ_URL") or f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_CUSTOM_PORT', 6379)}/0"
-    CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND") or f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_CUSTOM_PORT', 6379)}/1"
+    CELERY_BROKER_URL = _environ.get("CELERY_BROKER_URL") or _environ.get("RABBITMQ_URL") or f"redis://{_environ.get('REDIS_HOST', 'localhost')}:{_environ.get('REDIS_CUSTOM_PORT', 6379)}/0"
+    CELERY_RESULT_BACKEND = _environ.get("CELERY_RESULT_BACKEND") or f"redis://{_environ.get('REDIS_HOST', 'localhost')}:{_environ.get('REDIS_CUSTOM_PORT', 6379)}/1"
     
     # Paprika Database Configuration (for articles from Laravel app)
-    PAPRIKA_DB_TYPE = os.getenv("PAPRIKA_DB_TYPE", "sqlite")  # sqlite or postgresql
-    PAPRIKA_DB_PATH = os.getenv("PAPRIKA_DB_PATH", "")  # For SQLite
-    PAPRIKA_DB_HOST = os.getenv("PAPRIKA_DB_HOST")
-    PAPRIKA_DB_PORT = os.getenv("PAPRIKA_DB_PORT", "5432")
-    PAPRIKA_DB_DATABASE = os.getenv("PAPRIKA_DB_DATABASE")
-    PAPRIKA_DB_USERNAME = os.getenv("PAPRIKA_DB_USERNAME")
-    PAPRIKA_DB_PASSWORD = os.getenv("PAPRIKA_DB_PASSWORD")
-    PAPRIKA_DB_SSLMODE = os.getenv("PAPRIKA_DB_SSLMODE", "disable")
+    PAPRIKA_DB_TYPE = _environ.get("PAPRIKA_DB_TYPE", "sqlite")  # sqlite or postgresql
+    PAPRIKA_DB_PATH = _environ.get("PAPRIKA_DB_PATH", "")  # For SQLite
+    PAPRIKA_DB_HOST = _environ.get("PAPRIKA_DB_HOST")
+    PAPRIKA_DB_PORT = _environ.get("PAPRIKA_DB_PORT", "5432")
+    PAPRIKA_DB_DATABASE = _environ.get("PAPRIKA_DB_DATABASE")
+    PAPRIKA_DB_USERNAME = _environ.get("PAPRIKA_DB_USERNAME")
+    PAPRIKA_DB_PASSWORD = _environ.get("PAPRIKA_DB_PASSWORD")
+    PAPRIKA_DB_SSLMODE = _environ.get("PAPRIKA_DB_SSLMODE", "disable")
     
     # Construct paprika database connection string
+    if PAPRIKA_DB_TYPE == "sqlite":
+        PAPRIKA_DB_URL = f"sqlite:///{PAPRIKA_DB_PATH}" if PAPRIKA_DB_PATH else "sqlite:///paprika.db"
+    elif PAPRIKA_DB_TYPE == "postgresql" and all([PAPRIKA_DB_HOST, PAPRIKA_DB_DATABASE, PAPRIKA_DB_USERNAME, PAPRIKA_DB_PASSWORD]):
+        PAPRIKA_DB_URL = f"postgresql://{PAPRIKA_DB_USERNAME}:{PAPRIKA_DB_PASSWORD}@{PAPRIKA_DB_HOST}:{PAPRIKA_DB_PORT}/{PAPRIKA_DB_DATABASE}?sslmode={PAPRIKA_DB_SSLMODE}"
+    else:
+        PAPRIKA_DB_URL = ""
+    
     @classmethod
     def get_paprika_db_url(cls) -> str:
         """Get paprika database connection URL"""
-        if cls.PAPRIKA_DB_TYPE == "sqlite":
-            if cls.PAPRIKA_DB_PATH:
-                return f"sqlite:///{cls.PAPRIKA_DB_PATH}"
-            return "sqlite:///paprika.db"
-        elif cls.PAPRIKA_DB_TYPE == "postgresql":
-            if all([cls.PAPRIKA_DB_HOST, cls.PAPRIKA_DB_DATABASE, cls.PAPRIKA_DB_USERNAME, cls.PAPRIKA_DB_PASSWORD]):
-                return f"postgresql://{cls.PAPRIKA_DB_USERNAME}:{cls.PAPRIKA_DB_PASSWORD}@{cls.PAPRIKA_DB_HOST}:{cls.PAPRIKA_DB_PORT}/{cls.PAPRIKA_DB_DATABASE}?sslmode={cls.PAPRIKA_DB_SSLMODE}"
-        return ""
+        return cls.PAPRIKA_DB_URL
     
     # Maya-v2 Database Configuration (for conversations from Django app)
-    MAYA_V2_DB_HOST = os.getenv("MAYA_V2_DB_HOST") or os.getenv("DB_HOST")
-    MAYA_V2_DB_PORT = os.getenv("MAYA_V2_DB_PORT", "5432")
-    MAYA_V2_DB_DATABASE = os.getenv("MAYA_V2_DB_DATABASE") or os.getenv("DB_DATABASE")
-    MAYA_V2_DB_USERNAME = os.getenv("MAYA_V2_DB_USERNAME") or os.getenv("DB_USERNAME")
-    MAYA_V2_DB_PASSWORD = os.getenv("MAYA_V2_DB_PASSWORD") or os.getenv("DB_PASSWORD")
-    MAYA_V2_DB_SSLMODE = os.getenv("MAYA_V2_DB_SSLMODE", "require")
+    MAYA_V2_DB_HOST = _environ.get("MAYA_V2_DB_HOST") or _environ.get("DB_HOST")
+    MAYA_V2_DB_PORT = _environ.get("MAYA_V2_DB_PORT", "5432")
+    MAYA_V2_DB_DATABASE = _environ.get("MAYA_V2_DB_DATABASE") or _environ.get("DB_DATABASE")
+    MAYA_V2_DB_USERNAME = _environ.get("MAYA_V2_DB_USERNAME") or _environ.get("DB_USERNAME")
+    MAYA_V2_DB_PASSWORD = _environ.get("MAYA_V2_DB_PASSWORD") or _environ.get("DB_PASSWORD")
+    MAYA_V2_DB_SSLMODE = _environ.get("MAYA_V2_DB_SSLMODE", "require")
+    
+    # Construct maya-v2 database connection string
+    if all([MAYA_V2_DB_HOST, MAYA_V2_DB_DATABASE, MAYA_V2_DB_USERNAME, MAYA_V2_DB_PASSWORD]):
+        MAYA_V2_DB_URL = f"postgresql://{MAYA_V2_DB_USERNAME}:{MAYA_V2_DB_PASSWORD}@{MAYA_V2_DB_HOST}:{MAYA_V2_DB_PORT}/{MAYA_V2_DB_DATABASE}?sslmode={MAYA_V2_DB_SSLMODE}"
+    else:
+        MAYA_V2_DB_URL = ""
     
     @classmethod
     def get_maya_v2_db_url(cls) -> str:
         """Get maya-v2 database connection URL"""
-        if all([cls.MAYA_V2_DB_HOST, cls.MAYA_V2_DB_DATABASE, cls.MAYA_V2_DB_USERNAME, cls.MAYA_V2_DB_PASSWORD]):
-            return f"postgresql://{cls.MAYA_V2_DB_USERNAME}:{cls.MAYA_V2_DB_PASSWORD}@{cls.MAYA_V2_DB_HOST}:{cls.MAYA_V2_DB_PORT}/{cls.MAYA_V2_DB_DATABASE}?sslmode={cls.MAYA_V2_DB_SSLMODE}"
-        return ""
+        return cls.MAYA_V2_DB_URL
     
     # API Configuration
-    PUBLIC_API_BASE_URL = os.getenv("PUBLIC_API_BASE_URL", "")
-    PUBLIC_TYMB_URL = os.getenv("PUBLIC_TYMB_URL", "")
+    PUBLIC_API_BASE_URL = _environ.get("PUBLIC_API_BASE_URL", "")
+    PUBLIC_TYMB_URL = _environ.get("PUBLIC_TYMB_URL", "")
     
     # Vector Search Configuration
     # Default to 3 matches if not set, per product requirement
-    ARTICLE_MATCH_COUNT = int(os.getenv("MATCH_COUNT", "3"))
+    ARTICLE_MATCH_COUNT = _env("MATCH_COUNT", 3, int)
     # Keep threshold configurable as well (optional usage)
-    SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.5"))
+    SIMILARITY_THRESHOLD = _env("SIMILARITY_THRESHOLD", 0.5, float)
 
     # Embedding Source/Validation Configuration
     # If true, ignore upstream embeddings and always recompute locally
-    FORCE_LOCAL_EMBEDDING = os.getenv("FORCE_LOCAL_EMBEDDING", "false").lower() == "true"
+    FORCE_LOCAL_EMBEDDING = _envbool("FORCE_LOCAL_EMBEDDING", False)
     # If true, validate upstream embeddings (e.g., dimension=1536); invalid ones will be recomputed locally
-    VALIDATE_UPSTREAM_EMBEDDING = os.getenv("VALIDATE_UPSTREAM_EMBEDDING", "true").lower() == "true"
+    VALIDATE_UPSTREAM_EMBEDDING = _envbool("VALIDATE_UPSTREAM_EMBEDDING", True)
     
     # Synchronization Configuration
-    ENABLE_AUTO_SYNC_ON_STARTUP = os.getenv("ENABLE_AUTO_SYNC_ON_STARTUP", "false").lower() == "true"
-    ENABLE_PERIODIC_SYNC = os.getenv("ENABLE_PERIODIC_SYNC", "false").lower() == "true"  # 默認關閉定期同步
-    SYNC_INTERVAL_DAYS = int(os.getenv("SYNC_INTERVAL_DAYS", "3"))
-    SYNC_HOUR = int(os.getenv("SYNC_HOUR", "3"))
-    SYNC_MINUTE = int(os.getenv("SYNC_MINUTE", "0"))
+    ENABLE_AUTO_SYNC_ON_STARTUP = _envbool("ENABLE_AUTO_SYNC_ON_STARTUP", False)
+    ENABLE_PERIODIC_SYNC = _envbool("ENABLE_PERIODIC_SYNC", False)  # 默認關閉定期同步
+    SYNC_INTERVAL_DAYS = _env("SYNC_INTERVAL_DAYS", 3, int)
+    SYNC_HOUR = _env("SYNC_HOUR", 3, int)
+    SYNC_MINUTE = _env("SYNC_MINUTE", 0, int)
     
     # People and Weapons Sync Configuration
-    ENABLE_PEOPLE_WEAPONS_SYNC = os.getenv("ENABLE_PEOPLE_WEAPONS_SYNC", "false").lower() == "true"
-    ENABLE_PEOPLE_WEAPONS_PERIODIC_SYNC = os.getenv("ENABLE_PEOPLE_WEAPONS_PERIODIC_SYNC", "false").lower() == "true"  # 默認關閉定期同步
+    ENABLE_PEOPLE_WEAPONS_SYNC = _envbool("ENABLE_PEOPLE_WEAPONS_SYNC", False)
+    ENABLE_PEOPLE_WEAPONS_PERIODIC_SYNC = _envbool("ENABLE_PEOPLE_WEAPONS_PERIODIC_SYNC", False)  # 默認關閉定期同步
+    
+    # Preload ConfigManager JSON files at startup instead of on first access
+    EAGER_CONFIG = _envbool("EAGER_CONFIG", False)
     
     # Logging Configuration
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL = _environ.get("LOG_LEVEL", "INFO")
 
     # Voyeur Configuration
     # MongoDB settings
-    MONGODB_URI = os.getenv("MONGODB_URI")
-    MONGODB_DB = os.getenv("MONGODB_DB", "palais")
-    MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION", "tyf_visits")
+    MONGODB_URI = _environ.get("MONGODB_URI")
+    MONGODB_DB = _environ.get("MONGODB_DB", "palais")
+    MONGODB_COLLECTION = _environ.get("MONGODB_COLLECTION", "tyf_visits")
     
     # Redis Queue for Voyeur
-    REDIS_QUEUE_VOYEUR = os.getenv("REDIS_QUEUE_VOYEUR", "voyeur_queue")
+    REDIS_QUEUE_VOYEUR = _environ.get("REDIS_QUEUE_VOYEUR", "voyeur_queue")
     
     # WebSocket settings for Voyeur
 
     # Keycloak / Git commit ingestion configuration
-    KEYCLOAK_AUTH_SERVER_URL = os.getenv("KEYCLOAK_AUTH_SERVER_URL", "").strip()
+    KEYCLOAK_AUTH_SERVER_URL = _environ.get("KEYCLOAK_AUTH_SERVER_URL", "").strip()
     KEYCLOAK_REALM = (
-        os.getenv("PUBLIC_REALM")
-        or os.getenv("KEYCLOAK_REALM")
+        _environ.get("PUBLIC_REALM")
+        or _environ.get("KEYCLOAK_REALM")
         or ""
     )
-    KEYCLOAK_CLIENT_ID = os.getenv("KEYCLOAK_CLIENT_ID") or os.getenv("KEYCLOAK_RESOURCE") or os.getenv("KEYCLOAK_CLIENT", "peoplesystem")
-    SECURITY_ENABLED = os.getenv("SECURITY_ENABLED", "true").lower() == "true"
-    SECURITY_TRUSTED_PROXY_CIDRS = os.getenv(
+    KEYCLOAK_CLIENT_ID = _environ.get("KEYCLOAK_CLIENT_ID") or _environ.get("KEYCLOAK_RESOURCE") or _environ.get("KEYCLOAK_CLIENT", "peoplesystem")
+    SECURITY_ENABLED = _envbool("SECURITY_ENABLED", True)
+    SECURITY_TRUSTED_PROXY_CIDRS = _environ.get(
         "SECURITY_TRUSTED_PROXY_CIDRS",
         "127.0.0.1/32,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16",
     )
-    SECURITY_IP_ALLOWLIST_CIDRS = os.getenv("SECURITY_IP_ALLOWLIST_CIDRS", "")
-    SECURITY_IP_ALLOWLIST_PATHS = os.getenv(
+    SECURITY_IP_ALLOWLIST_CIDRS = _environ.get("SECURITY_IP_ALLOWLIST_CIDRS", "")
+    SECURITY_IP_ALLOWLIST_PATHS = _environ.get(
         "SECURITY_IP_ALLOWLIST_PATHS",
         "/git-commits/ingest,/otel/v1/metrics",
     )
-    SECURITY_PUBLIC_RATE_LIMIT_PER_MINUTE = int(
-        os.getenv("SECURITY_PUBLIC_RATE_LIMIT_PER_MINUTE", "60")
-    )
-    SECURITY_AUTH_RATE_LIMIT_PER_MINUTE = int(
-        os.getenv("SECURITY_AUTH_RATE_LIMIT_PER_MINUTE", "180")
-    )
-    SECURITY_MAX_BODY_BYTES = int(os.getenv("SECURITY_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+    SECURITY_PUBLIC_RATE_LIMIT_PER_MINUTE = _env("SECURITY_PUBLIC_RATE_LIMIT_PER_MINUTE", 60, int)
+    SECURITY_AUTH_RATE_LIMIT_PER_MINUTE = _env("SECURITY_AUTH_RATE_LIMIT_PER_MINUTE", 180, int)
+    SECURITY_MAX_BODY_BYTES = _env("SECURITY_MAX_BODY_BYTES", 2 * 1024 * 1024, int)
     # 檔案上傳端點（例如 /videos/merge-videos）本質上就會超過一般 JSON 請求的
     # 2MB 上限，因此使用獨立的較大上限，而不是放寬全域限制。
-    SECURITY_UPLOAD_PATH_PREFIXES = os.getenv(
+    SECURITY_UPLOAD_PATH_PREFIXES = _environ.get(
         "SECURITY_UPLOAD_PATH_PREFIXES",
         "/videos/,/maya-sawa/videos/,/maya-v2/videos/",
     )
-    SECURITY_MAX_UPLOAD_BYTES = int(
-        os.getenv("SECURITY_MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024))
-    )
-    AI_RATE_LIMIT_MANAGER_PER_MINUTE = int(os.getenv("AI_RATE_LIMIT_MANAGER_PER_MINUTE", "10"))
-    AI_RATE_LIMIT_STANDARD_PER_MINUTE = int(os.getenv("AI_RATE_LIMIT_STANDARD_PER_MINUTE", "1"))
-    AI_RATE_LIMIT_ANONYMOUS_PER_MINUTE = int(os.getenv("AI_RATE_LIMIT_ANONYMOUS_PER_MINUTE", "1"))
-    AI_RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("AI_RATE_LIMIT_WINDOW_SECONDS", "60"))
-    GIT_COMMIT_REQUIRED_ROLE = os.getenv("GIT_COMMIT_REQUIRED_ROLE", "manage-users")
-    GIT_COMMIT_TRIVIAL_MIN_LINES = int(os.getenv("GIT_COMMIT_TRIVIAL_MIN_LINES", "5"))
+    SECURITY_MAX_UPLOAD_BYTES = _env("SECURITY_MAX_UPLOAD_BYTES", 1024 * 1024 * 1024, int)
+    AI_RATE_LIMIT_MANAGER_PER_MINUTE = _env("AI_RATE_LIMIT_MANAGER_PER_MINUTE", 10, int)
+    AI_RATE_LIMIT_STANDARD_PER_MINUTE = _env("AI_RATE_LIMIT_STANDARD_PER_MINUTE", 1, int)
+    AI_RATE_LIMIT_ANONYMOUS_PER_MINUTE = _env("AI_RATE_LIMIT_ANONYMOUS_PER_MINUTE", 1, int)
+    AI_RATE_LIMIT_WINDOW_SECONDS = _env("AI_RATE_LIMIT_WINDOW_SECONDS", 60, int)
+    GIT_COMMIT_REQUIRED_ROLE = _environ.get("GIT_COMMIT_REQUIRED_ROLE", "manage-users")
+    GIT_COMMIT_TRIVIAL_MIN_LINES = _env("GIT_COMMIT_TRIVIAL_MIN_LINES", 5, int)
     GIT_COMMIT_TRIVIAL_KEYWORDS = [
         item.strip().lower()
-        for item in os.getenv(
+        for item in _environ.get(
             "GIT_COMMIT_TRIVIAL_KEYWORDS",
             "typo,rename,format,lint,chore: rename,whitespace",
         ).split(",")
         if item.strip()
     ]
-    GIT_COMMIT_SUMMARY_MAX_CHARS = int(os.getenv("GIT_COMMIT_SUMMARY_MAX_CHARS", "2000"))
-    WEBSOCKET_TYMB = os.getenv("WEBSOCKET_TYMB", "ws://localhost:8080/tymb/")
-    WEBSOCKET_HOST = os.getenv("WEBSOCKET_HOST")
-    WEBSOCKET_PORT = os.getenv("WEBSOCKET_PORT")
-    WEBSOCKET_PATH = os.getenv("WEBSOCKET_PATH")
+    GIT_COMMIT_SUMMARY_MAX_CHARS = _env("GIT_COMMIT_SUMMARY_MAX_CHARS", 2000, int)
+    
+    # Token cap for page content sent to the LLM (after the 3000-char cut; 0 disables)
+    PAGE_ANALYSIS_MAX_TOKENS = _env("PAGE_ANALYSIS_MAX_TOKENS", 1500, int)
+
+    # Page analysis response cache (opt-in): near-duplicate page content (cosine similarity
+    # of the content embedding >= threshold) reuses the previous LLM answer, so a page
+    # that differs only slightly from a cached one gets the cached page's answer
+    PAGE_ANALYSIS_SEMANTIC_CACHE = _envbool("PAGE_ANALYSIS_SEMANTIC_CACHE", False)
+    PAGE_ANALYSIS_CACHE_THRESHOLD = _env("PAGE_ANALYSIS_CACHE_THRESHOLD", 0.95, float)
+    PAGE_ANALYSIS_CACHE_TTL_SECONDS = _env("PAGE_ANALYSIS_CACHE_TTL_SECONDS", 86400, int)
+    PAGE_ANALYSIS_CACHE_MAXSIZE = _env("PAGE_ANALYSIS_CACHE_MAXSIZE", 256, int)
+    # Exact-match cache (hash of type + language + content), checked before embedding;
+    # backend "redis" shares results across workers
+    PAGE_ANALYSIS_EXACT_CACHE = _envbool("PAGE_ANALYSIS_EXACT_CACHE", True)
+    PAGE_ANALYSIS_EXACT_CACHE_BACKEND = _environ.get("PAGE_ANALYSIS_EXACT_CACHE_BACKEND", "memory").strip().lower()
+    PAGE_ANALYSIS_EXACT_CACHE_TTL_SECONDS = _env("PAGE_ANALYSIS_EXACT_CACHE_TTL_SECONDS", 3600, int)
+    PAGE_ANALYSIS_EXACT_CACHE_MAXSIZE = _env("PAGE_ANALYSIS_EXACT_CACHE_MAXSIZE", 1024, int)
+    WEBSOCKET_TYMB = _environ.get("WEBSOCKET_TYMB", "ws://localhost:8080/tymb/")
+    WEBSOCKET_HOST = _environ.get("WEBSOCKET_HOST")
+    WEBSOCKET_PORT = _environ.get("WEBSOCKET_PORT")
+    WEBSOCKET_PATH = _environ.get("WEBSOCKET_PATH")
+    
+    # Construct Voyeur metrics WebSocket URL
+    if WEBSOCKET_TYMB:
+        VOYEUR_WS_URL = WEBSOCKET_TYMB.rstrip('/') + '/metrics'
+    elif all([WEBSOCKET_HOST, WEBSOCKET_PATH]):
+        VOYEUR_WS_URL = (
+            f"{'wss' if WEBSOCKET_PORT == '443' else 'ws'}://{WEBSOCKET_HOST}"
+            f"{f':{WEBSOCKET_PORT}' if WEBSOCKET_PORT else ''}{WEBSOCKET_PATH}"
+        )
+    else:
+        VOYEUR_WS_URL = ""
     
     @classmethod
     def get_voyeur_websocket_url(cls) -> str:
         """Get WebSocket URL for Voyeur metrics"""
-        if cls.WEBSOCKET_TYMB:
-            return cls.WEBSOCKET_TYMB.rstrip('/') + '/metrics'
-        if all([cls.WEBSOCKET_HOST, cls.WEBSOCKET_PATH]):
-            protocol = 'wss' if cls.WEBSOCKET_PORT == '443' else 'ws'
-            port_str = f":{cls.WEBSOCKET_PORT}" if cls.WEBSOCKET_PORT else ""
-            return f"{protocol}://{cls.WEBSOCKET_HOST}{port_str}{cls.WEBSOCKET_PATH}"
-        return ""
+        return cls.VOYEUR_WS_URL
     
     @classmethod
-    def validate_required_config(cls) -> list:
+    @functools.lru_cache(maxsize=1)
+    def validate_required_config(cls) -> tuple:
         """
         Validate required configuration variables
         
+        The result is cached because configuration is read once at import;
+        call ``refresh_cache`` after changing the environment.
+        
         Returns:
-            list: List of missing required configuration variables
+            tuple: Missing required configuration variables
         """
         missing_vars = []
         
@@ -265,38 +337,49 @@ class Config:
         if not cls.OPENAI_API_KEY:
             missing_vars.append("OPENAI_API_KEY")
         
-        return missing_vars
+        return tuple(missing_vars)
     
     @classmethod
-    def get_sync_config_summary(cls) -> dict:
+    @functools.lru_cache(maxsize=1)
+    def get_sync_config_summary(cls) -> MappingProxyType:
         """
         Get a summary of synchronization configuration
         
         Returns:
-            dict: Configuration summary
+            MappingProxyType: Read-only configuration summary (cached)
         """
-        return {
+        return MappingProxyType({
             "auto_sync_on_startup": cls.ENABLE_AUTO_SYNC_ON_STARTUP,
             "periodic_sync": cls.ENABLE_PERIODIC_SYNC,
             "sync_interval_days": cls.SYNC_INTERVAL_DAYS,
             "sync_time": f"{cls.SYNC_HOUR:02d}:{cls.SYNC_MINUTE:02d}",
             "people_weapons_sync": cls.ENABLE_PEOPLE_WEAPONS_SYNC,
             "people_weapons_periodic_sync": cls.ENABLE_PEOPLE_WEAPONS_PERIODIC_SYNC
-        }
+        })
+    
+    @classmethod
+    def refresh_cache(cls) -> None:
+        """
+        Clear cached configuration summaries (e.g. after reloading env in tests)
+        """
+        cls.validate_required_config.cache_clear()
+        cls.get_sync_config_summary.cache_clear()
+        cls.get_all_providers_config.cache_clear()
     
     @classmethod
-    def get_all_providers_config(cls) -> dict:
+    @functools.lru_cache(maxsize=1)
+    def get_all_providers_config(cls) -> MappingProxyType:
         """
         Get configuration for all AI providers
         
         Returns:
-            dict: AI providers configuration
+            MappingProxyType: Read-only AI providers configuration (cached)
         """
         providers = {}
         
         # OpenAI
         providers['openai'] = {
-            'enabled': 'openai' in cls.ENABLED_PROVIDERS,
+            'enabled': 'openai' in cls.ENABLED_PROVIDERS_SET,
             'models': cls.OPENAI_MODELS,
             'available_models': cls.OPENAI_AVAILABLE_MODELS,
             'default_model': cls.OPENAI_DEFAULT_MODEL,
@@ -305,7 +388,7 @@ class Config:
         
         # Gemini
         providers['gemini'] = {
-            'enabled': cls.GEMINI_ENABLED and 'gemini' in cls.ENABLED_PROVIDERS,
+            'enabled': cls.GEMINI_ENABLED and 'gemini' in cls.ENABLED_PROVIDERS_SET,
             'models': cls.GEMINI_MODELS,
             'available_models': cls.GEMINI_AVAILABLE_MODELS,
             'default_model': cls.GEMINI_DEFAULT_MODEL,
@@ -314,21 +397,23 @@ class Config:
         
         # Qwen
         providers['qwen'] = {
-            'enabled': cls.QWEN_ENABLED and 'qwen' in cls.ENABLED_PROVIDERS,
+            'enabled': cls.QWEN_ENABLED and 'qwen' in cls.ENABLED_PROVIDERS_SET,
             'models': cls.QWEN_MODELS,
             'available_models': cls.QWEN_AVAILABLE_MODELS,
             'default_model': cls.QWEN_DEFAULT_MODEL,
             'api_key_set': bool(cls.QWEN_API_KEY)
         }
         
-        return providers
+        return MappingProxyType({name: MappingProxyType(cfg) for name, cfg in providers.items()})
+    
+    PROVIDER_DISPLAY_NAMES = MappingProxyType({
+        'openai': 'OpenAI',
+        'gemini': 'Google Gemini',
+        'qwen': 'Alibaba Qwen'
+    })
     
     @classmethod
     def get_provider_display_name(cls, provider: str) -> str:
         """Get display name for AI provider"""
-        display_names = {
-            'openai': 'OpenAI',
-            'gemini': 'Google Gemini',
-            'qwen': 'Alibaba Qwen'
-        }
-        return display_names.get(provider.lower(), provider.upper()) 
+        return cls.PROVIDER_DISPLAY_NAMES.get(provider.lower(), provider.upper())
+
@@ -12,95 +12,174 @@ Markdown Q&A System - 配置管理器
 """
 
 import json
-import os
 import logging
-from typing import Dict, Any, Optional
+import string
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
+
+try:
+    # orjson 直接解析 bytes，省去文字解碼且比標準庫 json 快數倍；未安裝時退回標準庫
+    import orjson
+
+    _loads = orjson.loads  # orjson.JSONDecodeError 繼承自 json.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+
+# 受管理的配置文件名稱（不含副檔名）
+_CONFIG_NAMES = ('rules', 'keywords', 'prompts', 'constants')
 
 logger = logging.getLogger(__name__)
 
+
+def _compile_url_template(template: str) -> Optional[Tuple[Tuple[str, Optional[str]], ...]]:
+    """
+    將 "{base}/images/{name}.png" 形式的模板預先拆解為 (字面文字, 欄位名) 片段
+
+    僅支援不帶格式說明/轉換的簡單欄位；其他情況返回 None，由呼叫端退回 str.format
+    """
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if spec or conversion or field not in (None, 'base', 'name'):
+            return None
+        parts.append((literal, field))
+    return tuple(parts)
+
+
 class ConfigManager:
     """
     配置管理器，統一管理所有 JSON 配置文件
+    
+    單例：重複呼叫 ConfigManager() 會返回同一個實例，共用已載入的配置快取
     """
     
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
     def __init__(self):
         """
-        初始化配置管理器
+        初始化配置管理器（重複呼叫不會清除已載入的配置）
         """
-        self.config_dir = os.path.dirname(__file__)
-        self.data_dir = os.path.join(os.path.dirname(self.config_dir), 'data')
-        self._rules = None
-        self._keywords = None
-        self._prompts = None
-        self._constants = None
+        if getattr(self, '_initialized', False):
+            return
+        self._initialized = True
+        self.config_dir = Path(__file__).parent
+        self.data_dir = self.config_dir.parent / 'data'
+        # 文件路徑只計算一次
+        self._paths = {f'{name}.json': self.data_dir / f'{name}.json' for name in _CONFIG_NAMES}
+        # 已載入的配置（延遲載入，首次存取時才讀檔）
+        self._cache: Dict[str, Mapping[str, Any]] = {}
+        # 由配置衍生的預處理結果（圖片 URL 模板片段、全局規則文本）
+        self._image_url_parts: Optional[Dict[str, Any]] = None
+        self._global_rules_text: Dict[Optional[str], str] = {}
     
-    def _load_json_file(self, filename: str) -> Dict[str, Any]:
+    def _load_json_file(self, filename: str) -> Mapping[str, Any]:
         """
         載入 JSON 配置文件
         
+        文件不存在時返回空配置；內容格式錯誤或讀取失敗時記錄後重新拋出，
+        不會被快取，下次存取會再次嘗試（reload_configs 失敗時保留舊配置）
+        
         Args:
             filename (str): 文件名
             
         Returns:
-            Dict[str, Any]: 配置數據
+            Mapping[str, Any]: 唯讀的配置數據
+            
+        Raises:
+            json.JSONDecodeError: 配置文件內容不是合法的 JSON
+            OSError: 讀取文件失敗（權限等）
         """
-        file_path = os.path.join(self.data_dir, filename)
+        file_path = self._paths.get(filename) or self.data_dir / filename
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logger.debug(f"成功載入配置文件: {filename}")
-                return data
-        except Exception as e:
+            with open(file_path, 'rb') as f:
+                data = _loads(f.read())
+        except FileNotFoundError:
+            logger.warning(f"配置文件不存在: {filename} at {file_path}")
+            return MappingProxyType({})
+        except json.JSONDecodeError as e:
+            logger.error(f"配置文件 {filename} 格式錯誤: {e} at {file_path}")
+            raise
+        except OSError as e:
             logger.error(f"載入配置文件 {filename} 失敗: {e} at {file_path}")
-            return {}
+            raise
+        logger.debug(f"成功載入配置文件: {filename}")
+        return MappingProxyType(data)
+    
+    def _get(self, name: str) -> Mapping[str, Any]:
+        """
+        取得指定配置，首次存取時載入並快取
+        
+        Args:
+            name (str): 配置名稱（rules、keywords、prompts、constants）
+            
+        Returns:
+            Mapping[str, Any]: 配置數據
+        """
+        data = self._cache.get(name)
+        if data is None:
+            data = self._cache[name] = self._load_json_file(f'{name}.json')
+        return data
+    
+    def warm(self) -> None:
+        """
+        並行預先載入所有配置文件
+        
+        預設仍為延遲載入；部署時設定 EAGER_CONFIG=true 會在啟動時呼叫此方法，
+        讀檔時 GIL 會被釋放，四個文件的 I/O 可以重疊進行
+        """
+        names = [name for name in _CONFIG_NAMES if name not in self._cache]
+        if not names:
+            return
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            loaded = executor.map(lambda name: self._load_json_file(f'{name}.json'), names)
+            self._cache.update(zip(names, loaded))
+        logger.debug(f"預先載入配置文件: {', '.join(names)}")
     
     @property
-    def rules(self) -> Dict[str, Any]:
+    def rules(self) -> Mapping[str, Any]:
         """
         獲取規則配置
         
         Returns:
-            Dict[str, Any]: 規則配置
+            Mapping[str, Any]: 規則配置
         """
-        if self._rules is None:
-            self._rules = self._load_json_file('rules.json')
-        return self._rules
+        return self._get('rules')
     
     @property
-    def keywords(self) -> Dict[str, Any]:
+    def keywords(self) -> Mapping[str, Any]:
         """
         獲取關鍵詞配置
         
         Returns:
-            Dict[str, Any]: 關鍵詞配置
+            Mapping[str, Any]: 關鍵詞配置
         """
-        if self._keywords is None:
-            self._keywords = self._load_json_file('keywords.json')
-        return self._keywords
+        return self._get('keywords')
     
     @property
-    def prompts(self) -> Dict[str, Any]:
+    def prompts(self) -> Mapping[str, Any]:
         """
         獲取提示模板配置
         
         Returns:
-            Dict[str, Any]: 提示模板配置
+            Mapping[str, Any]: 提示模板配置
         """
-        if self._prompts is None:
-            self._prompts = self._load_json_file('prompts.json')
-        return self._prompts
+        return self._get('prompts')
     
     @property
-    def constants(self) -> Dict[str, Any]:
+    def constants(self) -> Mapping[str, Any]:
         """
         獲取常量配置
         
         Returns:
-            Dict[str, Any]: 常量配置
+            Mapping[str, Any]: 常量配置
         """
-        if self._constants is None:
-            self._constants = self._load_json_file('constants.json')
-        return self._constants
+        return self._get('constants')
     
     def get_rule(self, key: str) -> str:
         """
@@ -188,9 +267,19 @@ class ConfigManager:
         Returns:
             str: 圖片 URL
         """
-        templates = self.constants.get("IMAGE_URL_TEMPLATES", {})
-        template = templates.get(template_key, "")
-        return template.format(base=base_url, name=name)
+        if self._image_url_parts is None:
+            templates = self.constants.get("IMAGE_URL_TEMPLATES", {})
+            self._image_url_parts = {
+                key: (template, _compile_url_template(template))
+                for key, template in templates.items()
+            }
+        template, parts = self._image_url_parts.get(template_key, ("", ()))
+        if parts is None:
+            return template.format(base=base_url, name=name)
+        values = {'base': base_url, 'name': name}
+        return "".join(
+            literal + (values[field] if field else "") for literal, field in parts
+        )
     
     def get_global_rules(self, self_name: str = None) -> str:
         """
@@ -202,6 +291,10 @@ class ConfigManager:
         Returns:
             str: 全局規則文本
         """
+        cached = self._global_rules_text.get(self_name)
+        if cached is not None:
+            return cached
+        
         global_rules = self.prompts.get("GLOBAL_RULES", {})
         if not global_rules:
             return ""
@@ -212,17 +305,22 @@ class ConfigManager:
                 rule_content = rule_content.format(self_name=self_name)
             rules_text.append(f"• {rule_content}")
         
-        return "\n".join(rules_text)
+        text = "\n".join(rules_text)
+        # 角色名稱數量有限，上限僅為防止異常輸入無限增長
+        if len(self._global_rules_text) < 64:
+            self._global_rules_text[self_name] = text
+        return text
     
     def reload_configs(self):
         """
         重新載入所有配置文件
+        
+        先將新配置載入到區域變數，再一次性替換引用，
+        並發讀取者只會看到完整的舊配置或新配置，不會觸發重複載入
         """
         logger.info("重新載入所有配置文件")
-        self._rules = None
-        self._keywords = None
-        self._prompts = None
-        self._constants = None
+        new_cache = {name: self._load_json_file(f'{name}.json') for name in _CONFIG_NAMES}
+        self._cache, self._image_url_parts, self._global_rules_text = new_cache, None, {}
 
 # 全局配置管理器實例
 config_manager = ConfigManager() 
\ No newline at end of file
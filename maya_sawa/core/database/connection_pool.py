@@ -22,27 +22,71 @@ Markdown Q&A System - 連接池管理模組
 # 標準庫導入
 import logging
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping, Sequence
 
 # 第三方庫導入
 try:
     import psycopg2
     from psycopg2 import pool
+    from psycopg2.extras import execute_values
     import redis
+    import redis.asyncio as aioredis
 except ImportError as e:
     raise ImportError(f"Required database packages not installed. Please install with: poetry install") from e
 
-from dotenv import load_dotenv
-
-# 載入環境變數
-load_dotenv()
-
-# 本地模組導入
+# 本地模組導入（導入 Config 時按 MAYA_SKIP_DOTENV / MAYA_DOTENV_LOADED 載入 .env，
+# 須在下方讀取連接池環境變數之前）
 from ..config.config import Config
 
 # ==================== 日誌配置 ====================
 logger = logging.getLogger(__name__)
 
+# ==================== 連接池大小 ====================
+def _pool_size(env_key: str, default: int) -> int:
+    """從環境變數讀取連接池大小，未設定時使用預設值（至少為 1）"""
+    return max(1, int(os.getenv(env_key, default)))
+
+# 預設值維持較小的連線數以節省 Aiven 連線配額；連線配額充足的部署
+# 建議將 PG_POOL_MAX 設為 CPU 核心數 × 2 + 1 左右，過大的連接池反而會降低吞吐量
+MAIN_PG_POOL_MIN = _pool_size("PG_POOL_MIN", 1)
+MAIN_PG_POOL_MAX = max(MAIN_PG_POOL_MIN, _pool_size("PG_POOL_MAX", 2))
+PEOPLE_PG_POOL_MIN = _pool_size("PEOPLE_PG_POOL_MIN", 1)
+PEOPLE_PG_POOL_MAX = max(PEOPLE_PG_POOL_MIN, _pool_size("PEOPLE_PG_POOL_MAX", 1))
+REDIS_POOL_SIZE = _pool_size("REDIS_POOL_SIZE", 2)
+# asyncio Redis 連接池：每個請求都會經過限流器，協程數量遠多於線程，因此獨立設定較大的上限；
+# 等待空閒連接與 socket 讀寫都有短逾時，Redis 變慢時限流器能快速失敗放行，而不是拖慢請求
+REDIS_ASYNC_POOL_SIZE = _pool_size("REDIS_ASYNC_POOL_SIZE", 20)
+REDIS_ASYNC_POOL_TIMEOUT = float(os.getenv("REDIS_ASYNC_POOL_TIMEOUT", 0.5))
+REDIS_ASYNC_SOCKET_TIMEOUT = float(os.getenv("REDIS_ASYNC_SOCKET_TIMEOUT", 1))
+REDIS_ASYNC_CONNECT_TIMEOUT = float(os.getenv("REDIS_ASYNC_CONNECT_TIMEOUT", 1))
+# threaded: 共用連接池（預設）；persistent: 每個線程固定使用同一個連接
+# （從 ThreadedConnectionPool 借出後保存在 threading.local，歸還時不放回連接池，
+# 熱路徑不取連接池鎖），適用於固定大小的線程池工作者，此時 PG_POOL_MAX 必須不小於工作線程數
+# （psycopg2 2.9 已移除 PersistentConnectionPool，兩種模式都使用 ThreadedConnectionPool）
+PG_POOL_MODE = os.getenv("PG_POOL_MODE", "threaded").lower()
+_THREAD_AFFINITY = PG_POOL_MODE == "persistent"
+_POOL_CLASS = pool.ThreadedConnectionPool
+# bulk_insert 每條 INSERT 語句包含的行數
+BULK_INSERT_PAGE_SIZE = 1000
+# 連接閒置超過此秒數後，取出時先以 SELECT 1 確認仍然存活
+PG_IDLE_CHECK_SECONDS = float(os.getenv("PG_IDLE_CHECK_SECONDS", 30))
+
+# PostgreSQL 連線參數：啟用 TCP keepalive，讓經過 NAT / 雲端負載均衡的閒置連線
+# 保持存活，並在對端失效時盡快偵測，而不是卡在系統預設的 TCP 逾時
+_PG_CONNECT_KWARGS = {
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+    "connect_timeout": 5,
+    "application_name": "maya_sawa",
+}
+
 class ConnectionPoolManager:
     """
     連接池管理器
@@ -60,19 +104,90 @@ class ConnectionPoolManager:
         """
         初始化連接池管理器
         
-        創建主數據庫、人員數據庫和 Redis 連接池，設置連接參數
+        各連接池在首次使用時才建立（懶加載），只用到其中一個數據庫的
+        工作流程不必為其他連接池付出連線握手成本
         """
         # 主數據庫連接池（用於 articles 表）
-        self.postgres_pool = None
-        self._init_main_postgres_pool()
+        self._postgres_pool = None
         
         # 人員數據庫連接池（用於 people 和 weapon 表）
-        self.people_postgres_pool = None
-        self._init_people_postgres_pool()
+        self._people_postgres_pool = None
+        
+        # Redis 連接池與共用客戶端
+        self._redis_pool = None
+        self._redis_client = None
+        
+        # asyncio Redis 客戶端（供 async 路由與中間件使用，不阻塞事件循環）
+        self._async_redis_client = None
+        
+        # 已完成初始化的連接池，以及各自的初始化鎖（雙重檢查鎖定）
+        self._initialized = set()
+        self._init_locks = {name: threading.Lock() for name in ("main", "people", "redis", "async_redis")}
         
-        # Redis 連接池
-        self.redis_pool = None
-        self._init_redis_pool()
+        # persistent 模式下各線程綁定的 PostgreSQL 連接
+        self._tls = threading.local()
+        
+        # 各 PostgreSQL 連接最後一次歸還的時間（time.monotonic）；以連接對象的弱引用為鍵，
+        # 連接池在 putconn 中關閉並丟棄的連接被回收後條目自動移除，也不會因 id() 重用而誤取舊時間
+        self._last_used: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        
+        # get_pool_status 的快取：(初始化狀態, 狀態映射)
+        self._status_cache = None
+    
+    def _ensure(self, name: str, init) -> None:
+        """
+        確保指定連接池已初始化
+        
+        初始化後的快速路徑只做一次集合查找；初始化拋出異常（例如數據庫或 Redis
+        暫時無法連線）時不會被標記為完成，下次使用時會重試。未設定連接字符串
+        屬於配置問題，不會拋出異常，也不會重試
+        
+        Args:
+            name (str): 連接池名稱（main、people、redis）
+            init: 初始化方法
+        """
+        if name in self._initialized:
+            return
+        with self._init_locks[name]:
+            if name not in self._initialized:
+                init()
+                self._initialized.add(name)
+    
+    @property
+    def postgres_pool(self):
+        """主 PostgreSQL 連接池（首次存取時初始化；建立失敗時返回 None，下次存取重試）"""
+        try:
+            self._ensure("main", self._init_main_postgres_pool)
+        except Exception:
+            return None
+        return self._postgres_pool
+    
+    @property
+    def people_postgres_pool(self):
+        """人員 PostgreSQL 連接池（首次存取時初始化；建立失敗時返回 None，下次存取重試）"""
+        try:
+            self._ensure("people", self._init_people_postgres_pool)
+        except Exception:
+            return None
+        return self._people_postgres_pool
+    
+    @property
+    def redis_pool(self):
+        """Redis 連接池（首次存取時初始化）"""
+        self._ensure("redis", self._init_redis_pool)
+        return self._redis_pool
+    
+    @property
+    def redis_client(self):
+        """共用的 Redis 客戶端（首次存取時初始化）"""
+        self._ensure("redis", self._init_redis_pool)
+        return self._redis_client
+    
+    @property
+    def async_redis_client(self):
+        """共用的 asyncio Redis 客戶端（首次存取時初始化）"""
+        self._ensure("async_redis", self._init_async_redis_client)
+        return self._async_redis_client
     
     def _init_main_postgres_pool(self):
         """
@@ -86,11 +201,12 @@ class ConnectionPoolManager:
             connection_string = Config.DB_CONNECTION_STRING
             
             if connection_string:
-                # 創建線程連接池
-                self.postgres_pool = pool.ThreadedConnectionPool(
-                    minconn=1,      # 最小連接數
-                    maxconn=2,      # 最大連接數 (減少以節省 Aiven 連線數)
-                    dsn=connection_string  # 連接字符串
+                # 創建線程安全的連接池
+                self._postgres_pool = _POOL_CLASS(
+                    minconn=MAIN_PG_POOL_MIN,  # 最小連接數
+                    maxconn=MAIN_PG_POOL_MAX,  # 最大連接數 (預設 2 以節省 Aiven 連線數)
+                    dsn=connection_string,  # 連接字符串
+                    **_PG_CONNECT_KWARGS
                 )
                 logger.info("Main PostgreSQL connection pool initialized")
             else:
@@ -98,8 +214,10 @@ class ConnectionPoolManager:
                 
         except Exception as e:
             logger.error(f"Failed to initialize main PostgreSQL pool: {str(e)}")
-            # Don't raise, allow other pools (like Redis) to initialize
-            self.postgres_pool = None
+            # 重新拋出，讓 _ensure 不將其標記為已初始化，下次存取時重試；
+            # postgres_pool 屬性會攔截異常並返回 None，不影響其他連接池
+            self._postgres_pool = None
+            raise
     
     def _init_people_postgres_pool(self):
         """
@@ -113,11 +231,12 @@ class ConnectionPoolManager:
             connection_string = Config.PEOPLE_DB_CONNECTION_STRING
             
             if connection_string:
-                # 創建線程連接池
-                self.people_postgres_pool = pool.ThreadedConnectionPool(
-                    minconn=1,      # 最小連接數
-                    maxconn=1,      # 最大連接數 (每個數據庫最多 1 個連接)
-                    dsn=connection_string  # 連接字符串
+                # 創建線程安全的連接池
+                self._people_postgres_pool = _POOL_CLASS(
+                    minconn=PEOPLE_PG_POOL_MIN,  # 最小連接數
+                    maxconn=PEOPLE_PG_POOL_MAX,  # 最大連接數 (預設每個數據庫最多 1 個連接)
+                    dsn=connection_string,  # 連接字符串
+                    **_PG_CONNECT_KWARGS
                 )
                 logger.info("People PostgreSQL connection pool initialized")
             else:
@@ -125,8 +244,9 @@ class ConnectionPoolManager:
                 
         except Exception as e:
             logger.error(f"Failed to initialize people PostgreSQL pool: {str(e)}")
-            # Don't raise, allow other pools to initialize
-            self.people_postgres_pool = None
+            # 重新拋出以便下次存取時重試（見 _init_main_postgres_pool）
+            self._people_postgres_pool = None
+            raise
     
     def _init_redis_pool(self):
         """
@@ -136,19 +256,16 @@ class ConnectionPoolManager:
         支持密碼認證和自動解碼
         """
         try:
-            # 從環境變數獲取 Redis 配置
-            redis_host = os.getenv("REDIS_HOST", "127.0.0.1")
-            redis_port = int(os.getenv("REDIS_CUSTOM_PORT", 6379))
-            redis_password = (os.getenv("REDIS_PASSWORD") or "").strip() or None
-            
-            # 創建 Redis 連接池
-            self.redis_pool = redis.ConnectionPool(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                max_connections=2,   # 最大連接數 (進一步減少以節省資源)
+            # 創建 Redis 連接池（連線參數在 Config 載入時已解析）
+            self._redis_pool = redis.ConnectionPool(
+                host=Config.REDIS_HOST,
+                port=Config.REDIS_PORT,
+                password=Config.REDIS_PASSWORD,
+                max_connections=REDIS_POOL_SIZE,  # 最大連接數 (預設 2 以節省資源)
                 decode_responses=True  # 自動解碼為字符串
             )
+            # 共用客戶端：redis.Redis 每次命令都從連接池借用連接，可安全跨線程共用
+            self._redis_client = redis.Redis(connection_pool=self._redis_pool)
             
             logger.info("Redis connection pool initialized")
             
@@ -156,6 +273,134 @@ class ConnectionPoolManager:
             logger.error(f"Failed to initialize Redis pool: {str(e)}")
             raise
     
+    def _init_async_redis_client(self):
+        """
+        初始化 asyncio Redis 客戶端
+        
+        使用獨立的 asyncio 連接池（大小為 REDIS_ASYNC_POOL_SIZE）。
+        連接用盡時以 BlockingConnectionPool 最多等待 REDIS_ASYNC_POOL_TIMEOUT 秒，
+        逾時或 socket 逾時都會拋出異常，由呼叫端（例如限流器）快速放行
+        """
+        self._async_redis_client = aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool(
+                host=Config.REDIS_HOST,
+                port=Config.REDIS_PORT,
+                password=Config.REDIS_PASSWORD,
+                max_connections=REDIS_ASYNC_POOL_SIZE,
+                timeout=REDIS_ASYNC_POOL_TIMEOUT,
+                socket_timeout=REDIS_ASYNC_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_ASYNC_CONNECT_TIMEOUT,
+                decode_responses=True
+            )
+        )
+        logger.info("Async Redis client initialized")
+    
+    def _is_usable(self, conn) -> bool:
+        """
+        判斷連接是否仍可使用
+        
+        先檢查客戶端狀態（無需往返數據庫）：連接已關閉或處於未知狀態
+        （例如故障轉移後 socket 已斷開）即視為失效。閒置超過
+        PG_IDLE_CHECK_SECONDS 的連接可能已被數據庫重啟或網絡中斷切斷，
+        而客戶端狀態仍顯示正常，此時才以 SELECT 1 實際探測一次
+        
+        Args:
+            conn: PostgreSQL 連接對象
+            
+        Returns:
+            bool: 連接可用時返回 True
+        """
+        if conn.closed or conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        last_used = self._last_used.get(conn)
+        if last_used is None or time.monotonic() - last_used < PG_IDLE_CHECK_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+    
+    def _discard(self, pg_pool, conn) -> None:
+        """關閉失效的連接並將其移出連接池"""
+        self._last_used.pop(conn, None)
+        pg_pool.putconn(conn, close=True)
+    
+    def _release(self, pg_pool, conn) -> None:
+        """將連接歸還到連接池，並記錄歸還時間供下次取出時判斷閒置時長"""
+        self._last_used[conn] = time.monotonic()
+        pg_pool.putconn(conn)
+        # 連接池已滿 minconn 時，putconn 會直接關閉多餘的連接，不再保留其時間
+        if conn.closed:
+            self._last_used.pop(conn, None)
+    
+    def _checkout(self, pg_pool):
+        """
+        從連接池取得連接，並丟棄已失效的連接
+        
+        失效的連接會被關閉並重新取得一次，避免數據庫重啟後
+        連接池中殘留的舊連接讓接下來的請求在查詢中途才失敗
+        
+        Args:
+            pg_pool: psycopg2 連接池
+            
+        Returns:
+            psycopg2.extensions.connection: 可用的 PostgreSQL 連接
+        """
+        conn = pg_pool.getconn()
+        if not self._is_usable(conn):
+            logger.warning("Discarding dead PostgreSQL connection from pool")
+            self._discard(pg_pool, conn)
+            conn = pg_pool.getconn()
+        return conn
+    
+    def _thread_connection(self, name: str, pg_pool):
+        """
+        取得當前線程綁定的連接（persistent 模式）
+        
+        首次使用或連接已失效時才向連接池借用，之後只需一次線程本地查找
+        
+        Args:
+            name (str): 連接池名稱（main、people）
+            pg_pool: psycopg2 連接池
+            
+        Returns:
+            psycopg2.extensions.connection: PostgreSQL 連接對象
+        """
+        conn = getattr(self._tls, name, None)
+        if conn is None or not self._is_usable(conn):
+            if conn is not None:
+                logger.warning("Discarding dead PostgreSQL connection bound to thread")
+                self._discard(pg_pool, conn)
+            conn = self._checkout(pg_pool)
+            setattr(self._tls, name, conn)
+        return conn
+    
+    def _reset_thread_connection(self, conn) -> None:
+        """
+        persistent 模式下「歸還」連接：保留綁定，只回滾未結束的事務
+        （與連接池 putconn 的行為一致；閒置時無需往返數據庫）
+        """
+        if not conn.closed and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        self._last_used[conn] = time.monotonic()
+    
+    def release_thread_connections(self) -> None:
+        """
+        將當前線程綁定的連接歸還到連接池（persistent 模式）
+        
+        應在工作線程結束時調用（未調用的線程結束後，其連接在 close_all 前
+        仍佔用連接池名額）；threaded 模式下無作用
+        """
+        for name, pg_pool in (("main", self._postgres_pool), ("people", self._people_postgres_pool)):
+            conn = getattr(self._tls, name, None)
+            if conn is not None:
+                delattr(self._tls, name)
+                if pg_pool:
+                    self._release(pg_pool, conn)
+    
     def get_postgres_connection(self):
         """
         獲取主 PostgreSQL 連接（用於 articles 表）
@@ -165,8 +410,11 @@ class ConnectionPoolManager:
         Returns:
             psycopg2.extensions.connection: PostgreSQL 連接對象，如果池未初始化則返回 None
         """
-        if self.postgres_pool:
-            return self.postgres_pool.getconn()
+        pg_pool = self.postgres_pool
+        if pg_pool:
+            if _THREAD_AFFINITY:
+                return self._thread_connection("main", pg_pool)
+            return self._checkout(pg_pool)
         return None
     
     def return_postgres_connection(self, conn):
@@ -179,8 +427,11 @@ class ConnectionPoolManager:
         Args:
             conn: PostgreSQL 連接對象
         """
-        if self.postgres_pool and conn:
-            self.postgres_pool.putconn(conn)
+        if self._postgres_pool and conn:
+            if _THREAD_AFFINITY:
+                self._reset_thread_connection(conn)
+            else:
+                self._release(self._postgres_pool, conn)
     
     def get_people_postgres_connection(self):
         """
@@ -191,8 +442,11 @@ class ConnectionPoolManager:
         Returns:
             psycopg2.extensions.connection: PostgreSQL 連接對象，如果池未初始化則返回 None
         """
-        if self.people_postgres_pool:
-            return self.people_postgres_pool.getconn()
+        pg_pool = self.people_postgres_pool
+        if pg_pool:
+            if _THREAD_AFFINITY:
+                return self._thread_connection("people", pg_pool)
+            return self._checkout(pg_pool)
         return None
     
     def return_people_postgres_connection(self, conn):
@@ -205,20 +459,143 @@ class ConnectionPoolManager:
         Args:
             conn: PostgreSQL 連接對象
         """
-        if self.people_postgres_pool and conn:
-            self.people_postgres_pool.putconn(conn)
+        if self._people_postgres_pool and conn:
+            if _THREAD_AFFINITY:
+                self._reset_thread_connection(conn)
+            else:
+                self._release(self._people_postgres_pool, conn)
+    
+    @contextmanager
+    def postgres(self):
+        """
+        以上下文管理器借用主 PostgreSQL 連接（用於 articles 表）
+        
+        離開 with 區塊時（包括發生異常時）保證歸還連接；未提交的事務
+        會在歸還時由連接池回滾：
+        
+            with pool_manager.postgres() as conn:
+                ...
+        
+        Yields:
+            psycopg2.extensions.connection: PostgreSQL 連接對象
+            
+        Raises:
+            Exception: 連接池未初始化
+        """
+        conn = self.get_postgres_connection()
+        if not conn:
+            raise Exception("Failed to get connection from pool")
+        try:
+            yield conn
+        finally:
+            self.return_postgres_connection(conn)
+    
+    @contextmanager
+    def people_postgres(self):
+        """
+        以上下文管理器借用人員 PostgreSQL 連接（用於 people 和 weapon 表）
+        
+        Yields:
+            psycopg2.extensions.connection: PostgreSQL 連接對象
+            
+        Raises:
+            Exception: 連接池未初始化
+        """
+        conn = self.get_people_postgres_connection()
+        if not conn:
+            raise Exception("Failed to get connection from people pool")
+        try:
+            yield conn
+        finally:
+            self.return_people_postgres_connection(conn)
+    
+    def bulk_insert(self, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]],
+                    template: Optional[str] = None, on_conflict: str = "",
+                    page_size: int = BULK_INSERT_PAGE_SIZE, people: bool = False) -> int:
+        """
+        以 execute_values 批量插入數據
+        
+        每 page_size 行合併為一條多行 INSERT，只需一次網絡往返，
+        而不是逐行執行 INSERT；連接只在寫入期間借用，完成後提交並歸還
+        
+        Args:
+            table (str): 表名（必須是程式內的常量，不可來自用戶輸入）
+            columns (Sequence[str]): 欄位名稱（同上）
+            rows (Sequence[Sequence[Any]]): 要插入的數據行
+            template (str): 單行的值模板，例如 "(%s, %s::vector)"，預設為全部 %s
+            on_conflict (str): 附加在 VALUES 之後的子句，例如 "ON CONFLICT (id) DO NOTHING"
+            page_size (int): 每條 INSERT 語句包含的行數
+            people (bool): True 時寫入人員數據庫，否則寫入主數據庫
+            
+        Returns:
+            int: 提交的行數
+            
+        Raises:
+            Exception: 連接池未初始化
+        """
+        if not rows:
+            return 0
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s {on_conflict}"
+        checkout = self.people_postgres if people else self.postgres
+        with checkout() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, query, rows, template=template, page_size=page_size)
+            conn.commit()
+        return len(rows)
     
     def get_redis_connection(self):
         """
         獲取 Redis 連接
         
-        從連接池中獲取一個可用的 Redis 連接
+        返回共用的 Redis 客戶端（底層使用連接池），避免每次調用都重新建立客戶端物件
         
         Returns:
             redis.Redis: Redis 連接對象，如果池未初始化則返回 None
         """
-        if self.redis_pool:
-            return redis.Redis(connection_pool=self.redis_pool)
+        return self.redis_client
+    
+    def get_async_redis_connection(self):
+        """
+        獲取 asyncio Redis 連接
+        
+        在 async def 路由或中間件中使用，命令以 await 執行，
+        等待 Redis 回應時不會阻塞事件循環
+        
+        Returns:
+            redis.asyncio.Redis: 共用的 asyncio Redis 客戶端
+        """
+        return self.async_redis_client
+    
+    def redis_pipeline(self):
+        """
+        建立非事務性的 Redis pipeline
+        
+        多個命令只需一次網絡往返，適合連續的 GET/SET：
+        
+            with pool_manager.redis_pipeline() as pipe:
+                pipe.get("a")
+                pipe.get("b")
+                a, b = pipe.execute()
+        
+        Returns:
+            redis.client.Pipeline: Redis pipeline，如果池未初始化則返回 None
+        """
+        if self.redis_client:
+            return self.redis_client.pipeline(transaction=False)
+        return None
+    
+    def new_redis_client(self):
+        """
+        建立獨立的 Redis 客戶端
+        
+        供需要獨立狀態的場景使用（例如 pubsub），仍共用同一個連接池
+        
+        Returns:
+            redis.Redis: 新的 Redis 客戶端，如果池未初始化則返回 None
+        """
+        redis_pool = self.redis_pool
+        if redis_pool:
+            return redis.Redis(connection_pool=redis_pool)
         return None
     
     def close_all(self):
@@ -228,17 +605,19 @@ class ConnectionPoolManager:
         安全地關閉所有連接池，釋放系統資源，
         通常在應用程式關閉時調用
         """
-        if self.postgres_pool:
+        self.release_thread_connections()
+        
+        if self._postgres_pool:
             # 關閉主 PostgreSQL 連接池
-            self.postgres_pool.closeall()
+            self._postgres_pool.closeall()
             logger.info("Main PostgreSQL connection pool closed")
         
-        if self.people_postgres_pool:
+        if self._people_postgres_pool:
             # 關閉人員 PostgreSQL 連接池
-            self.people_postgres_pool.closeall()
+            self._people_postgres_pool.closeall()
             logger.info("People PostgreSQL connection pool closed")
         
-        if self.redis_pool:
+        if self._redis_pool:
             # Redis 連接池會自動管理，記錄關閉信息
             logger.info("Redis connection pool closed")
     
@@ -246,63 +625,99 @@ class ConnectionPoolManager:
         """
         獲取連接池狀態
         
-        返回當前連接池的使用情況，用於監控和調試
+        返回當前連接池的使用情況，用於監控和調試。
+        已初始化的連接池會附帶使用中（in_use）與閒置（idle）的連接數量，
+        可在連接池耗盡前觀察使用率，作為調整 PG_POOL_MAX 等大小的依據
         
         Returns:
             Dict[str, Any]: 包含連接池狀態的字典
         """
-        status = {
-            "main_postgres": {
-                "pool_initialized": self.postgres_pool is not None,
-                "max_connections": 2,
-                "min_connections": 1,
-                "purpose": "articles table"
-            },
-            "people_postgres": {
-                "pool_initialized": self.people_postgres_pool is not None,
-                "max_connections": 1,
-                "min_connections": 1,
-                "purpose": "people and weapon tables"
-            },
-            "redis": {
-                "pool_initialized": self.redis_pool is not None,
-                "max_connections": 2
-            }
-        }
+        status = {name: dict(entry) for name, entry in self._static_pool_status().items()}
+        # 讀取 psycopg2 / redis-py 連接池的內部計數，只是幾次 len()，無需取鎖
+        if self._postgres_pool:
+            status["main_postgres"].update(
+                in_use=len(self._postgres_pool._used), idle=len(self._postgres_pool._pool)
+            )
+        if self._people_postgres_pool:
+            status["people_postgres"].update(
+                in_use=len(self._people_postgres_pool._used), idle=len(self._people_postgres_pool._pool)
+            )
+        if self._redis_pool:
+            status["redis"].update(
+                in_use=len(self._redis_pool._in_use_connections),
+                idle=len(self._redis_pool._available_connections)
+            )
+        return status
+    
+    def _static_pool_status(self) -> Mapping[str, Any]:
+        """
+        獲取連接池狀態中不隨使用變化的部分
+        
+        只會在連接池初始化時改變，因此按初始化狀態快取，
+        健康檢查頻繁輪詢時不必每次重建整個字典
         
-        # 如果主 PostgreSQL 連接池已初始化，獲取詳細狀態
-        if self.postgres_pool:
-            try:
-                status["main_postgres"]["pool_type"] = "ThreadedConnectionPool"
-                status["main_postgres"]["status"] = "active"
-            except Exception as e:
-                status["main_postgres"]["status"] = f"error: {str(e)}"
-        
-        # 如果人員 PostgreSQL 連接池已初始化，獲取詳細狀態
-        if self.people_postgres_pool:
-            try:
-                status["people_postgres"]["pool_type"] = "ThreadedConnectionPool"
-                status["people_postgres"]["status"] = "active"
-            except Exception as e:
-                status["people_postgres"]["status"] = f"error: {str(e)}"
+        Returns:
+            Mapping[str, Any]: 唯讀的靜態狀態映射
+        """
+        key = (self._postgres_pool is not None,
+               self._people_postgres_pool is not None,
+               self._redis_pool is not None)
+        cached = self._status_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        main_ready, people_ready, redis_ready = key
+        main_postgres = {
+            "pool_initialized": main_ready,
+            "max_connections": MAIN_PG_POOL_MAX,
+            "min_connections": MAIN_PG_POOL_MIN,
+            "purpose": "articles table"
+        }
+        people_postgres = {
+            "pool_initialized": people_ready,
+            "max_connections": PEOPLE_PG_POOL_MAX,
+            "min_connections": PEOPLE_PG_POOL_MIN,
+            "purpose": "people and weapon tables"
+        }
+        # 已初始化的 PostgreSQL 連接池附帶類型與狀態
+        for entry, ready in ((main_postgres, main_ready), (people_postgres, people_ready)):
+            if ready:
+                entry["pool_type"] = _POOL_CLASS.__name__
+                entry["mode"] = PG_POOL_MODE
+                entry["status"] = "active"
         
+        status = MappingProxyType({
+            "main_postgres": MappingProxyType(main_postgres),
+            "people_postgres": MappingProxyType(people_postgres),
+            "redis": MappingProxyType({
+                "pool_initialized": redis_ready,
+                "max_connections": REDIS_POOL_SIZE
+            })
+        })
+        self._status_cache = (key, status)
         return status
 
 # ==================== 全局連接池管理器 ====================
 # 全局連接池管理器實例（懶加載模式）
 _pool_manager = None
+_pool_manager_lock = threading.Lock()
 
 def get_pool_manager():
     """
     獲取連接池管理器（懶加載）
     
     使用單例模式管理全局連接池管理器，
-    確保整個應用程式使用同一個連接池實例
+    確保整個應用程式使用同一個連接池實例。
+    初始化後的快速路徑不取鎖；首次初始化以雙重檢查鎖定，
+    避免並發的首次呼叫重複建立連接池
     
     Returns:
         ConnectionPoolManager: 連接池管理器實例
     """
     global _pool_manager
-    if _pool_manager is None:
-        _pool_manager = ConnectionPoolManager()
+    if _pool_manager is not None:
+        return _pool_manager
+    with _pool_manager_lock:
+        if _pool_manager is None:
+            _pool_manager = ConnectionPoolManager()
     return _pool_manager 
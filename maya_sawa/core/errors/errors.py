@@ -5,7 +5,7 @@ This module provides centralized error codes and exception handling
 for the Maya Sawa Unified API, similar to Java's enum-based error management.
 
 Features:
-- ErrorCode enum for all error codes
+- ErrorCode constants for all error codes
 - AppException custom exception class
 - Standardized error response format
 - Global exception handlers for FastAPI
@@ -14,8 +14,10 @@ Author: Maya Sawa Team
 Version: 0.1.0
 """
 
-from enum import Enum
-from typing import Any, Dict, Optional, List
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, List, Tuple
 try:
     from fastapi import HTTPException, Request, status
     from fastapi.responses import JSONResponse
@@ -37,18 +39,32 @@ except ImportError:
 
     class RequestValidationError(Exception):
         pass
+try:
+    # Error responses are serialized by orjson (native C, native datetime support);
+    # fall back to the standard JSONResponse when orjson is not installed
+    import orjson  # noqa: F401  (required by ORJSONResponse at render time)
+    from fastapi.responses import ORJSONResponse as _ErrorJSONResponse
+    _HAS_ORJSON = True
+except ImportError:
+    _ErrorJSONResponse = JSONResponse
+    _HAS_ORJSON = False
 from pydantic import BaseModel
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-# ==================== Error Codes Enum ====================
+# ==================== Error Codes ====================
 
-class ErrorCode(Enum):
+class ErrorCode:
     """
     Centralized error codes for the application.
     
+    A plain class rather than an Enum: every member is a module-level
+    ErrorCode instance with slot attributes, so ``error_code.code`` is a
+    direct attribute load instead of an Enum descriptor/property call on
+    every raised AppException.
+    
     Each error code contains:
     - code: Unique error code string
     - message: Default error message (Chinese)
@@ -369,31 +385,26 @@ class ErrorCode(Enum):
         status.HTTP_500_INTERNAL_SERVER_ERROR
     )
     
-    def __init__(self, code: str, message: str, message_en: str, http_status: int):
-        self._code = code
-        self._message = message
-        self._message_en = message_en
-        self._http_status = http_status
-    
-    @property
-    def code(self) -> str:
-        """Return the error code string"""
-        return self._code
+    __slots__ = ('name', 'code', 'message', 'message_en', 'http_status')
     
-    @property
-    def message(self) -> str:
-        """Return the default message (Chinese)"""
-        return self._message
+    def __init__(self, code: str, message: str, message_en: str, http_status: int, name: str = ""):
+        self.name = name
+        # Interned: the same code/message strings are reused in every response and log record
+        self.code = sys.intern(code)
+        self.message = sys.intern(message)
+        self.message_en = sys.intern(message_en)
+        self.http_status = http_status
     
-    @property
-    def message_en(self) -> str:
-        """Return the default message (English)"""
-        return self._message_en
-    
-    @property
-    def http_status(self) -> int:
-        """Return the HTTP status code"""
-        return self._http_status
+    def __repr__(self) -> str:
+        return f"<ErrorCode.{self.name}: {self.code}>"
+
+
+# Replace the (code, message, message_en, http_status) tuples declared in the
+# class body with ErrorCode instances, e.g. ErrorCode.NOT_FOUND.code == "E1005"
+for _name, _value in list(vars(ErrorCode).items()):
+    if not _name.startswith('_') and isinstance(_value, tuple):
+        setattr(ErrorCode, _name, ErrorCode(*_value, name=_name))
+del _name, _value
 
 
 # ==================== Response Models ====================
@@ -445,6 +456,8 @@ class AppException(Exception):
         raise AppException(ErrorCode.DATABASE_UNAVAILABLE, message="Paprika database not available")
     """
     
+    __slots__ = ('error_code', '_code_str', 'message', 'message_en', 'detail', 'errors', 'http_status')
+    
     def __init__(
         self,
         error_code: ErrorCode,
@@ -454,6 +467,8 @@ class AppException(Exception):
         errors: Optional[List[Dict[str, str]]] = None
     ):
         self.error_code = error_code
+        # Code string cached for to_dict / handler logging
+        self._code_str = error_code.code
         self.message = message or error_code.message
         self.message_en = message_en or error_code.message_en
         self.detail = detail
@@ -465,7 +480,7 @@ class AppException(Exception):
         """Convert exception to dictionary for JSON response"""
         response = {
             "success": False,
-            "error_code": self.error_code.code,
+            "error_code": self._code_str,
             "message": self.message,
             "message_en": self.message_en,
         }
@@ -478,27 +493,78 @@ class AppException(Exception):
 
 # ==================== Exception Handlers ====================
 
+def _error_base(error_code: ErrorCode) -> Dict[str, Any]:
+    """Invariant leading fields of an error response for a fixed error code"""
+    return {
+        "success": False,
+        "error_code": error_code.code,
+        "message": error_code.message,
+        "message_en": error_code.message_en,
+    }
+
+
+# Fixed parts of the validation / unhandled-error responses; handlers only add
+# the per-request fields on top
+_VALIDATION_ERROR_BASE = _error_base(ErrorCode.VALIDATION_ERROR)
+_INTERNAL_ERROR_BASE = _error_base(ErrorCode.INTERNAL_SERVER_ERROR)
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO 8601 string for the response timestamp"""
+    return datetime.now(timezone.utc).isoformat()
+
+
+if _HAS_ORJSON:
+    def _timestamp() -> datetime:
+        """Current UTC time; orjson renders it as the same ISO 8601 string"""
+        return datetime.now(timezone.utc)
+else:
+    _timestamp = _now_iso
+
+
+# Map HTTP status to error code (built once at import)
+_STATUS_TO_ERROR_CODE = {
+    status.HTTP_400_BAD_REQUEST: ErrorCode.BAD_REQUEST,
+    status.HTTP_401_UNAUTHORIZED: ErrorCode.UNAUTHORIZED,
+    status.HTTP_403_FORBIDDEN: ErrorCode.FORBIDDEN,
+    status.HTTP_404_NOT_FOUND: ErrorCode.NOT_FOUND,
+    status.HTTP_405_METHOD_NOT_ALLOWED: ErrorCode.METHOD_NOT_ALLOWED,
+    status.HTTP_409_CONFLICT: ErrorCode.CONFLICT,
+    status.HTTP_422_UNPROCESSABLE_ENTITY: ErrorCode.VALIDATION_ERROR,
+    status.HTTP_429_TOO_MANY_REQUESTS: ErrorCode.TOO_MANY_REQUESTS,
+    status.HTTP_500_INTERNAL_SERVER_ERROR: ErrorCode.INTERNAL_SERVER_ERROR,
+    status.HTTP_502_BAD_GATEWAY: ErrorCode.REMOTE_API_ERROR,
+    status.HTTP_503_SERVICE_UNAVAILABLE: ErrorCode.DATABASE_UNAVAILABLE,
+    status.HTTP_504_GATEWAY_TIMEOUT: ErrorCode.REMOTE_API_TIMEOUT,
+}
+
+
+def _make_response(path: str, status_code: int, content: Dict[str, Any]) -> JSONResponse:
+    """
+    Finish an error response shared by all handlers.
+    
+    ``content`` holds the leading fields (success, error_code, message, ...);
+    the per-request timestamp and path are appended here. Handlers read
+    ``request.url.path`` once and pass it in, reusing it for their log line.
+    """
+    content["timestamp"] = _timestamp()
+    content["path"] = path
+    return _ErrorJSONResponse(status_code=status_code, content=content)
+
+
 async def app_exception_handler(request: Request, exc: AppException) -> JSONResponse:
     """
     Global handler for AppException.
     
     Returns standardized JSON response with error details.
     """
-    from datetime import datetime
-    
+    path = request.url.path
     logger.error(
-        f"AppException: {exc.error_code.code} - {exc.message}",
-        extra={"detail": exc.detail, "path": request.url.path}
+        "AppException: %s - %s", exc._code_str, exc.message,
+        extra={"detail": exc.detail, "path": path}
     )
     
-    response_data = exc.to_dict()
-    response_data["timestamp"] = datetime.utcnow().isoformat()
-    response_data["path"] = str(request.url.path)
-    
-    return JSONResponse(
-        status_code=exc.http_status,
-        content=response_data
-    )
+    return _make_response(path, exc.http_status, exc.to_dict())
 
 
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
@@ -507,25 +573,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     
     Converts HTTPException to standardized response format.
     """
-    from datetime import datetime
-    
-    # Map HTTP status to error code
-    status_to_error_code = {
-        status.HTTP_400_BAD_REQUEST: ErrorCode.BAD_REQUEST,
-        status.HTTP_401_UNAUTHORIZED: ErrorCode.UNAUTHORIZED,
-        status.HTTP_403_FORBIDDEN: ErrorCode.FORBIDDEN,
-        status.HTTP_404_NOT_FOUND: ErrorCode.NOT_FOUND,
-        status.HTTP_405_METHOD_NOT_ALLOWED: ErrorCode.METHOD_NOT_ALLOWED,
-        status.HTTP_409_CONFLICT: ErrorCode.CONFLICT,
-        status.HTTP_422_UNPROCESSABLE_ENTITY: ErrorCode.VALIDATION_ERROR,
-        status.HTTP_429_TOO_MANY_REQUESTS: ErrorCode.TOO_MANY_REQUESTS,
-        status.HTTP_500_INTERNAL_SERVER_ERROR: ErrorCode.INTERNAL_SERVER_ERROR,
-        status.HTTP_502_BAD_GATEWAY: ErrorCode.REMOTE_API_ERROR,
-        status.HTTP_503_SERVICE_UNAVAILABLE: ErrorCode.DATABASE_UNAVAILABLE,
-        status.HTTP_504_GATEWAY_TIMEOUT: ErrorCode.REMOTE_API_TIMEOUT,
-    }
-    
-    error_code = status_to_error_code.get(exc.status_code, ErrorCode.INTERNAL_SERVER_ERROR)
+    path = request.url.path
+    error_code = _STATUS_TO_ERROR_CODE.get(exc.status_code, ErrorCode.INTERNAL_SERVER_ERROR)
     
     # Handle detail as string or dict
     detail = exc.detail
@@ -537,8 +586,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
         message = detail.get("message", error_code.message)
     
     logger.warning(
-        f"HTTPException: {exc.status_code} - {message}",
-        extra={"path": request.url.path}
+        "HTTPException: %s - %s", exc.status_code, message,
+        extra={"path": path}
     )
     
     response_data = {
@@ -546,17 +595,12 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
         "error_code": error_code.code,
         "message": message,
         "message_en": error_code.message_en,
-        "timestamp": datetime.utcnow().isoformat(),
-        "path": str(request.url.path)
     }
     
     if isinstance(detail, dict) and "errors" in detail:
         response_data["errors"] = detail["errors"]
     
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=response_data
-    )
+    return _make_response(path, exc.status_code, response_data)
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
@@ -565,33 +609,25 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     
     Converts Pydantic validation errors to standardized format.
     """
-    from datetime import datetime
-    
-    errors = []
-    for error in exc.errors():
-        field = ".".join(str(loc) for loc in error["loc"])
-        errors.append({
-            "field": field,
+    path = request.url.path
+    errors = [
+        {
+            "field": ".".join(map(str, error["loc"])),
             "message": error["msg"],
             "code": error.get("type", "validation_error")
-        })
+        }
+        for error in exc.errors()
+    ]
     
     logger.warning(
-        f"ValidationError: {len(errors)} validation errors",
-        extra={"path": request.url.path, "errors": errors}
+        "ValidationError: %d validation errors", len(errors),
+        extra={"path": path, "errors": errors}
     )
     
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={
-            "success": False,
-            "error_code": ErrorCode.VALIDATION_ERROR.code,
-            "message": ErrorCode.VALIDATION_ERROR.message,
-            "message_en": ErrorCode.VALIDATION_ERROR.message_en,
-            "errors": errors,
-            "timestamp": datetime.utcnow().isoformat(),
-            "path": str(request.url.path)
-        }
+    return _make_response(
+        path,
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        {**_VALIDATION_ERROR_BASE, "errors": errors}
     )
 
 
@@ -601,29 +637,58 @@ async def general_exception_handler(request: Request, exc: Exception) -> JSONRes
     
     Catches all unhandled exceptions and returns a standardized 500 response.
     """
-    from datetime import datetime
-    
+    path = request.url.path
     logger.exception(
-        f"Unhandled exception: {type(exc).__name__} - {str(exc)}",
-        extra={"path": request.url.path}
+        "Unhandled exception: %s - %s", type(exc).__name__, exc,
+        extra={"path": path}
     )
     
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "success": False,
-            "error_code": ErrorCode.INTERNAL_SERVER_ERROR.code,
-            "message": ErrorCode.INTERNAL_SERVER_ERROR.message,
-            "message_en": ErrorCode.INTERNAL_SERVER_ERROR.message_en,
-            "detail": str(exc) if logger.level <= logging.DEBUG else None,
-            "timestamp": datetime.utcnow().isoformat(),
-            "path": str(request.url.path)
-        }
+    return _make_response(
+        path,
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        {**_INTERNAL_ERROR_BASE, "detail": str(exc) if logger.level <= logging.DEBUG else None}
     )
 
 
 # ==================== Helper Functions ====================
 
+# The raise_* helpers are called with a small, fixed set of resource types,
+# database names and operations; the text derived from those is built once
+
+@lru_cache(maxsize=128)
+def _not_found_parts(resource_type: str) -> Tuple[str, str]:
+    """Message prefix and detail key for raise_not_found"""
+    return f"{resource_type} ", f"{resource_type.lower()}_id"
+
+
+@lru_cache(maxsize=32)
+def _db_unavailable_messages(db_name: str) -> Tuple[str, str]:
+    """(message, message_en) for raise_db_unavailable"""
+    return f"{db_name} 資料庫不可用", f"{db_name} database not available"
+
+
+@lru_cache(maxsize=128)
+def _already_exists_parts(resource_type: str, field: str) -> Tuple[ErrorCode, str, str]:
+    """Error code and message prefixes for raise_already_exists"""
+    return (
+        ErrorCode.CONFLICT if resource_type != "Article" else ErrorCode.ARTICLE_ALREADY_EXISTS,
+        f"{resource_type} 已存在（{field}: ",
+        f"{resource_type} already exists ({field}: ",
+    )
+
+
+@lru_cache(maxsize=128)
+def _operation_failed_messages(operation: str) -> Tuple[str, str]:
+    """(message, message_en) for raise_operation_failed"""
+    return f"{operation}失敗", f"Failed to {operation}"
+
+
+@lru_cache(maxsize=32)
+def _remote_api_messages(url: str) -> Tuple[str, str]:
+    """(message, message_en) for raise_remote_api_error"""
+    return f"無法連接到遠端 API: {url}", f"Cannot connect to remote API: {url}"
+
+
 def raise_not_found(
     resource_type: str,
     resource_id: Any,
@@ -637,11 +702,13 @@ def raise_not_found(
         raise_not_found("AI Model", model_id, ErrorCode.AI_MODEL_NOT_FOUND)
     """
     code = error_code or ErrorCode.NOT_FOUND
+    prefix, detail_key = _not_found_parts(resource_type)
+    resource_id_text = str(resource_id)
     raise AppException(
         code,
-        message=f"{resource_type} {resource_id} 不存在",
-        message_en=f"{resource_type} {resource_id} not found",
-        detail={f"{resource_type.lower()}_id": resource_id}
+        message=prefix + resource_id_text + " 不存在",
+        message_en=prefix + resource_id_text + " not found",
+        detail={detail_key: resource_id}
     )
 
 
@@ -653,10 +720,11 @@ def raise_db_unavailable(db_name: str) -> None:
         raise_db_unavailable("Paprika")
         raise_db_unavailable("Maya-v2")
     """
+    message, message_en = _db_unavailable_messages(db_name)
     raise AppException(
         ErrorCode.DATABASE_UNAVAILABLE,
-        message=f"{db_name} 資料庫不可用",
-        message_en=f"{db_name} database not available",
+        message=message,
+        message_en=message_en,
         detail={"database": db_name}
     )
 
@@ -693,10 +761,12 @@ def raise_already_exists(
     Usage:
         raise_already_exists("Article", "file_path", "/path/to/article.md")
     """
+    code, prefix, prefix_en = _already_exists_parts(resource_type, field)
+    value_text = str(value)
     raise AppException(
-        ErrorCode.CONFLICT if resource_type != "Article" else ErrorCode.ARTICLE_ALREADY_EXISTS,
-        message=f"{resource_type} 已存在（{field}: {value}）",
-        message_en=f"{resource_type} already exists ({field}: {value})",
+        code,
+        message=prefix + value_text + "）",
+        message_en=prefix_en + value_text + ")",
         detail={field: value}
     )
 
@@ -716,10 +786,11 @@ def raise_operation_failed(
     if original_error:
         detail = {"error": str(original_error)}
     
+    message, message_en = _operation_failed_messages(operation)
     raise AppException(
         error_code,
-        message=f"{operation}失敗",
-        message_en=f"Failed to {operation}",
+        message=message,
+        message_en=message_en,
         detail=detail
     )
 
@@ -734,10 +805,11 @@ def raise_remote_api_error(
     Usage:
         raise_remote_api_error("https://api.example.com/articles", e)
     """
+    message, message_en = _remote_api_messages(url)
     raise AppException(
         ErrorCode.REMOTE_API_UNAVAILABLE,
-        message=f"無法連接到遠端 API: {url}",
-        message_en=f"Cannot connect to remote API: {url}",
+        message=message,
+        message_en=message_en,
         detail={
             "url": url,
             "error": str(original_error) if original_error else None
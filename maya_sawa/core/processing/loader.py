@@ -20,13 +20,16 @@ Markdown Q&A System - 文檔載入器模組
 """
 
 # 標準庫導入
+import asyncio
+import functools
+import os
+from pathlib import Path
 from typing import List
 
 # LangChain 相關導入
 try:
     from langchain.text_splitter import RecursiveCharacterTextSplitter
     from langchain.schema import Document
-    from langchain_community.document_loaders import TextLoader, PyPDFLoader
 except ImportError as e:
     raise ImportError(f"LangChain packages are required but not installed. Please install with: poetry install") from e
 
@@ -53,8 +56,26 @@ class DocumentLoader:
             chunk_size (int): 每個分塊的最大字符數，默認 1000
             chunk_overlap (int): 相鄰分塊的重疊字符數，默認 200
         """
-        # 初始化遞歸字符分割器
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        # 相同參數的實例共用同一個遞歸字符分割器
+        self.text_splitter = self._get_splitter(chunk_size, chunk_overlap)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=8)
+    def _get_splitter(cls, chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+        """
+        取得共用的遞歸字符分割器
+        
+        分割器在分塊時不保存狀態，可安全地在實例之間共用，
+        每次建立 DocumentLoader 時無需重新構建
+        
+        Args:
+            chunk_size (int): 每個分塊的最大字符數
+            chunk_overlap (int): 相鄰分塊的重疊字符數
+            
+        Returns:
+            RecursiveCharacterTextSplitter: 文本分割器
+        """
+        return RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,  # 分塊大小
             chunk_overlap=chunk_overlap,  # 重疊大小
             length_function=len,  # 長度計算函數
@@ -75,14 +96,11 @@ class DocumentLoader:
         Returns:
             List[Document]: 分塊後的文檔列表
         """
-        # 創建單個文檔對象
-        document = Document(
-            page_content=text,
-            metadata={"source": filename}  # 設置來源元數據
-        )
-        
-        # 使用文本分割器進行分塊
-        return self.text_splitter.split_documents([document])
+        # 直接分割文本再包裝為文檔，省去先建立整篇 Document 再拆開的往返
+        return [
+            Document(page_content=chunk, metadata={"source": filename})  # 設置來源元數據
+            for chunk in self.text_splitter.split_text(text)
+        ]
 
     def load_markdown(self, file_path: str) -> List[Document]:
         """
@@ -97,6 +115,9 @@ class DocumentLoader:
         Returns:
             List[Document]: 分塊後的文檔列表
         """
+        # 延遲導入：只提供問答服務的進程不需要載入 document_loaders
+        from langchain_community.document_loaders import TextLoader
+        
         # 使用 TextLoader 載入 Markdown 文件，指定 UTF-8 編碼
         loader = TextLoader(file_path, encoding='utf-8')
         documents = loader.load()
@@ -117,12 +138,45 @@ class DocumentLoader:
         Returns:
             List[Document]: 分塊後的文檔列表
         """
-        # 使用 PyPDFLoader 載入 PDF 文件
+        # 延遲導入：pypdf 較重，僅在實際處理 PDF 時才載入
+        from langchain_community.document_loaders import PyPDFLoader
+        
+        # 使用 PyPDFLoader 逐頁載入 PDF 文件並分塊，
+        # 每頁文本在分塊後即可釋放，不必讓所有頁面與所有分塊同時駐留內存
         loader = PyPDFLoader(file_path)
-        documents = loader.load()
+        chunks = []
+        for page in loader.lazy_load():
+            chunks.extend(self.text_splitter.split_documents([page]))
+        return chunks
+
+    async def aload_markdown(self, file_path: str) -> List[Document]:
+        """
+        非同步載入 Markdown 文件並分塊
         
-        # 對載入的文檔進行分塊處理
-        return self.text_splitter.split_documents(documents)
+        文件讀取在線程池中執行，不阻塞事件循環；結果與 load_markdown 相同
+        
+        Args:
+            file_path (str): Markdown 文件路徑
+            
+        Returns:
+            List[Document]: 分塊後的文檔列表
+        """
+        content = await asyncio.to_thread(Path(file_path).read_text, encoding='utf-8')
+        return self.load_from_text(content, file_path)
+
+    async def aload_pdf(self, file_path: str) -> List[Document]:
+        """
+        非同步載入 PDF 文件並分塊
+        
+        PDF 解析為 CPU 與 I/O 密集的同步操作，整體交由線程池執行
+        
+        Args:
+            file_path (str): PDF 文件路徑
+            
+        Returns:
+            List[Document]: 分塊後的文檔列表
+        """
+        return await asyncio.to_thread(self.load_pdf, file_path)
 
     def load_document(self, file_path: str) -> List[Document]:
         """
@@ -141,12 +195,14 @@ class DocumentLoader:
             ValueError: 當文件格式不支持時拋出異常
         """
         # 根據文件擴展名選擇載入器
-        if file_path.lower().endswith('.md'):
-            # Markdown 文件
-            return self.load_markdown(file_path)
-        elif file_path.lower().endswith('.pdf'):
-            # PDF 文件
-            return self.load_pdf(file_path)
-        else:
+        handler = self._LOADERS.get(os.path.splitext(file_path)[1].lower())
+        if handler is None:
             # 不支持的文件格式
-            raise ValueError(f"Unsupported file type: {file_path}") 
\ No newline at end of file
+            raise ValueError(f"Unsupported file type: {file_path}")
+        return handler(self, file_path)
+    
+    # 文件擴展名（小寫）對應的載入方法
+    _LOADERS = {
+        '.md': load_markdown,  # Markdown 文件
+        '.pdf': load_pdf,  # PDF 文件
+    } 
\ No newline at end of file
@@ -1,16 +1,123 @@
+import asyncio
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
+
+from ..config.config import Config
 
 logger = logging.getLogger(__name__)
 
+# 提示模板，以 (語言, 分析類型) 為鍵；每次只格式化選中的一個
+_PROMPT_TEMPLATES = {
+    ("english", "summary"): "Please provide a summary of no more than 200 words for the following web page content:\n\n{content}",
+    ("english", "key_points"): "Please extract the key points from the following web page content in a bulleted format:\n\n{content}",
+    ("english", "technical"): "Please analyze the technical concepts or specialized terms in the following web page content:\n\n{content}",
+    ("english", "qa"): "Based on the following web page content, generate 3 related questions:\n\n{content}",
+    ("chinese", "summary"): "請為以下網頁內容提供不超過 200 字的摘要：\n\n{content}",
+    ("chinese", "key_points"): "請以條列方式提取以下網頁內容的重點：\n\n{content}",
+    ("chinese", "technical"): "請分析以下網頁內容中的技術概念或專有名詞：\n\n{content}",
+    ("chinese", "qa"): "基於以下網頁內容，生成 3 個相關問題：\n\n{content}",
+}
+
+# 預先綁定各模板的 format 方法，請求時只需一次字典查找
+_PROMPT_BUILDERS = {key: template.format for key, template in _PROMPT_TEMPLATES.items()}
+
+# 內容長度上限：先以字元數粗略截斷，再以 token 數精確限制（CJK 每字約佔 1 個以上 token）
+_MAX_CHARS = 3000
+
+# tiktoken 編碼器（langchain-openai 的依賴；未安裝時僅以字元數截斷）
+_encoding = None
+
+
+def _get_encoding():
+    """取得 tiktoken 編碼器（首次使用時載入），不可用時返回 False"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.debug("tiktoken 不可用，僅以字元數截斷: %s", e)
+            _encoding = False
+    return _encoding
+
+
+def _truncate(content: str) -> str:
+    """將內容截斷到字元與 token 上限內，被截斷時結尾加上 "..." """
+    truncated = len(content) > _MAX_CHARS
+    if truncated:
+        content = content[:_MAX_CHARS]
+    max_tokens = Config.PAGE_ANALYSIS_MAX_TOKENS
+    encoding = _get_encoding() if max_tokens > 0 else False
+    if encoding:
+        tokens = encoding.encode(content, disallowed_special=())
+        if len(tokens) > max_tokens:
+            # 解碼時丟棄被截斷在多字節字元中間的殘缺字節
+            content = encoding.decode_bytes(tokens[:max_tokens]).decode("utf-8", "ignore")
+            truncated = True
+    return content + "..." if truncated else content
+
+# 進行中的分析（請求鍵 -> Future），並發的相同請求共用同一次 LLM 調用
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+# 進程內共用的快取（PageAnalyzer 每個請求建立一次，快取需跨實例保存）
+_exact_cache = None
+_semantic_cache = None
+
+
+def _get_exact_cache():
+    """取得共用的精確快取（首次使用時依配置選擇進程內或 Redis 後端）"""
+    global _exact_cache
+    if _exact_cache is None:
+        from ..services.llm_cache import ExactLLMCache, RedisExactLLMCache
+        if Config.PAGE_ANALYSIS_EXACT_CACHE_BACKEND == "redis":
+            _exact_cache = RedisExactLLMCache(
+                prefix="page_analysis:",
+                ttl_seconds=Config.PAGE_ANALYSIS_EXACT_CACHE_TTL_SECONDS,
+            )
+        else:
+            _exact_cache = ExactLLMCache(
+                maxsize=Config.PAGE_ANALYSIS_EXACT_CACHE_MAXSIZE,
+                ttl_seconds=Config.PAGE_ANALYSIS_EXACT_CACHE_TTL_SECONDS,
+            )
+    return _exact_cache
+
+
+def _get_semantic_cache():
+    """取得共用的語義快取（首次使用時建立）"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        from ..services.llm_cache import SemanticLLMCache
+        _semantic_cache = SemanticLLMCache(
+            maxsize=Config.PAGE_ANALYSIS_CACHE_MAXSIZE,
+            ttl_seconds=Config.PAGE_ANALYSIS_CACHE_TTL_SECONDS,
+        )
+    return _semantic_cache
+
 
 class PageAnalyzer:
     """簡易頁面文字分析器，重用現有 QAChain"""
 
     def __init__(self):
-        # 延遲導入以避免循環依賴
-        from ..qa.qa_chain import QAChain
-        self.qa_chain = QAChain()
+        self._qa_chain = None
+
+    @property
+    def qa_chain(self):
+        """底層 QAChain（首次調用 LLM 時才建立，快取命中時無需初始化）"""
+        if self._qa_chain is None:
+            # 延遲導入以避免循環依賴
+            from ..qa.qa_chain import QAChain
+            self._qa_chain = QAChain()
+        return self._qa_chain
+
+    @staticmethod
+    def _embed(content: str) -> Optional[List[float]]:
+        """計算頁面內容的向量嵌入；失敗時返回 None（略過快取，不影響分析）"""
+        try:
+            from ...services.embedding_service import get_embedding_service
+            return get_embedding_service().embed_query(content)
+        except Exception as e:
+            logger.warning("PageAnalyzer 語義快取略過，向量嵌入失敗: %s", e)
+            return None
 
     def analyze_page_content(self, content: str, analysis_type: str = "summary", language: str = "chinese") -> Dict:
         """分析頁面文字內容並回傳結果字典
@@ -25,40 +132,97 @@ class PageAnalyzer:
             analysis_type = "summary"
 
         # 避免內容過長導致 token 超限
-        MAX_LEN = 3000
-        content = (content[:MAX_LEN] + "...") if len(content) > MAX_LEN else content
-
-        # 根據語言選擇 prompt
-        if language.lower() == "english":
-            prompts = {
-                "summary": f"Please provide a summary of no more than 200 words for the following web page content:\n\n{content}",
-                "key_points": f"Please extract the key points from the following web page content in a bulleted format:\n\n{content}",
-                "technical": f"Please analyze the technical concepts or specialized terms in the following web page content:\n\n{content}",
-                "qa": f"Based on the following web page content, generate 3 related questions:\n\n{content}",
-            }
-        else:
-            # 中文模式（預設）
-            prompts = {
-                "summary": f"請為以下網頁內容提供不超過 200 字的摘要：\n\n{content}",
-                "key_points": f"請以條列方式提取以下網頁內容的重點：\n\n{content}",
-                "technical": f"請分析以下網頁內容中的技術概念或專有名詞：\n\n{content}",
-                "qa": f"基於以下網頁內容，生成 3 個相關問題：\n\n{content}",
-            }
-        
-        prompt = prompts[analysis_type]
+        content = _truncate(content)
+        content_length = len(content)
+
+        # 精確快取：完全相同的請求不計算向量嵌入，也不調用 LLM
+        exact_cache = exact_key = None
+        if Config.PAGE_ANALYSIS_EXACT_CACHE:
+            from ..services.llm_cache import exact_key as _exact_key
+            exact_cache = _get_exact_cache()
+            exact_key = _exact_key(analysis_type, language.lower(), content)
+            answer = exact_cache.get(exact_key)
+            if answer is not None:
+                logger.info("PageAnalyzer 精確快取命中：type=%s language=%s", analysis_type, language)
+                return {
+                    "success": True,
+                    "analysis_type": analysis_type,
+                    "answer": answer,
+                    "content_length": content_length,
+                    "language": language,
+                    "cache": "exact",
+                }
 
-        logger.info("PageAnalyzer 開始分析：type=%s len=%s language=%s", analysis_type, len(content), language)
+        # 語義快取：近似重複的頁面內容直接返回先前的分析結果
+        cache = embedding = namespace = None
+        if Config.PAGE_ANALYSIS_SEMANTIC_CACHE:
+            embedding = self._embed(content)
+            if embedding is not None:
+                cache = _get_semantic_cache()
+                namespace = cache.namespace(analysis_type, language.lower())
+                answer = cache.lookup(namespace, embedding, Config.PAGE_ANALYSIS_CACHE_THRESHOLD)
+                if answer is not None:
+                    if exact_cache is not None:
+                        exact_cache.set(exact_key, answer)
+                    logger.info("PageAnalyzer 語義快取命中：type=%s language=%s", analysis_type, language)
+                    return {
+                        "success": True,
+                        "analysis_type": analysis_type,
+                        "answer": answer,
+                        "content_length": content_length,
+                        "language": language,
+                        "cache": "semantic",
+                    }
+
+        # 根據語言選擇 prompt（非英文一律使用中文模式）
+        template_language = "english" if language.lower() == "english" else "chinese"
+        prompt = _PROMPT_BUILDERS[(template_language, analysis_type)](content=content)
+
+        logger.info("PageAnalyzer 開始分析：type=%s len=%s language=%s", analysis_type, content_length, language)
         try:
             # 直接呼叫底層 LLM，避免注入角色個人檔案
             response = self.qa_chain.llm.invoke(prompt)
             answer = response.content if hasattr(response, "content") else str(response)
+            if exact_cache is not None:
+                exact_cache.set(exact_key, answer)
+            if cache is not None:
+                cache.put(namespace, embedding, answer)
             return {
                 "success": True,
                 "analysis_type": analysis_type,
                 "answer": answer,
-                "content_length": len(content),
+                "content_length": content_length,
                 "language": language,
             }
         except Exception as e:
             logger.error("PageAnalyzer 失敗: %s", e)
             return {"success": False, "error": str(e)}
+
+    async def analyze_page_content_async(self, content: str, analysis_type: str = "summary", language: str = "chinese") -> Dict:
+        """analyze_page_content 的非同步版本，在線程中執行且合併並發的相同請求
+
+        同一時間內容、分析類型與語言完全相同的請求只會執行一次分析，
+        其餘呼叫端等待同一個結果，不會重複調用 LLM
+        """
+        from ..services.llm_cache import exact_key
+        key = exact_key(analysis_type, language.lower(), content)
+
+        future = _inflight.get(key)
+        if future is not None:
+            logger.info("PageAnalyzer 合併進行中的相同請求：type=%s language=%s", analysis_type, language)
+            # shield：單一等待者被取消時不影響共用的 Future
+            return dict(await asyncio.shield(future))
+
+        future = _inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            try:
+                result = await asyncio.to_thread(self.analyze_page_content, content, analysis_type, language)
+            except Exception as e:
+                logger.error("PageAnalyzer 失敗: %s", e)
+                result = {"success": False, "error": str(e)}
+            future.set_result(result)
+            return dict(result)
+        finally:
+            if not future.done():
+                future.cancel()
+            _inflight.pop(key, None)
@@ -58,7 +58,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         request.state.client_ip = client_ip
 
         if request.method != "OPTIONS":
-            error = self._validate_request(request, client_ip)
+            error = await self._validate_request(request, client_ip)
             if error:
                 error.headers["X-Request-ID"] = request_id
                 return error
@@ -82,7 +82,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         response.headers["Referrer-Policy"] = "no-referrer"
         return response
 
-    def _validate_request(self, request: Request, client_ip: str) -> JSONResponse | None:
+    async def _validate_request(self, request: Request, client_ip: str) -> JSONResponse | None:
         content_length = request.headers.get("content-length")
         if content_length:
             # 上傳端點使用獨立的較大上限
@@ -129,7 +129,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             if claims
             else Config.SECURITY_PUBLIC_RATE_LIMIT_PER_MINUTE
         )
-        if self._rate_limited(identity, request.url.path, limit):
+        if await self._rate_limited(identity, request.url.path, limit):
             response = self._error(429, "rate_limit_exceeded", "Too many requests")
             response.headers["Retry-After"] = "60"
             return response
@@ -157,16 +157,18 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         return request.headers.get("x-real-ip", peer).strip()
 
     @staticmethod
-    def _rate_limited(identity: str, path: str, limit: int) -> bool:
-        redis_client = get_pool_manager().get_redis_connection()
+    async def _rate_limited(identity: str, path: str, limit: int) -> bool:
+        # Every request passes through here, so use the asyncio client to keep
+        # the Redis round trips off the event loop thread.
+        redis_client = get_pool_manager().get_async_redis_connection()
         if not redis_client:
             return False
         bucket = int(time.time() // 60)
         key = f"maya-sawa:security:rate:{bucket}:{identity}:{path}"
         try:
-            count = redis_client.incr(key)
+            count = await redis_client.incr(key)
             if count == 1:
-                redis_client.expire(key, 120)
+                await redis_client.expire(key, 120)
             return int(count) > limit
         except Exception as exc:
             logger.warning("Global Redis rate limiter unavailable: %s", exc)
@@ -2,7 +2,7 @@
 Markdown Q&A System - 對話歷史管理模組
 
 這個模組實現了基於 Redis 的對話歷史管理功能，負責：
-1. 儲存用戶與 AI 的對話記錄
+1. 儲存用戶與 AI 的對話記錄（Redis Sorted Set，以毫秒時間戳為 score）
 2. 檢索和查詢對話歷史
 3. 提供對話統計信息
 4. 管理多用戶對話數據
@@ -20,20 +20,336 @@ Markdown Q&A System - 對話歷史管理模組
 """
 
 # 標準庫導入
+import atexit
+import functools
 import json
 import logging
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 # 第三方庫導入
 import redis
 
+try:
+    # orjson 原生輸出 UTF-8，比標準庫 json 快數倍；未安裝時退回標準庫
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    _loads = orjson.loads  # orjson.JSONDecodeError 繼承自 json.JSONDecodeError
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _loads = json.loads
+
 # 環境變數導入
 import os
 
+# 本地模組導入
+from ..config.config import Config
+
 # ==================== 日誌配置 ====================
 logger = logging.getLogger(__name__)
 
+# ==================== 共享連接池 ====================
+# 進程級共享的 Redis 連接池（懶加載），所有 ChatHistoryManager 實例共用，
+# 避免每個實例各自建立連接池造成大量閒置 socket 與重複連線
+_POOL: Optional[redis.BlockingConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> redis.BlockingConnectionPool:
+    """
+    獲取共享的 Redis 連接池（懶加載）
+
+    使用 BlockingConnectionPool 限制 socket 上限，連接耗盡時等待而非無限建立新連接
+
+    Returns:
+        redis.BlockingConnectionPool: 共享連接池
+    """
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = redis.BlockingConnectionPool(
+                    host=Config.REDIS_HOST,
+                    port=Config.REDIS_PORT,
+                    password=Config.REDIS_PASSWORD,
+                    db=0,  # 使用默認數據庫
+                    max_connections=int(os.getenv("REDIS_POOL_SIZE", "32")),
+                    timeout=5,  # 連接耗盡時最多等待 5 秒
+                    decode_responses=True
+                )
+    return _POOL
+
+
+def close_pool() -> None:
+    """
+    關閉共享的 Redis 連接池
+
+    在進程退出時由 atexit 調用，釋放所有 socket
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.disconnect()
+            _POOL = None
+
+
+atexit.register(close_pool)
+
+# 原子地寫入對話記錄並刷新 TTL
+# KEYS[1] 為對話 Sorted Set，KEYS[2] 為參考資料 Hash；
+# ARGV[1] 為 TTL，ARGV[2] 為記錄數 n，其後 2n 個為 score/member 成對參數，餘下為 Hash 的 field/value
+# 以 EVALSHA 執行，只需一次往返，且不會出現 ZADD 與 EXPIRE 之間 key 被淘汰的競態
+_APPEND_SCRIPT = """
+local n = tonumber(ARGV[2])
+local added = redis.call('ZADD', KEYS[1], unpack(ARGV, 3, 2 + 2 * n))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+if #ARGV > 2 + 2 * n then
+    redis.call('HSET', KEYS[2], unpack(ARGV, 3 + 2 * n))
+    redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+return added
+"""
+
+
+def _is_wrong_type(error: Exception) -> bool:
+    """
+    判斷是否為 WRONGTYPE 錯誤（key 仍是舊版 List 格式）
+
+    只有這類錯誤應觸發遷移或舊格式讀取；OOM、NOSCRIPT、READONLY 等錯誤照常處理
+
+    Args:
+        error: Redis 返回的錯誤
+
+    Returns:
+        bool: 是否為 WRONGTYPE 錯誤
+    """
+    return isinstance(error, redis.ResponseError) and str(error).startswith("WRONGTYPE")
+
+
+def _refs_key_for(chat_key: str) -> str:
+    """
+    生成參考資料 Hash 的 Redis key
+
+    與對話 key 分開儲存，歷史列表讀取時不必傳輸大型參考資料；
+    結尾的 ":refs" 使其不會被 get_all_users 的 SCAN 模式匹配
+
+    Args:
+        chat_key: 對話記錄的 Redis key
+
+    Returns:
+        str: 參考資料 Hash 的 Redis key
+    """
+    return f"{chat_key}:refs"
+
+
+@functools.lru_cache(maxsize=4096)
+def _chat_key_for(user_id: str) -> str:
+    """
+    生成並快取聊天記錄的 Redis key
+
+    user_id 來自請求參數，因此以有界 LRU 快取避免被任意 ID 撐大記憶體
+
+    Args:
+        user_id: 用戶 ID
+
+    Returns:
+        str: 駐留（interned）後的 Redis key 字符串
+    """
+    return sys.intern(f"chat:user:{user_id}:ai:qa_system")
+
+
+def _format_utc_ns(ts_ns: int) -> str:
+    """
+    將納秒時間戳格式化為 ISO 8601 UTC 字串（例如 2024-01-01T00:00:00.000000Z）
+
+    直接由整數時間戳格式化，避免每次儲存都建立 datetime 物件
+
+    Args:
+        ts_ns: time.time_ns() 取得的納秒時間戳
+
+    Returns:
+        str: ISO 8601 時間字串
+    """
+    seconds, remainder = divmod(ts_ns, 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{remainder // 1000:06d}Z"
+
+
+# ==================== 背景批量寫入 ====================
+# 需以 Config.CHAT_HISTORY_ASYNC_SAVE 顯式啟用：save_conversation 只把記錄放入佇列即返回，
+# 由背景線程批量以 pipeline 寫入 Redis，請求路徑不再等待 Redis 往返；佇列已滿時退回同步寫入。
+# 代價是寫入最終一致：儲存後立即讀取可能還看不到剛儲存的記錄
+_ASYNC_SAVE = Config.CHAT_HISTORY_ASYNC_SAVE
+_BATCH_SIZE = max(1, int(os.getenv("REDIS_BATCH_SIZE", "500")))
+_BATCH_WINDOW_SECONDS = int(os.getenv("REDIS_BATCH_MS", "50")) / 1000
+_WRITE_QUEUE: "queue.Queue[Tuple[str, str, int, Dict[str, str], int]]" = queue.Queue(maxsize=10_000)
+_WRITER_THREAD: Optional[threading.Thread] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def _collect_batch() -> List[Tuple[str, str, int, Dict[str, str], int]]:
+    """
+    從佇列收集一批待寫入記錄
+
+    阻塞等待第一筆，之後在 REDIS_BATCH_MS 時間窗內最多收集 REDIS_BATCH_SIZE 筆
+
+    Returns:
+        List[Tuple]: (chat_key, payload, score, refs, ttl_seconds) 列表
+    """
+    batch = [_WRITE_QUEUE.get()]
+    deadline = time.monotonic() + _BATCH_WINDOW_SECONDS
+    while len(batch) < _BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_WRITE_QUEUE.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _drain(manager: "ChatHistoryManager") -> None:
+    """
+    背景寫入線程主循環
+
+    每批按 chat_key 分組，一個 key 一次腳本調用，整批以單一 pipeline 送出
+
+    Args:
+        manager: 用於執行寫入腳本與舊格式遷移的管理器實例
+    """
+    while True:
+        batch = _collect_batch()
+        try:
+            grouped: Dict[str, Tuple[Dict[str, int], Dict[str, str], int]] = {}
+            for chat_key, payload, score, refs, ttl_seconds in batch:
+                members, all_refs, _ = grouped.get(chat_key, ({}, {}, ttl_seconds))
+                members[payload] = score
+                all_refs.update(refs)
+                grouped[chat_key] = (members, all_refs, ttl_seconds)
+
+            with manager.redis_client.pipeline(transaction=False) as pipe:
+                for chat_key, (members, refs, ttl_seconds) in grouped.items():
+                    manager._append_records(chat_key, members, refs, ttl_seconds, client=pipe)
+                results = pipe.execute(raise_on_error=False)
+
+            for (chat_key, (members, refs, ttl_seconds)), result in zip(grouped.items(), results):
+                if _is_wrong_type(result):
+                    # 舊版 List 格式的 key，同步遷移後重試
+                    manager._write_records(chat_key, members, refs, ttl_seconds)
+                elif isinstance(result, Exception):
+                    logger.error(f"Failed to write conversation batch for {chat_key}: {str(result)}")
+        except Exception as e:
+            logger.error(f"Failed to write conversation batch: {str(e)}")
+        finally:
+            for _ in batch:
+                _WRITE_QUEUE.task_done()
+
+
+def _ensure_writer(manager: "ChatHistoryManager") -> None:
+    """
+    啟動背景寫入線程（懶加載，每個進程只啟動一次）
+
+    Args:
+        manager: 背景線程使用的管理器實例
+    """
+    global _WRITER_THREAD
+    if _WRITER_THREAD is None:
+        with _WRITER_LOCK:
+            if _WRITER_THREAD is None:
+                _WRITER_THREAD = threading.Thread(
+                    target=_drain, args=(manager,), name="chat-history-writer", daemon=True
+                )
+                _WRITER_THREAD.start()
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """
+    等待背景佇列中的對話記錄寫入完成
+
+    Args:
+        timeout: 最長等待時間（秒）
+
+    Returns:
+        bool: 佇列是否已清空
+    """
+    deadline = time.monotonic() + timeout
+    while _WRITE_QUEUE.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            logger.warning(f"Chat history flush timed out with {_WRITE_QUEUE.unfinished_tasks} pending records")
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# ==================== 統計快取 ====================
+# get_conversation_stats 的進程內短 TTL 快取，輪詢類請求以最多數秒的延遲換取更少的 Redis 往返
+_STATS_CACHE_TTL_SECONDS = float(os.getenv("CHAT_STATS_CACHE_TTL", "2"))
+_STATS_CACHE_MAXSIZE = 10_000
+_STATS_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_STATS_CACHE_LOCK = threading.Lock()
+
+
+def _get_cached_stats(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    讀取未過期的統計快取
+
+    Args:
+        user_id: 用戶 ID
+
+    Returns:
+        Optional[Dict]: 統計資訊副本，未命中或已過期時返回 None
+    """
+    with _STATS_CACHE_LOCK:
+        entry = _STATS_CACHE.get(user_id)
+        if entry is None:
+            return None
+        expires_at, stats = entry
+        if expires_at <= time.monotonic():
+            del _STATS_CACHE[user_id]
+            return None
+        return dict(stats)
+
+
+def _set_cached_stats(user_id: str, stats: Dict[str, Any]) -> None:
+    """
+    寫入統計快取，超過容量時淘汰最早寫入的項目
+
+    Args:
+        user_id: 用戶 ID
+        stats: 統計資訊
+    """
+    with _STATS_CACHE_LOCK:
+        _STATS_CACHE.pop(user_id, None)
+        if len(_STATS_CACHE) >= _STATS_CACHE_MAXSIZE:
+            del _STATS_CACHE[next(iter(_STATS_CACHE))]
+        _STATS_CACHE[user_id] = (time.monotonic() + _STATS_CACHE_TTL_SECONDS, dict(stats))
+
+
+def _invalidate_cached_stats(user_id: str) -> None:
+    """
+    移除指定用戶的統計快取
+
+    Args:
+        user_id: 用戶 ID
+    """
+    with _STATS_CACHE_LOCK:
+        _STATS_CACHE.pop(user_id, None)
+
+
+# 進程退出時先寫完佇列，再關閉連接池（atexit 後註冊者先執行）
+atexit.register(flush)
+
+
 class ChatHistoryManager:
     """
     對話歷史管理器
@@ -49,21 +365,10 @@ class ChatHistoryManager:
         """
         初始化對話歷史管理器
         
-        設置 Redis 連接配置並測試連接
+        使用進程級共享的 Redis 連接池並測試連接
         """
-        # 從環境變數獲取 Redis 配置
-        self.redis_host = os.getenv("REDIS_HOST", "127.0.0.1")
-        self.redis_port = int(os.getenv("REDIS_CUSTOM_PORT", 6379))
-        self.redis_password = (os.getenv("REDIS_PASSWORD") or "").strip() or None
-        self.redis_db = 0  # 使用默認數據庫
-        
-        self.redis_client = redis.Redis(
-            host=self.redis_host,
-            port=self.redis_port,
-            password=self.redis_password,
-            db=self.redis_db,
-            decode_responses=True
-        )
+        self.redis_client = redis.Redis(connection_pool=_get_pool())
+        self._append_script = self.redis_client.register_script(_APPEND_SCRIPT)
 
         try:
             self._test_connection()
@@ -96,7 +401,241 @@ class ChatHistoryManager:
         Returns:
             str: Redis key 字符串
         """
-        return f"chat:user:{user_id}:ai:qa_system"
+        return _chat_key_for(user_id)
+
+    def _append_records(self,
+                        chat_key: str,
+                        members: Dict[str, int],
+                        refs: Dict[str, str],
+                        ttl_seconds: int,
+                        client: Optional[redis.client.Pipeline] = None) -> int:
+        """
+        寫入對話記錄到 Sorted Set、參考資料到 Hash，並刷新 TTL（Lua 腳本，原子執行）
+
+        Args:
+            chat_key: Redis key
+            members: 序列化後的對話記錄 -> 毫秒時間戳
+            refs: 記錄 ID -> 序列化後的參考資料
+            ttl_seconds: 過期時間（秒）
+            client: 可選的 pipeline，傳入時只排入命令不立即執行
+
+        Returns:
+            int: 新增的記錄數量（傳入 pipeline 時為 pipeline 本身）
+        """
+        args = [ttl_seconds, len(members)]
+        for payload, score in members.items():
+            args.extend((score, payload))
+        for message_id, refs_payload in refs.items():
+            args.extend((message_id, refs_payload))
+        return self._append_script(
+            keys=[chat_key, _refs_key_for(chat_key)], args=args, client=client
+        )
+
+    def _write_records(self,
+                       chat_key: str,
+                       members: Dict[str, int],
+                       refs: Dict[str, str],
+                       ttl_seconds: int) -> int:
+        """
+        寫入對話記錄，遇到舊版 List 格式的 key 時遷移後重試
+
+        Args:
+            chat_key: Redis key
+            members: 序列化後的對話記錄 -> 毫秒時間戳
+            refs: 記錄 ID -> 序列化後的參考資料
+            ttl_seconds: 過期時間（秒）
+
+        Returns:
+            int: 新增的記錄數量
+        """
+        try:
+            return self._append_records(chat_key, members, refs, ttl_seconds)
+        except redis.ResponseError as e:
+            if not _is_wrong_type(e):
+                raise
+            # 舊版 List 格式的 key，遷移後重試
+            self._migrate_legacy_list(chat_key)
+            return self._append_records(chat_key, members, refs, ttl_seconds)
+
+    @staticmethod
+    def _build_record(user_message: str,
+                      ai_answer: str,
+                      user_id: str,
+                      reference_data: Optional[List[Dict[str, Any]]],
+                      ts_ns: int) -> Tuple[str, int, Dict[str, str]]:
+        """
+        建立一筆序列化的對話記錄
+
+        參考資料非空時與對話記錄分開序列化，以 message_id 關聯，
+        存入獨立的 Hash，讀取歷史時按需取回
+
+        Args:
+            user_message: 用戶問題
+            ai_answer: AI 回答
+            user_id: 用戶 ID
+            reference_data: 參考文章信息列表
+            ts_ns: 記錄時間（納秒時間戳）
+
+        Returns:
+            Tuple[str, int, Dict[str, str]]: (序列化後的記錄, 毫秒時間戳, 記錄 ID -> 序列化後的參考資料)
+        """
+        message_id = uuid.uuid4().hex[:12]
+        conversation = {
+            "message_id": message_id,
+            "user_message": user_message,
+            "ai_answer": ai_answer,
+            "timestamp": _format_utc_ns(ts_ns),
+            "user_id": user_id,
+        }
+        refs = {}
+        if reference_data:
+            refs[message_id] = _dumps(reference_data)
+        else:
+            conversation["reference_data"] = []
+        # 毫秒時間戳作為 Sorted Set score，讀取時無需再解析時間字串
+        return _dumps(conversation), ts_ns // 1_000_000, refs
+
+    def _attach_reference_data(self, chat_key: str, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        為對話記錄補上獨立儲存的參考資料（一次 HMGET）
+
+        舊版記錄的參考資料內嵌在記錄中，不需補取
+
+        Args:
+            chat_key: 對話記錄的 Redis key
+            history: 對話記錄列表
+
+        Returns:
+            List[Dict]: 補上 reference_data 的對話記錄列表
+        """
+        pending = [record for record in history if "reference_data" not in record and "message_id" in record]
+        if not pending:
+            return history
+
+        raw_refs = self.redis_client.hmget(
+            _refs_key_for(chat_key), [record["message_id"] for record in pending]
+        )
+        for record, raw in zip(pending, raw_refs):
+            try:
+                record["reference_data"] = _loads(raw) if raw else []
+            except json.JSONDecodeError:
+                record["reference_data"] = []
+        return history
+
+    @staticmethod
+    def _timestamp_to_score(timestamp: str, fallback: int) -> int:
+        """
+        將 ISO 時間戳轉換為毫秒 score
+
+        Args:
+            timestamp: ISO 格式時間戳（UTC，結尾為 "Z"）
+            fallback: 無法解析時使用的 score
+
+        Returns:
+            int: 毫秒時間戳
+        """
+        try:
+            parsed = datetime.fromisoformat(timestamp.rstrip("Z")).replace(tzinfo=timezone.utc)
+            return int(parsed.timestamp() * 1000)
+        except (AttributeError, TypeError, ValueError):
+            return fallback
+
+    @staticmethod
+    def _decode_records(raw_records: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        解析 JSON 對話記錄，跳過損壞的記錄
+
+        Args:
+            raw_records: 原始 JSON 字符串序列
+
+        Returns:
+            List[Dict]: 對話記錄列表
+        """
+        history = []
+        for record in raw_records:
+            try:
+                history.append(_loads(record))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to decode conversation record: {e}")
+                continue
+        return history
+
+    def _get_legacy_list_history(self, chat_key: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        讀取舊版 List 格式的對話記錄（只讀，不遷移）
+
+        Args:
+            chat_key: Redis key
+            limit: 返回記錄數量限制
+
+        Returns:
+            List[Dict]: 對話記錄列表（最新的在前）
+        """
+        # List 依插入順序追加，最新的記錄在尾端：只取最後 N 筆並反轉，無需排序
+        raw_history = self.redis_client.lrange(chat_key, -limit, -1)
+        return self._decode_records(reversed(raw_history))
+
+    def _migrate_legacy_list(self, chat_key: str) -> None:
+        """
+        將舊版 List 格式的對話記錄遷移為 Sorted Set
+
+        保留原有 TTL，在首次寫入遇到 WRONGTYPE 時懶遷移。以 WATCH 保證讀取、刪除與寫入
+        為一次原子操作：其他寫入者已完成遷移（key 不再是 List）時直接返回，
+        遷移期間 key 被修改時重試，不會覆蓋其他寫入者剛寫入的記錄
+
+        Args:
+            chat_key: Redis key
+        """
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(chat_key)
+                    if pipe.type(chat_key) != "list":
+                        return
+                    raw_history = pipe.lrange(chat_key, 0, -1)
+                    ttl = pipe.ttl(chat_key)
+
+                    pipe.multi()
+                    pipe.delete(chat_key)
+                    members = self._legacy_members(raw_history)
+                    if members:
+                        pipe.zadd(chat_key, members)
+                        if ttl > 0:
+                            pipe.expire(chat_key, ttl)
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue
+
+        logger.info(f"Migrated legacy chat history list to sorted set: {chat_key}")
+
+    @classmethod
+    def _legacy_members(cls, raw_history: List[str]) -> Dict[str, int]:
+        """
+        將舊版 List 記錄轉換為 Sorted Set 成員
+
+        舊版記錄沒有 message_id，內容完全相同的記錄會合併為同一成員；
+        因此為每筆記錄補上 message_id 後重新序列化，保留所有記錄
+
+        Args:
+            raw_history: List 中的原始 JSON 字符串（最舊的在前）
+
+        Returns:
+            Dict[str, int]: 序列化後的記錄 -> 毫秒時間戳
+        """
+        members = {}
+        for index, record in enumerate(raw_history):
+            try:
+                conversation = _loads(record)
+            except json.JSONDecodeError:
+                conversation = None
+            if not isinstance(conversation, dict):
+                # 無法解析的記錄原樣保留，讀取時會被跳過
+                members[record] = index
+                continue
+            conversation.setdefault("message_id", uuid.uuid4().hex[:12])
+            members[_dumps(conversation)] = cls._timestamp_to_score(conversation.get("timestamp"), index)
+        return members
 
     def save_conversation(self, 
                          user_message: str, 
@@ -115,29 +654,31 @@ class ChatHistoryManager:
             ttl_seconds: 過期時間（秒），預設 1 小時
             
         Returns:
-            bool: 是否成功儲存
+            bool: 是否成功儲存（啟用 CHAT_HISTORY_ASYNC_SAVE 時表示已排入寫入佇列）
         """
         try:
             if self.redis_client is None:
                 return False
 
             chat_key = self._get_chat_key(user_id)
-            timestamp = datetime.utcnow().isoformat() + "Z"
+            payload, score, refs = self._build_record(
+                user_message, ai_answer, user_id, reference_data, time.time_ns()
+            )
             
-            # 創建對話記錄
-            conversation = {
-                "user_message": user_message,
-                "ai_answer": ai_answer,
-                "timestamp": timestamp,
-                "user_id": user_id,
-                "reference_data": reference_data or []  # 添加參考文章信息
-            }
-            
-            # 推入 Redis List
-            self.redis_client.rpush(chat_key, json.dumps(conversation, ensure_ascii=False))
+            if _ASYNC_SAVE:
+                # 交給背景線程批量寫入，不阻塞請求路徑
+                _ensure_writer(self)
+                try:
+                    _WRITE_QUEUE.put_nowait((chat_key, payload, score, refs, ttl_seconds))
+                    _invalidate_cached_stats(user_id)
+                    logger.info(f"Queued conversation for user {user_id}")
+                    return True
+                except queue.Full:
+                    logger.warning("Chat history write queue is full; saving synchronously")
             
-            # 設置 TTL（過期時間）
-            self.redis_client.expire(chat_key, ttl_seconds)
+            # 寫入 Redis Sorted Set 並設置 TTL（過期時間），以 Lua 腳本合併為一次往返
+            self._write_records(chat_key, {payload: score}, refs, ttl_seconds)
+            _invalidate_cached_stats(user_id)
             
             logger.info(f"Saved conversation for user {user_id}")
             return True
@@ -146,15 +687,68 @@ class ChatHistoryManager:
             logger.error(f"Failed to save conversation: {str(e)}")
             return False
 
+    def save_conversations(self,
+                           items: List[Dict[str, Any]],
+                           user_id: str = "default",
+                           ttl_seconds: int = 3600) -> int:
+        """
+        批量儲存對話記錄
+
+        每批最多 REDIS_BATCH_SIZE 筆，以一次腳本調用寫入，
+        適用於重放會話或批量匯入
+
+        Args:
+            items: 對話記錄列表，每筆包含 user_message、ai_answer，可選 reference_data
+            user_id: 用戶 ID（預設為 "default"）
+            ttl_seconds: 過期時間（秒），預設 1 小時
+
+        Returns:
+            int: 成功儲存的記錄數量
+        """
+        try:
+            if self.redis_client is None or not items:
+                return 0
+
+            chat_key = self._get_chat_key(user_id)
+            ts_ns = time.time_ns()
+
+            saved = 0
+            for start in range(0, len(items), _BATCH_SIZE):
+                members = {}
+                refs = {}
+                for offset, item in enumerate(items[start:start + _BATCH_SIZE], start=start):
+                    # 每筆遞增 1 毫秒，保留輸入順序
+                    payload, score, item_refs = self._build_record(
+                        item.get("user_message", ""),
+                        item.get("ai_answer", ""),
+                        user_id,
+                        item.get("reference_data"),
+                        ts_ns + offset * 1_000_000
+                    )
+                    members[payload] = score
+                    refs.update(item_refs)
+                saved += self._write_records(chat_key, members, refs, ttl_seconds)
+            _invalidate_cached_stats(user_id)
+
+            logger.info(f"Saved {saved} conversations for user {user_id}")
+            return saved
+
+        except Exception as e:
+            logger.error(f"Failed to save conversations: {str(e)}")
+            return 0
+
     def get_conversation_history(self, 
                                 user_id: str = "default", 
-                                limit: int = 50) -> List[Dict[str, Any]]:
+                                limit: int = 50,
+                                include_references: bool = True) -> List[Dict[str, Any]]:
         """
         獲取對話歷史記錄
         
         Args:
             user_id: 用戶 ID
             limit: 返回記錄數量限制
+            include_references: 是否補上參考資料；False 時只返回精簡記錄，
+                需要時再以 get_reference_data 按 message_id 取回
             
         Returns:
             List[Dict]: 對話記錄列表
@@ -165,28 +759,45 @@ class ChatHistoryManager:
 
             chat_key = self._get_chat_key(user_id)
             
-            # 獲取所有記錄（從最早到最新）
-            raw_history = self.redis_client.lrange(chat_key, 0, limit - 1)
-            
-            # 解析 JSON 並按時間排序
-            history = []
-            for record in raw_history:
-                try:
-                    conversation = json.loads(record)
-                    history.append(conversation)
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to decode conversation record: {e}")
-                    continue
-            
-            # 按時間戳排序（最新的在前）
-            history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+            # 由 Redis 依時間戳排序，直接取得最新的 N 筆
+            try:
+                raw_history = self.redis_client.zrevrange(chat_key, 0, limit - 1)
+            except redis.ResponseError as e:
+                if not _is_wrong_type(e):
+                    raise
+                return self._get_legacy_list_history(chat_key, limit)
             
+            history = self._decode_records(raw_history)
+            if include_references:
+                history = self._attach_reference_data(chat_key, history)
             return history
             
         except Exception as e:
             logger.error(f"Failed to get conversation history: {str(e)}")
             return []
 
+    def get_reference_data(self, user_id: str, message_id: str) -> List[Dict[str, Any]]:
+        """
+        按記錄 ID 獲取單筆對話的參考資料
+
+        Args:
+            user_id: 用戶 ID
+            message_id: 對話記錄的 message_id
+
+        Returns:
+            List[Dict]: 參考文章信息列表，不存在時返回空列表
+        """
+        try:
+            if self.redis_client is None:
+                return []
+
+            raw = self.redis_client.hget(_refs_key_for(self._get_chat_key(user_id)), message_id)
+            return _loads(raw) if raw else []
+
+        except Exception as e:
+            logger.error(f"Failed to get reference data: {str(e)}")
+            return []
+
     def get_conversation_stats(self, user_id: str = "default") -> Dict[str, Any]:
         """
         獲取對話統計資訊
@@ -207,20 +818,31 @@ class ChatHistoryManager:
                     "error": "Redis unavailable"
                 }
 
+            cached = _get_cached_stats(user_id)
+            if cached is not None:
+                return cached
+
             chat_key = self._get_chat_key(user_id)
             
-            # 獲取列表長度
-            total_messages = self.redis_client.llen(chat_key)
-            
-            # 獲取 TTL
-            ttl = self.redis_client.ttl(chat_key)
+            # 以 pipeline 一次獲取記錄數量與 TTL
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.zcard(chat_key)
+                pipe.ttl(chat_key)
+                total_messages, ttl = pipe.execute(raise_on_error=False)
+            if _is_wrong_type(total_messages):
+                # 舊版 List 格式的 key
+                total_messages = self.redis_client.llen(chat_key)
+            elif isinstance(total_messages, Exception):
+                raise total_messages
             
-            return {
+            stats = {
                 "user_id": user_id,
                 "total_conversations": total_messages,
                 "ttl_seconds": ttl if ttl > 0 else None,
                 "chat_key": chat_key
             }
+            _set_cached_stats(user_id, stats)
+            return stats
             
         except Exception as e:
             logger.error(f"Failed to get conversation stats: {str(e)}")
@@ -247,7 +869,10 @@ class ChatHistoryManager:
                 return False
 
             chat_key = self._get_chat_key(user_id)
-            self.redis_client.delete(chat_key)
+            # 先寫完佇列中的記錄，避免清除後被背景線程寫回
+            flush()
+            self.redis_client.delete(chat_key, _refs_key_for(chat_key))
+            _invalidate_cached_stats(user_id)
             logger.info(f"Cleared conversation history for user {user_id}")
             return True
             
@@ -255,6 +880,56 @@ class ChatHistoryManager:
             logger.error(f"Failed to clear conversation history: {str(e)}")
             return False
 
+    def pop_conversation_history(self, user_id: str = "default") -> List[Dict[str, Any]]:
+        """
+        讀取並清除對話歷史記錄（原子操作）
+
+        以 MULTI/EXEC 在一次往返內讀取全部記錄並刪除 key，
+        適用於「匯出後清除」，避免讀取與刪除之間的競態
+
+        Args:
+            user_id: 用戶 ID
+
+        Returns:
+            List[Dict]: 被清除的對話記錄列表（最新的在前）
+        """
+        try:
+            if self.redis_client is None:
+                return []
+
+            chat_key = self._get_chat_key(user_id)
+            # 先寫完佇列中的記錄，使其一併被讀出並清除，而不是在清除後被寫回
+            flush()
+            # 同一 key 只會是 Sorted Set 或舊版 List 其一，另一個命令返回 WRONGTYPE 錯誤
+            refs_key = _refs_key_for(chat_key)
+            with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.zrevrange(chat_key, 0, -1)
+                pipe.lrange(chat_key, 0, -1)
+                pipe.hgetall(refs_key)
+                pipe.delete(chat_key, refs_key)
+                sorted_records, list_records, raw_refs, _ = pipe.execute(raise_on_error=False)
+            _invalidate_cached_stats(user_id)
+
+            if not isinstance(sorted_records, redis.ResponseError):
+                raw_history = sorted_records
+            elif not isinstance(list_records, redis.ResponseError):
+                raw_history = reversed(list_records)
+            else:
+                raise sorted_records
+
+            history = self._decode_records(raw_history)
+            for record in history:
+                if "reference_data" not in record:
+                    raw = raw_refs.get(record.get("message_id")) if isinstance(raw_refs, dict) else None
+                    record["reference_data"] = _loads(raw) if raw else []
+
+            logger.info(f"Popped conversation history for user {user_id}")
+            return history
+
+        except Exception as e:
+            logger.error(f"Failed to pop conversation history: {str(e)}")
+            return []
+
     def get_all_users(self) -> List[str]:
         """
         獲取所有有對話記錄的用戶 ID
@@ -267,18 +942,25 @@ class ChatHistoryManager:
             if self.redis_client is None:
                 return []
 
+            # 使用 SCAN 分批遍歷，避免 KEYS 阻塞 Redis；
+            # 以原始 bytes 返回 key，只解碼用戶 ID 片段
             pattern = "chat:user:*:ai:qa_system"
-            keys = self.redis_client.keys(pattern)
-            
-            # 提取用戶 ID
-            user_ids = []
-            for key in keys:
-                # 從 "chat:user:123:ai:qa_system" 提取 "123"
-                parts = key.split(":")
-                if len(parts) >= 3:
-                    user_ids.append(parts[2])
-            
-            return list(set(user_ids))  # 去重
+            user_ids = set()  # 去重
+            cursor = 0
+            while True:
+                cursor, keys = self.redis_client.execute_command(
+                    "SCAN", cursor, "MATCH", pattern, "COUNT", 1000, NEVER_DECODE=True
+                )
+                # 從 b"chat:user:123:ai:qa_system" 提取 "123"
+                user_ids.update(
+                    parts[2].decode("utf-8")
+                    for parts in (key.split(b":", 3) for key in keys)
+                    if len(parts) >= 3
+                )
+                if cursor == 0:
+                    break
+
+            return list(user_ids)
             
         except Exception as e:
             logger.error(f"Failed to get all users: {str(e)}")
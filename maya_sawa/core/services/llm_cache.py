@@ -0,0 +1,252 @@
+"""
+Markdown Q&A System - LLM 回應語義快取
+
+這個模組為重複或近似重複的 LLM 請求提供快取，負責：
+1. 以內容雜湊精確比對完全相同的請求（進程內或 Redis 共享）
+2. 以向量嵌入的餘弦相似度比對先前的請求
+3. 依命名空間（例如分析類型 + 語言）隔離不同提示模板的結果
+4. LRU + TTL 淘汰，限制內存佔用
+
+向量以 array('d') 保存並預先正規化，比對時只需計算內積；
+條目數量有上限，線性掃描的成本遠低於一次 LLM 調用
+
+作者: Maya Sawa Team
+版本: 0.1.0
+"""
+
+# 標準庫導入
+import hashlib
+import itertools
+import logging
+import math
+import operator
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+
+# ==================== 日誌配置 ====================
+logger = logging.getLogger(__name__)
+
+
+def exact_key(*parts: str) -> str:
+    """
+    由多個字串組成精確快取鍵
+
+    Args:
+        *parts (str): 例如 (analysis_type, language, content)
+
+    Returns:
+        str: 128 位元 BLAKE2b 十六進位摘要
+    """
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExactLLMCache:
+    """
+    LLM 回應的精確快取（進程內 LRU + TTL）
+
+    命中時不需要計算向量嵌入，也不調用 LLM
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 3600):
+        """
+        初始化精確快取
+
+        Args:
+            maxsize (int): 最大條目數
+            ttl_seconds (float): 條目存活時間（秒）
+        """
+        self.maxsize = max(1, maxsize)
+        self.ttl_seconds = ttl_seconds
+        # 快取鍵 -> (回應, 過期時間)，按最近使用排序
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """取得未過期的快取回應；未命中時返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, answer: str) -> None:
+        """寫入快取條目，超過上限時淘汰最久未使用的條目"""
+        with self._lock:
+            self._entries[key] = (answer, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空所有快取條目"""
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisExactLLMCache:
+    """
+    以 Redis 為後端的精確快取，多個 worker 共享結果
+
+    Redis 不可用時視為未命中，不影響調用方
+    """
+
+    def __init__(self, prefix: str = "llm_cache:", ttl_seconds: float = 3600):
+        """
+        初始化 Redis 精確快取
+
+        Args:
+            prefix (str): Redis 鍵前綴
+            ttl_seconds (float): 條目存活時間（秒）
+        """
+        self.prefix = prefix
+        self.ttl_seconds = max(1, int(ttl_seconds))
+
+    @staticmethod
+    def _client():
+        # 延遲導入，僅在啟用 Redis 後端時才初始化連接池
+        from ..database.connection_pool import get_pool_manager
+        return get_pool_manager().get_redis_connection()
+
+    def get(self, key: str) -> Optional[str]:
+        """取得快取回應；未命中或 Redis 錯誤時返回 None"""
+        try:
+            value = self._client().get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Redis 快取讀取失敗: %s", e)
+            return None
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, answer: str) -> None:
+        """寫入快取回應並設定過期時間；Redis 錯誤時僅記錄"""
+        try:
+            self._client().set(self.prefix + key, answer, ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning("Redis 快取寫入失敗: %s", e)
+
+    def clear(self) -> None:
+        """刪除此前綴下的所有快取鍵"""
+        try:
+            client = self._client()
+            for key in client.scan_iter(match=self.prefix + "*", count=500):
+                client.delete(key)
+        except Exception as e:
+            logger.warning("Redis 快取清除失敗: %s", e)
+
+
+class SemanticLLMCache:
+    """
+    LLM 回應的語義快取
+
+    以請求內容的向量嵌入為鍵：新請求與已快取請求的餘弦相似度
+    達到閾值時直接返回快取的回應，不再調用 LLM
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 86400):
+        """
+        初始化語義快取
+
+        Args:
+            maxsize (int): 所有命名空間合計的最大條目數
+            ttl_seconds (float): 條目存活時間（秒）
+        """
+        self.maxsize = max(1, maxsize)
+        self.ttl_seconds = ttl_seconds
+        # 條目 ID -> (命名空間, 正規化向量, 回應, 過期時間)，按最近使用排序
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def namespace(*parts: str) -> str:
+        """
+        由多個字串組成命名空間鍵
+
+        Args:
+            *parts (str): 例如 (analysis_type, language)
+
+        Returns:
+            str: SHA-256 十六進位摘要
+        """
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[array]:
+        """將向量正規化為單位長度；零向量返回 None"""
+        norm = math.hypot(*embedding)
+        if not norm:
+            return None
+        return array("d", (x / norm for x in embedding))
+
+    def lookup(self, namespace: str, embedding: Sequence[float], threshold: float) -> Optional[Any]:
+        """
+        查找相似度達到閾值的快取回應
+
+        Args:
+            namespace (str): 命名空間鍵
+            embedding (Sequence[float]): 請求內容的向量嵌入
+            threshold (float): 最低餘弦相似度（0.0-1.0）
+
+        Returns:
+            Optional[Any]: 最相似條目的回應；未命中時返回 None
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry[3] <= now]
+            for key in expired:
+                del self._entries[key]
+            candidates = [
+                (key, entry[1]) for key, entry in self._entries.items() if entry[0] == namespace
+            ]
+
+        # 內積計算在鎖外進行，不阻塞其他線程的讀寫
+        best_key, best_score = None, threshold
+        for key, vector in candidates:
+            score = sum(map(operator.mul, query, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(best_key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(best_key)
+        logger.debug("語義快取命中: similarity=%.4f", best_score)
+        return entry[2]
+
+    def put(self, namespace: str, embedding: Sequence[float], answer: Any) -> None:
+        """
+        寫入快取條目，超過上限時淘汰最久未使用的條目
+
+        Args:
+            namespace (str): 命名空間鍵
+            embedding (Sequence[float]): 請求內容的向量嵌入
+            answer (Any): 要快取的回應
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[next(self._ids)] = (namespace, vector, answer, expires_at)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空所有快取條目"""
+        with self._lock:
+            self._entries.clear()
@@ -186,7 +186,7 @@ class ArticleDatabase:
     
     def _initialize_engine(self):
         """Initialize the database engine"""
-        db_url = Config.get_paprika_db_url()
+        db_url = Config.PAPRIKA_DB_URL
         if not db_url:
             logger.warning("Article database URL not configured")
             return
@@ -275,7 +275,7 @@ class ConversationDatabase:
     
     def _initialize_engine(self):
         """Initialize the database engine"""
-        db_url = Config.get_maya_v2_db_url()
+        db_url = Config.MAYA_V2_DB_URL
         if not db_url:
             logger.warning("Conversation database URL not configured")
             return
@@ -60,7 +60,7 @@ class GitCommitDatabase:
             self._initialize_engine()
 
     def _initialize_engine(self) -> None:
-        db_url = Config.get_paprika_db_url()
+        db_url = Config.PAPRIKA_DB_URL
         if not db_url:
             logger.warning("Git commit database URL not configured")
             return
@@ -49,7 +49,6 @@ import json
 try:
     from langchain.schema import Document
     import psycopg2
-    from psycopg2.extras import execute_values
 except ImportError as e:
     raise ImportError(f"Required packages not installed. Please install dependencies with: poetry install") from e
 from ..core.config.config import Config
@@ -59,6 +58,9 @@ from ..services.embedding_service import get_embedding_service
 # ==================== 日誌配置 ====================
 logger = logging.getLogger(__name__)
 
+# 批量 upsert 每條 INSERT 語句包含的行數（execute_values 預設為 100）
+UPSERT_PAGE_SIZE = 512
+
 
 class QAVectorDatabase:
     """
@@ -130,12 +132,8 @@ class QAVectorDatabase:
         確保應用程式啟動時能正常連接到數據庫
         """
         try:
-            conn = self.pool_manager.get_postgres_connection()
-            if conn:
+            with self.pool_manager.postgres():
                 logger.info("Successfully connected to PostgreSQL database")
-                self.pool_manager.return_postgres_connection(conn)
-            else:
-                raise Exception("Failed to get connection from pool")
         except Exception as e:
             logger.error(f"Failed to connect to database: {str(e)}")
             raise
@@ -174,60 +172,35 @@ class QAVectorDatabase:
         Args:
             articles_data (List[Dict[str, Any]]): 文章數據列表，包含預計算的 embedding
         """
-        conn = self.pool_manager.get_postgres_connection()
-        if not conn:
-            raise Exception("Failed to get connection from pool")
+        # 準備批量插入數據（在借用連接之前完成）
+        data = []
+        for article in articles_data:
+            try:
+                # 解析預計算的 embedding 並轉換為 PostgreSQL vector 格式
+                embedding_list = self._parse_embedding(article["embedding"])
+                embedding_str = '[' + ','.join(map(str, embedding_list)) + ']'
+                
+                # 轉換日期格式（處理 ISO 格式的日期字符串）
+                file_date = datetime.fromisoformat(article["file_date"].replace('Z', '+00:00'))
+                
+                # 準備插入數據
+                data.append((
+                    article["file_path"],
+                    article["content"],
+                    file_date,
+                    embedding_str
+                ))
+            except Exception as e:
+                logger.error(f"Failed to process article {article.get('id', 'unknown')}: {str(e)}")
+                continue
         
-        try:
-            cur = conn.cursor()
-            
-            # 準備批量插入數據
-            data = []
-            for article in articles_data:
-                try:
-                    # 解析預計算的 embedding 並轉換為 PostgreSQL vector 格式
-                    embedding_list = self._parse_embedding(article["embedding"])
-                    embedding_str = '[' + ','.join(map(str, embedding_list)) + ']'
-                    
-                    # 轉換日期格式（處理 ISO 格式的日期字符串）
-                    file_date = datetime.fromisoformat(article["file_date"].replace('Z', '+00:00'))
-                    
-                    # 準備插入數據
-                    data.append((
-                        article["file_path"],
-                        article["content"],
-                        file_date,
-                        embedding_str
-                    ))
-                except Exception as e:
-                    logger.error(f"Failed to process article {article.get('id', 'unknown')}: {str(e)}")
-                    continue
-            
-            if not data:
-                logger.warning("No valid articles to insert")
-                return
-            
-            # 執行批量 upsert (插入或更新)
-            execute_values(
-                cur,
-                """
-                INSERT INTO articles (file_path, content, file_date, embedding)
-                VALUES %s
-                ON CONFLICT (file_path) 
-                DO UPDATE SET 
-                    content = EXCLUDED.content,
-                    file_date = EXCLUDED.file_date,
-                    embedding = EXCLUDED.embedding::vector,
-                    updated_at = CURRENT_TIMESTAMP
-                """,
-                data,
-                template="(%s, %s, %s, %s::vector)"
-            )
-            
-            conn.commit()
-            logger.info(f"Successfully processed {len(data)} articles")
-        finally:
-            self.pool_manager.return_postgres_connection(conn)
+        if not data:
+            logger.warning("No valid articles to insert")
+            return
+        
+        # 執行批量 upsert (插入或更新)
+        self._upsert_articles(data)
+        logger.info(f"Successfully processed {len(data)} articles")
 
     def add_documents(self, documents: List[Document]) -> None:
         """
@@ -239,48 +212,46 @@ class QAVectorDatabase:
         Args:
             documents (List[Document]): LangChain Document 對象列表
         """
-        conn = self.pool_manager.get_postgres_connection()
-        if not conn:
-            raise Exception("Failed to get connection from pool")
+        # 批量生成嵌入向量（使用服務層），等待 API 期間不佔用數據庫連接
+        texts = [doc.page_content for doc in documents]
+        embeddings = self.embedding_service.embed_documents(texts)
         
-        try:
-            cur = conn.cursor()
-            
-            # 批量生成嵌入向量（使用服務層）
-            texts = [doc.page_content for doc in documents]
-            embeddings = self.embedding_service.embed_documents(texts)
-            
-            # 準備批量插入數據
-            data = [
-                (
-                    doc.metadata.get("source", "unknown"),
-                    doc.page_content,
-                    datetime.now(),
-                    '[' + ','.join(map(str, embedding)) + ']'
-                )
-                for doc, embedding in zip(documents, embeddings)
-            ]
-            
-            # 執行批量 upsert (插入或更新)
-            execute_values(
-                cur,
-                """
-                INSERT INTO articles (file_path, content, file_date, embedding)
-                VALUES %s
-                ON CONFLICT (file_path) 
-                DO UPDATE SET 
-                    content = EXCLUDED.content,
-                    file_date = EXCLUDED.file_date,
-                    embedding = EXCLUDED.embedding::vector,
-                    updated_at = CURRENT_TIMESTAMP
-                """,
-                data,
-                template="(%s, %s, %s, %s::vector)"
+        # 準備批量插入數據
+        data = [
+            (
+                doc.metadata.get("source", "unknown"),
+                doc.page_content,
+                datetime.now(),
+                '[' + ','.join(map(str, embedding)) + ']'
             )
-            
-            conn.commit()
-        finally:
-            self.pool_manager.return_postgres_connection(conn)
+            for doc, embedding in zip(documents, embeddings)
+        ]
+        
+        # 執行批量 upsert (插入或更新)
+        self._upsert_articles(data)
+
+    def _upsert_articles(self, data: List[tuple]) -> None:
+        """
+        批量 upsert 文章（以 file_path 為鍵）
+        
+        Args:
+            data (List[tuple]): (file_path, content, file_date, embedding_str) 列表
+        """
+        self.pool_manager.bulk_insert(
+            "articles",
+            ("file_path", "content", "file_date", "embedding"),
+            data,
+            template="(%s, %s, %s, %s::vector)",
+            on_conflict="""
+            ON CONFLICT (file_path) 
+            DO UPDATE SET 
+                content = EXCLUDED.content,
+                file_date = EXCLUDED.file_date,
+                embedding = EXCLUDED.embedding::vector,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            page_size=UPSERT_PAGE_SIZE
+        )
 
     def similarity_search(self, query: str, k: int = None, threshold: float = None) -> List[Document]:
         """
@@ -327,55 +298,115 @@ class QAVectorDatabase:
 
         # 使用嵌入服務生成查詢的向量（服務層）
         query_embedding = self.embedding_service.embed_query(query)
+        return self.similarity_search_by_vector(query_embedding, k=k, threshold=threshold)
+
+    def similarity_search_by_vector(self, query_embedding: List[float], k: int = None, threshold: float = None) -> List[Document]:
+        """
+        以已計算的查詢向量進行相似度搜索
+
+        同一個問題需要以不同條件重試時（例如放寬閾值的 fallback），
+        可重用同一個向量，省去再次呼叫嵌入 API。
+
+        Args:
+            query_embedding (List[float]): 查詢向量
+            k (int): 返回的最大結果數
+            threshold (float): 相似度閾值
+
+        Returns:
+            List[Document]: 相關文檔列表，按相似度降序排列
+        """
+        if k is None:
+            k = Config.ARTICLE_MATCH_COUNT
+        if threshold is None:
+            threshold = Config.SIMILARITY_THRESHOLD
+
+        with self.pool_manager.postgres() as conn:
+            return self._search_by_embedding(conn.cursor(), query_embedding, k, threshold)
+
+    def similarity_search_many(self, queries: List[str], k: int = None, threshold: float = None) -> List[List[Document]]:
+        """
+        批量向量相似度搜索
+
+        所有查詢的向量在一次嵌入 API 呼叫中生成，搜索共用同一個數據庫連接，
+        N 個查詢只需 1 次嵌入往返和 1 次連接借用。
+
+        Args:
+            queries (List[str]): 查詢文本列表
+            k (int): 每個查詢返回的最大結果數
+            threshold (float): 相似度閾值
+
+        Returns:
+            List[List[Document]]: 與 queries 順序對應的文檔列表
+        """
+        if not queries:
+            return []
+        if k is None:
+            k = Config.ARTICLE_MATCH_COUNT
+        if threshold is None:
+            threshold = Config.SIMILARITY_THRESHOLD
+
+        query_embeddings = self.embedding_service.embed_documents(queries)
+
+        with self.pool_manager.postgres() as conn:
+            cur = conn.cursor()
+            return [
+                self._search_by_embedding(cur, query_embedding, k, threshold)
+                for query_embedding in query_embeddings
+            ]
+
+    @staticmethod
+    def _search_by_embedding(cur, query_embedding: List[float], k: int, threshold: float) -> List[Document]:
+        """
+        以查詢向量執行 pgvector 搜索並封裝為 Document
+
+        Args:
+            cur: 數據庫游標
+            query_embedding (List[float]): 查詢向量
+            k (int): 返回的最大結果數
+            threshold (float): 相似度閾值
+
+        Returns:
+            List[Document]: 相關文檔列表
+        """
+        # 將 Python 列表轉換為 PostgreSQL vector 格式
+        embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
         
-        conn = self.pool_manager.get_postgres_connection()
-        if not conn:
-            raise Exception("Failed to get connection from pool")
+        # 執行相似度搜索查詢
+        # 使用 pgvector 的 <=> 運算符計算餘弦距離
+        cur.execute(
+            """
+            SELECT 
+                id,
+                file_path,
+                content,
+                file_date,
+                1 - (embedding <=> %s::vector) as similarity
+            FROM articles
+            WHERE 1 - (embedding <=> %s::vector) > %s
+            ORDER BY embedding <=> %s::vector
+            LIMIT %s
+            """,
+            (embedding_str, embedding_str, threshold, embedding_str, k)
+        )
         
-        try:
-            cur = conn.cursor()
-            
-            # 將 Python 列表轉換為 PostgreSQL vector 格式
-            embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-            
-            # 執行相似度搜索查詢
-            # 使用 pgvector 的 <=> 運算符計算餘弦距離
-            cur.execute(
-                """
-                SELECT 
-                    id,
-                    file_path,
-                    content,
-                    file_date,
-                    1 - (embedding <=> %s::vector) as similarity
-                FROM articles
-                WHERE 1 - (embedding <=> %s::vector) > %s
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s
-                """,
-                (embedding_str, embedding_str, threshold, embedding_str, k)
+        results = cur.fetchall()
+        
+        # 轉換為 LangChain Document 對象
+        documents = []
+        for result in results:
+            doc = Document(
+                page_content=result[2],  # content
+                metadata={
+                    "id": result[0],
+                    "file_path": result[1],
+                    "file_date": result[3].isoformat() if result[3] else "",
+                    "similarity": result[4],
+                    "source": result[1]  # 使用 file_path 作為 source
+                }
             )
-            
-            results = cur.fetchall()
-            
-            # 轉換為 LangChain Document 對象
-            documents = []
-            for result in results:
-                doc = Document(
-                    page_content=result[2],  # content
-                    metadata={
-                        "id": result[0],
-                        "file_path": result[1],
-                        "file_date": result[3].isoformat() if result[3] else "",
-                        "similarity": result[4],
-                        "source": result[1]  # 使用 file_path 作為 source
-                    }
-                )
-                documents.append(doc)
-            
-            return documents
-        finally:
-            self.pool_manager.return_postgres_connection(conn)
+            documents.append(doc)
+        
+        return documents
 
     def get_article_stats(self) -> Dict[str, Any]:
         """
@@ -389,11 +420,7 @@ class QAVectorDatabase:
         Returns:
             Dict[str, Any]: 包含統計信息的字典
         """
-        conn = self.pool_manager.get_postgres_connection()
-        if not conn:
-            raise Exception("Failed to get connection from pool")
-        
-        try:
+        with self.pool_manager.postgres() as conn:
             cur = conn.cursor()
             
             # 獲取基本統計信息
@@ -415,8 +442,6 @@ class QAVectorDatabase:
                 "earliest_date": stats[2].isoformat() if stats[2] else None,
                 "latest_date": stats[3].isoformat() if stats[3] else None
             }
-        finally:
-            self.pool_manager.return_postgres_connection(conn)
 
     def clear(self) -> None:
         """
@@ -429,18 +454,12 @@ class QAVectorDatabase:
         
         注意：此操作不可逆，請謹慎使用
         """
-        conn = self.pool_manager.get_postgres_connection()
-        if not conn:
-            raise Exception("Failed to get connection from pool")
-        
-        try:
+        with self.pool_manager.postgres() as conn:
             cur = conn.cursor()
             # 使用 TRUNCATE 快速清空表
             cur.execute("TRUNCATE TABLE articles") 
             conn.commit()
             logger.info("All articles have been cleared from the database")
-        finally:
-            self.pool_manager.return_postgres_connection(conn)
 
 
 # 向後兼容的別名
@@ -59,8 +59,9 @@ from .services.shioaji_market import shioaji_market_service
 from .services.ibkr_market import ibkr_market_service
 from .services.metrics_consumer import MetricsConsumer
 from .core.services.scheduler import ArticleSyncScheduler
+from .core.services import chat_history
 from .people import sync_data
-from .core.config import Config
+from .core.config import Config, config_manager
 from .core.errors.errors import register_exception_handlers
 from .core.security import SecurityMiddleware
 
@@ -192,6 +193,10 @@ async def startup_event():
         sync_config = Config.get_sync_config_summary()
         logger.info(f"同步配置: {sync_config}")
         
+        # 預先載入 JSON 配置（如果啟用），否則維持首次存取時載入
+        if Config.EAGER_CONFIG:
+            await asyncio.to_thread(config_manager.warm)
+        
         # 啟動 Voyeur Metrics Consumer (如果配置允許)
         try:
             metrics_consumer.start()
@@ -260,7 +265,7 @@ async def shutdown_event():
     這個函數在 FastAPI 應用程式關閉時自動執行，負責：
     1. 停止定期同步任務
     2. 停止 Metrics Consumer
-    3. 清理資源
+    3. 清理資源（含寫完對話記錄佇列）
     4. 記錄關閉日誌
     """
     try:
@@ -276,6 +281,9 @@ async def shutdown_event():
         await shioaji_market_service.close()
         await ibkr_market_service.close()
 
+        # 寫完背景佇列中尚未送出的對話記錄
+        await asyncio.to_thread(chat_history.flush)
+
         logger.info("應用程式關閉，排程任務與服務已停止")
     except Exception as e:
         # 記錄關閉錯誤
@@ -9,15 +9,114 @@ Markdown Q&A System - 人名偵測模組
 
 # 標準庫導入
 import logging
-from typing import List, Optional
+from typing import FrozenSet, List, Optional, Tuple
 import re
 
+try:
+    # Aho-Corasick 自動機（C 實作）一次線性掃描即可比對所有關鍵詞；未安裝時退回正則交替式
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # 本地導入
 from maya_sawa.core.config.config_manager import config_manager
 
 # ==================== 日誌配置 ====================
 logger = logging.getLogger(__name__)
 
+# ==================== 關鍵詞比對 ====================
+# 永遠不匹配的模式（關鍵詞列表為空時使用，避免空的交替式匹配任何字串）
+_NEVER_MATCH = re.compile(r"(?!)")
+
+# 人名前後需去除的空白與引號（單次 strip 完成）
+_QUOTE_WS = " \t\r\n\"'"
+
+# 大寫開頭的拉丁字詞（英文人名候選）
+_CAP_TOKEN_RE = re.compile(r"[A-Z][a-zA-Z]+")
+
+# 「誰是 X」/「X 是誰」/「who is X」句型，即使 X 不在名單中也需要交給 AI 與補抓邏輯
+_WHO_IS_RE = re.compile(r"誰是|谁是|是誰|是谁|who is", re.IGNORECASE)
+
+# 中日韓文字：這類名稱沒有大小寫或空格邊界，無法廉價判斷是否含人名
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+# 身份代詞（問題中出現時，AI 抽到主角名稱也視為有效）
+_IDENTITY_PRONOUN_RE = re.compile("|".join(map(re.escape, ["你是", "你叫", "我是誰", "我叫什麼"])))
+
+
+# 判斷整句是否恰為身份詢問句型前，需去除的空白與標點
+_IDENTITY_PUNCT = " \t\r\n?？。.!！"
+
+
+def _compile_identity_questions(self_name: str) -> Tuple[FrozenSet[str], "re.Pattern"]:
+    """
+    編譯身份詢問句型（含主角名稱）
+    
+    Returns:
+        tuple: (整句完全相符用的小寫句型集合, 子字串比對用的不分大小寫正則)
+    """
+    identity_questions = [
+        "你是誰", "你叫什麼",
+        f"誰是{self_name}", f"who is {self_name}",
+        "誰是ai", "ai是誰", "who is ai",
+    ]
+    return (
+        frozenset(question.lower() for question in identity_questions),
+        re.compile("|".join(map(re.escape, identity_questions)), re.IGNORECASE),
+    )
+
+# (關鍵詞配置, (個人資料, 詳細資料, 身份詢問) 預編譯比對器)；
+# 以配置對象的身份判斷是否失效，reload_configs 後會自動重建
+_keyword_patterns = None
+
+
+class _KeywordAutomaton:
+    """以 Aho-Corasick 自動機比對關鍵詞，介面與 re.Pattern.search 相同（未命中返回 None）"""
+
+    __slots__ = ("_automaton",)
+
+    def __init__(self, keywords: List[str]):
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        self._automaton = automaton
+
+    def search(self, text: str) -> Optional[tuple]:
+        """返回第一個命中的 (結束位置, 關鍵詞)；沒有命中時返回 None"""
+        return next(self._automaton.iter(text), None)
+
+
+def _compile_keywords(keywords: List[str]):
+    """將關鍵詞列表編譯為單一比對器（自動機或交替式正則），一次掃描即可判斷是否包含任一關鍵詞"""
+    keywords = [keyword for keyword in keywords if keyword]
+    if not keywords:
+        return _NEVER_MATCH
+    if ahocorasick is not None:
+        return _KeywordAutomaton(keywords)
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+def _get_keyword_patterns():
+    """
+    取得預編譯的關鍵詞比對器
+    
+    Returns:
+        tuple: (個人資料關鍵詞, 詳細資料關鍵詞, 身份詢問關鍵詞) 的比對器
+    """
+    global _keyword_patterns
+    keywords = config_manager.keywords
+    cached = _keyword_patterns
+    if cached is None or cached[0] is not keywords:
+        personal_keywords = config_manager.get_keywords("PERSONAL_KEYWORDS")
+        patterns = (
+            _compile_keywords(personal_keywords["CHINESE"] + personal_keywords["ENGLISH"]),
+            _compile_keywords(config_manager.get_keywords("DETAILED_KEYWORDS")),
+            _compile_keywords(config_manager.get_keywords("IDENTITY_KEYWORDS")),
+        )
+        cached = _keyword_patterns = (keywords, patterns)
+    return cached[1]
+
 class NameDetector:
     """
     負責人名偵測、AI抽名、identity問題判斷
@@ -35,30 +134,76 @@ class NameDetector:
         # 主角名稱（例如 Maya），可由外部注入
         self.self_name = self_name
         self._main_lower = self_name.lower()
+        self._identity_exact, self._identity_re = _compile_identity_questions(self_name)
         self.get_known_names_func = get_known_names_func
         self._original_extracted_names = []
         self._request_detailed = False
+        # (名單對象, 名單的 frozenset, 小寫名單比對器)；以名單對象的身份判斷是否失效
+        self._known_names_set = None
+
+    def _get_known_names_cache(self) -> tuple:
+        """
+        取得已知角色名單的衍生結構（get_known_names_func 本身帶 TTL 快取並返回
+        同一個列表對象，因此只在名單對象更換時重新建立）
+        """
+        if not self.get_known_names_func:
+            return (None, frozenset(), _NEVER_MATCH)
+        names = self.get_known_names_func()
+        cached = self._known_names_set
+        if cached is None or cached[0] is not names:
+            names_set = frozenset(names or ())
+            matcher = _compile_keywords(list({name.lower() for name in names_set if name}))
+            cached = self._known_names_set = (names, names_set, matcher)
+        return cached
+
+    def _get_known_names_set(self) -> FrozenSet[str]:
+        """
+        取得已知角色名單的 frozenset，供 O(1) 成員判斷
+        """
+        return self._get_known_names_cache()[1]
+
+    def _may_contain_names(self, question: str, q_lower: str) -> bool:
+        """
+        判斷問題中是否可能包含人名（在調用 LLM 前的廉價預篩）
+        
+        出現中日韓文字（未知的中文名稱只能交給 AI 判斷）、大寫開頭的拉丁字詞、已知角色名稱、
+        「誰是/是誰/who is」句型或身份代詞時返回 True；已知角色名單為空時無從排除，同樣返回 True。
+        只有上述條件都不成立時才略過 LLM 調用
+        """
+        names_set, known_re = self._get_known_names_cache()[1:]
+        return bool(
+            not names_set
+            or _CJK_RE.search(question)
+            or _CAP_TOKEN_RE.search(question)
+            or _WHO_IS_RE.search(question)
+            or _IDENTITY_PRONOUN_RE.search(question)
+            or known_re.search(q_lower) is not None
+        )
 
     def extract_names_with_ai(self, question: str) -> List[str]:
         """
         使用 AI 從問題中提取所有可能的人名
         """
+        return self._extract_names(question, question.lower())
+
+    def _extract_names(self, question: str, q_lower: str) -> List[str]:
+        """
+        extract_names_with_ai 的實作，q_lower 為呼叫端已計算好的小寫問題
+        """
         self._original_extracted_names = []
         
-        # 從配置管理器獲取關鍵詞
-        personal_keywords_chinese = config_manager.get_keywords("PERSONAL_KEYWORDS")["CHINESE"]
-        personal_keywords_english = config_manager.get_keywords("PERSONAL_KEYWORDS")["ENGLISH"]
-        personal_keywords = personal_keywords_chinese + personal_keywords_english
+        # 從配置管理器獲取關鍵詞（預編譯為自動機或正則，每類關鍵詞只需一次掃描）
+        personal_re, detailed_re, identity_re = _get_keyword_patterns()
         
-        detailed_keywords = config_manager.get_keywords("DETAILED_KEYWORDS")
-        identity_keywords = config_manager.get_keywords("IDENTITY_KEYWORDS")
-        
-        self._request_detailed = any(keyword in question for keyword in detailed_keywords)
-        has_personal_keyword = any(keyword in question for keyword in personal_keywords)
+        self._request_detailed = detailed_re.search(question) is not None
+        has_personal_keyword = personal_re.search(question) is not None
         if not has_personal_keyword:
             return []
         
-        is_identity_question = any(keyword in question.lower() for keyword in identity_keywords)
+        is_identity_question = identity_re.search(q_lower) is not None
+        if not is_identity_question and not self._may_contain_names(question, q_lower):
+            logger.debug("問題中沒有可能的人名，略過 AI 抽名")
+            return []
         
         # 從配置管理器獲取提示模板
         name_extraction_prompt = config_manager.get_prompt("NAME_EXTRACTION_PROMPT").format(
@@ -70,29 +215,36 @@ class NameDetector:
             if hasattr(response, 'content'):
                 response = response.content
             validated_names = []
+            # 已加入的人名（小寫），驗證時即時去重並保留順序
+            seen = set()
             if response and response.strip():
                 names = [name.strip() for name in response.split(',') if name.strip()]
-                logger.info(f"AI 提取到的人名: {names}")
+                logger.info("AI 提取到的人名: %s", names)
                 self._original_extracted_names = names
-                known_names = self.get_known_names_func() if self.get_known_names_func else []
+                known_names = self._get_known_names_set()
+                # 逐個人名的驗證日誌只在 DEBUG 級別輸出，最終結果仍以 INFO 彙總
+                debug_enabled = logger.isEnabledFor(logging.DEBUG)
                 for name in names:
-                    clean_name = name.strip().strip('"').strip("'")
-                    if clean_name.lower() == self._main_lower:
-                        identity_pronouns = ["你是", "你叫", "我是誰", "我叫什麼"]
-                        if self._main_lower in question.lower() or any(p in question for p in identity_pronouns):
+                    clean_name = name.strip(_QUOTE_WS)
+                    clean_lower = clean_name.lower()
+                    if clean_lower in seen:
+                        continue
+                    if clean_lower == self._main_lower:
+                        if self._main_lower in q_lower or _IDENTITY_PRONOUN_RE.search(question):
+                            seen.add(clean_lower)
                             validated_names.append(self.self_name)
-                            logger.info(f"驗證通過（系統內建角色）: {self.self_name}")
+                            logger.debug("驗證通過（%s）: %s", "系統內建角色", self.self_name)
                         else:
-                            logger.warning(f"AI 提取到 '{self.self_name}' 但問題中未直接提及，也非身份詢問，已過濾")
+                            logger.debug("AI 提取到 '%s' 但問題中未直接提及，也非身份詢問，已過濾", self.self_name)
                         continue
-                    if clean_name.lower() in question.lower():
+                    if clean_lower in q_lower:
+                        seen.add(clean_lower)
                         validated_names.append(clean_name)
-                        if clean_name in known_names:
-                            logger.info(f"驗證通過（已知角色）: {clean_name}")
-                        else:
-                            logger.info(f"驗證通過（未知角色，將嘗試獲取資料）: {clean_name}")
+                        if debug_enabled:
+                            kind = "已知角色" if clean_name in known_names else "未知角色，將嘗試獲取資料"
+                            logger.debug("驗證通過（%s）: %s", kind, clean_name)
                     else:
-                        logger.warning(f"AI 提取到的人名 '{name}' 在問題中未出現，已過濾")
+                        logger.debug("AI 提取到的人名 '%s' 在問題中未出現，已過濾", name)
             else:
                 logger.info("AI 沒有提取到任何人名")
             # --- 強化補抓所有「誰是X」和「who is X」 ---
@@ -102,18 +254,19 @@ class NameDetector:
             pattern_en2 = re.findall(r"who is\s*([A-Za-z\u4e00-\u9fa5_\-0-9]+)[?？\s,，。!！]?", question, re.IGNORECASE)
             all_patterns = pattern_tw + pattern_en + pattern_tw2 + pattern_en2
             for n in all_patterns:
-                n_clean = n.strip().strip('"').strip("'")
+                n_clean = n.strip(_QUOTE_WS)
                 n_clean = re.sub(r'[，。！？、；：?？!！""\'\'（）【】,\s]', '', n_clean)
-                if n_clean and n_clean not in validated_names and n_clean not in [self.self_name, "你", "妳", "you", "You"]:
+                n_lower = n_clean.lower()
+                if n_clean and n_lower not in seen and n_clean not in [self.self_name, "你", "妳", "you", "You"]:
+                    seen.add(n_lower)
                     validated_names.append(n_clean)
             # 如果有 identity question 關鍵詞，補上 self_name
-            if is_identity_question and self.self_name not in validated_names:
+            if is_identity_question and self._main_lower not in seen:
                 validated_names.insert(0, self.self_name)
-            validated_names = list(dict.fromkeys(validated_names))  # 去重保順序
-            logger.info(f"最終補抓後人名: {validated_names}")
+            logger.info("最終補抓後人名: %s", validated_names)
             return validated_names
         except Exception as e:
-            logger.error(f"AI 提取人名時發生錯誤: {str(e)}")
+            logger.error("AI 提取人名時發生錯誤: %s", e)
             return []
 
     def detect_queried_name(self, question: str) -> Optional[str]:
@@ -149,8 +302,13 @@ class NameDetector:
         Returns:
             List[str]: 檢測到的所有角色名稱列表
         """
-        # 先使用 AI 提取人名
-        extracted_names = self.extract_names_with_ai(question)
+        # 小寫問題只計算一次，供以下所有比對共用
+        q_lower = question.lower()
+        
+        # 先使用 AI 提取人名（結果已去重）
+        extracted_names = self._extract_names(question, q_lower)
+        # 已加入的人名（小寫），補抓時即時去重並保留順序
+        seen = {name.lower() for name in extracted_names}
 
         # === NEW FALLBACK: 若 AI 未成功提取，嘗試從已知角色名單中直接掃描 ===
         if not extracted_names:
@@ -171,52 +329,46 @@ class NameDetector:
                         continue
                     # 將第二人稱代詞映射為 name
                     if n_clean in ["你", "妳", "you", "You"]:
-                        extracted_names.append(self.self_name)
-                        continue
-                    if n_clean not in ["你", "妳"]:
+                        n_clean = self.self_name
+                    n_lower = n_clean.lower()
+                    if n_lower not in seen:
+                        seen.add(n_lower)
                         extracted_names.append(n_clean)
-                logger.info(f"透過 '誰是/Who is' 解析捕捉到人名: {extracted_names}")
+                logger.info("透過 '誰是/Who is' 解析捕捉到人名: %s", extracted_names)
 
         # 2) 若仍無結果且 get_known_names_func 可用，掃描已知人名
         if not extracted_names and self.get_known_names_func:
             known_names = self.get_known_names_func()
             # 依照在問題中出現的順序保留順序
-            lowered_question = question.lower()
             matched_names = []
             for name in known_names:
-                if name and name.lower() != self._main_lower and name.lower() in lowered_question:
+                name_lower = name.lower() if name else ""
+                if name_lower and name_lower != self._main_lower and name_lower in q_lower and name_lower not in seen:
+                    seen.add(name_lower)
                     matched_names.append(name)
             if matched_names:
                 extracted_names.extend(matched_names)
-                logger.info(f"透過字面掃描補捉到人名: {matched_names}")
+                logger.info("透過字面掃描補捉到人名: %s", matched_names)
 
         # 檢查是否為關於 name 的身份詢問問題
-        lower_self = self._main_lower
-        identity_questions = [
-            "你是誰", "你叫什麼",
-            f"誰是{lower_self}", f"誰是{self.self_name}",  # 中文自我名稱
-            f"who is {lower_self}", f"who is {self.self_name}",
-            "誰是ai", "誰是AI", "ai是誰", "AI是誰", "who is ai", "who is AI"
-        ]
-        is_maya_identity_question = any(keyword in question.lower() for keyword in identity_questions)
+        is_maya_identity_question = self._is_identity_lower(q_lower)
 
         # 只有在沒有提取到任何其他角色名稱，並且是身份詢問時，才將其視為對 name 的問題
         if not extracted_names and is_maya_identity_question:
+            seen.add(self._main_lower)
             extracted_names.append(self.self_name)
 
-        if self.self_name in extracted_names:
-            logger.info(f"AI 直接識別出身份詢問，包含 {self.self_name}")
+        if self._main_lower in seen:
+            logger.info("AI 直接識別出身份詢問，包含 %s", self.self_name)
 
         # === 若問題中直接以第二人稱提及，補上 name ===
         pronouns = ["你", "妳", "you", "You", "u", "U"]
-        if any(p in question for p in pronouns) and self.self_name not in extracted_names:
+        if any(p in question for p in pronouns) and self._main_lower not in seen:
             logger.info("問題中包含第二人稱，補充主角至角色名單")
             extracted_names.insert(0, self.self_name)
 
-        # 去重並返回
-        unique_names = list(dict.fromkeys(extracted_names))
-        logger.info(f"最終檢測到的角色名稱: {unique_names}")
-        return unique_names
+        logger.info("最終檢測到的角色名稱: %s", extracted_names)
+        return extracted_names
 
     def is_identity_question(self, question: str) -> bool:
         """
@@ -228,14 +380,16 @@ class NameDetector:
         Returns:
             bool: 是否為身份詢問問題
         """
-        lower_self = self._main_lower
-        identity_questions = [
-            "你是誰", "你叫什麼",
-            f"誰是{lower_self}", f"誰是{self.self_name}",
-            f"who is {lower_self}", f"who is {self.self_name}",
-            "誰是ai", "誰是AI", "ai是誰", "AI是誰", "who is ai", "who is AI"
-        ]
-        return any(keyword in question.lower() for keyword in identity_questions)
+        return self._is_identity_lower(question.lower())
+
+    def _is_identity_lower(self, q_lower: str) -> bool:
+        """
+        is_identity_question 的實作，q_lower 為已轉小寫的問題
+        """
+        # 大多數身份詢問就是句型本身（如「你是誰？」），先以集合查找，再退回子字串比對
+        if q_lower.strip(_IDENTITY_PUNCT) in self._identity_exact:
+            return True
+        return self._identity_re.search(q_lower) is not None
 
     def get_original_extracted_names(self) -> List[str]:
         """
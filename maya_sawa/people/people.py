@@ -15,11 +15,13 @@ Author: Maya Sawa Team
 Version: 0.1.0
 """
 
+import io
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 # Optional third-party imports – fallback stubs for static analysis
 try:
     import httpx  # type: ignore
@@ -27,10 +29,11 @@ except ImportError:  # pragma: no cover
     httpx = None  # type: ignore
 
 try:
-    from psycopg2.extras import RealDictCursor  # type: ignore
+    from psycopg2.extras import RealDictCursor, execute_values  # type: ignore
     import psycopg2  # type: ignore
 except ImportError:  # pragma: no cover
     RealDictCursor = None  # type: ignore
+    execute_values = None  # type: ignore
     import types
     psycopg2 = types.ModuleType("psycopg2")  # type: ignore
 
@@ -50,6 +53,109 @@ except ImportError:
 # ==================== 日誌配置 ====================
 logger = logging.getLogger(__name__)
 
+# OpenAI text-embedding limit (characters kept per text)
+MAX_EMBEDDING_TEXT_LENGTH = 8000
+# Texts sent per embeddings API request
+EMBEDDING_BATCH_SIZE = 100
+# Embeddings API requests in flight at once
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "10"))
+# Rows per multi-row UPSERT statement
+UPSERT_PAGE_SIZE = 500
+
+# (people column, API field) pairs, in the column order used for batched writes
+PEOPLE_FIELDS = (
+    ('name_original', 'nameOriginal'), ('code_name', 'codeName'), ('name', 'name'),
+    ('physic_power', 'physicPower'), ('magic_power', 'magicPower'), ('utility_power', 'utilityPower'),
+    ('dob', 'dob'), ('race', 'race'), ('attributes', 'attributes'), ('gender', 'gender'),
+    ('ass_size', 'assSize'), ('boobs_size', 'boobsSize'), ('height_cm', 'heightCm'), ('weight_kg', 'weightKg'),
+    ('profession', 'profession'), ('combat', 'combat'), ('favorite_foods', 'favoriteFoods'), ('job', 'job'),
+    ('physics', 'physics'), ('known_as', 'knownAs'), ('personality', 'personality'), ('interest', 'interest'),
+    ('likes', 'likes'), ('dislikes', 'dislikes'), ('concubine', 'concubine'), ('faction', 'faction'),
+    ('army_id', 'armyId'), ('army_name', 'armyName'), ('dept_id', 'deptId'), ('dept_name', 'deptName'),
+    ('origin_army_id', 'originArmyId'), ('origin_army_name', 'originArmyName'), ('gave_birth', 'gaveBirth'),
+    ('email', 'email'), ('age', 'age'), ('proxy', 'proxy'),
+)
+
+# (weapon column, API field) pairs, in the column order used for batched writes
+WEAPON_FIELDS = (
+    ('owner', 'owner'), ('weapon', 'weapon'), ('attributes', 'attributes'),
+    ('base_damage', 'baseDamage'), ('bonus_damage', 'bonusDamage'),
+    ('bonus_attributes', 'bonusAttributes'), ('state_attributes', 'stateAttributes'),
+)
+
+
+class _UpsertStatements(NamedTuple):
+    """SQL for one UPSERT target, for both the COPY path and the execute_values fallback"""
+    values: str  # INSERT ... VALUES %s ON CONFLICT ... (execute_values)
+    stage: str  # CREATE TEMP TABLE ... (LIKE table) ON COMMIT DROP
+    copy: str  # COPY stage (...) FROM STDIN
+    merge: str  # INSERT INTO table SELECT ... FROM stage ON CONFLICT ...
+    vector_positions: frozenset  # Row positions of pgvector columns
+
+
+def _upsert_query(table: str, columns: List[str], conflict: str, update_columns: List[str]) -> _UpsertStatements:
+    """Build the UPSERT statements for a table, its columns and conflict target"""
+    column_list = ", ".join(columns)
+    assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in update_columns)
+    on_conflict = f"ON CONFLICT ({conflict}) DO UPDATE SET {assignments}"
+    stage = f"{table}_stage"
+    return _UpsertStatements(
+        values=f"INSERT INTO {table} ({column_list}) VALUES %s {on_conflict}",
+        stage=f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP",
+        copy=f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT text)",
+        merge=f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} {on_conflict}",
+        vector_positions=frozenset(i for i, column in enumerate(columns) if column == 'embedding'),
+    )
+
+
+# COPY text format escapes (str.translate maps every character in a single pass)
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _array_element(value: Any) -> str:
+    """Format one element of a PostgreSQL array literal"""
+    if value is None:
+        return "NULL"
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _copy_value(value: Any, vector: bool = False) -> str:
+    """Format a value as one field of a COPY ... WITH (FORMAT text) row"""
+    if value is None:
+        return "\\N"
+    if vector:
+        text = "[" + ",".join(map(str, value)) + "]"
+    elif isinstance(value, bool):
+        text = "t" if value else "f"
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    elif isinstance(value, dict):
+        text = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (list, tuple)):
+        text = "{" + ",".join(map(_array_element, value)) + "}"
+    else:
+        text = str(value)
+    return text.translate(_COPY_ESCAPES)
+
+
+_PEOPLE_COLUMNS = [column for column, _ in PEOPLE_FIELDS]
+_PEOPLE_NAME_INDEX = _PEOPLE_COLUMNS.index('name')
+_PEOPLE_DATA_COLUMNS = [column for column in _PEOPLE_COLUMNS if column != 'name']
+# People that already have an embedding: refresh every other column
+_PEOPLE_UPDATE = _upsert_query(
+    "people", _PEOPLE_COLUMNS + ['updated_at'], "name", _PEOPLE_DATA_COLUMNS + ['updated_at']
+)
+# People without an embedding: write the row together with the new embedding
+_PEOPLE_UPSERT = _upsert_query(
+    "people", _PEOPLE_COLUMNS + ['embedding', 'updated_at'], "name",
+    _PEOPLE_DATA_COLUMNS + ['embedding', 'updated_at']
+)
+_WEAPON_UPSERT = _upsert_query(
+    "weapon", [column for column, _ in WEAPON_FIELDS] + ['embedding', 'created_at', 'updated_at'], "owner",
+    [column for column, _ in WEAPON_FIELDS if column != 'owner'] + ['embedding', 'updated_at']
+)
+
 class PeopleWeaponManager:
     """
     People and Weapons Data Manager
@@ -179,7 +285,7 @@ class PeopleWeaponManager:
             return None
 
         # Limit text length to prevent excessive token usage
-        max_text_length = 8000  # OpenAI text-embedding limit
+        max_text_length = MAX_EMBEDDING_TEXT_LENGTH
         if len(text) > max_text_length:
             text = text[:max_text_length]
             logger.warning(f"Text truncated to {max_text_length} characters for embedding generation")
@@ -201,6 +307,100 @@ class PeopleWeaponManager:
             logger.error(f"Failed to generate embedding: {str(e)}")
             return None
     
+    @staticmethod
+    def _embedding_chunks(texts: List[str], batch_size: int) -> List[List[tuple]]:
+        """將非空文本（截斷後）連同原始位置切分為批次"""
+        indexed = [(i, text[:MAX_EMBEDDING_TEXT_LENGTH]) for i, text in enumerate(texts) if text]
+        return [indexed[start:start + batch_size] for start in range(0, len(indexed), batch_size)]
+
+    @staticmethod
+    def _embed_chunk(embedding_service, chunk: List[tuple], number: int) -> List[tuple]:
+        """
+        以一次 API 調用生成一個批次的向量
+
+        返回：
+            (原始位置, 向量) 列表；批次失敗時返回空列表
+        """
+        try:
+            vectors = embedding_service.batch_generate_embeddings([text for _, text in chunk])
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for batch {number}: {str(e)}")
+            return []
+        for vector in vectors:
+            if len(vector) != 1536:
+                logger.warning(f"Unexpected embedding dimensions: {len(vector)}, expected 1536")
+        return [(i, vector) for (i, _), vector in zip(chunk, vectors)]
+
+    @staticmethod
+    def _get_embedding_service():
+        """取得統一的嵌入服務；不可用時返回 None"""
+        try:
+            from ..services.embedding_service import get_embedding_service
+            return get_embedding_service()
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings: {str(e)}")
+            return None
+
+    def generate_embeddings_batch(self, texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE,
+                                  concurrency: int = EMBEDDING_CONCURRENCY) -> List[Optional[List[float]]]:
+        """
+        批量生成文本的向量嵌入 (使用統一的嵌入服務)
+
+        每 batch_size 個文本合併為一次 API 調用，N 個文本只需 ceil(N / batch_size) 次網絡往返，
+        而不是逐筆調用 generate_embedding()；最多 concurrency 個批次同時進行。
+
+        參數：
+            texts: 要轉換的文本內容列表
+            batch_size: 每次 API 調用包含的文本數
+            concurrency: 同時進行的 API 調用數上限
+
+        返回：
+            與 texts 順序一致的向量列表；空文本或所在批次失敗時對應位置為 None
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        chunks = self._embedding_chunks(texts, batch_size)
+        if not chunks:
+            return results
+        embedding_service = self._get_embedding_service()
+        if embedding_service is None:
+            return results
+
+        # 嵌入服務共用同一個 keep-alive 連接池，多個批次的網絡等待可以重疊進行
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+            batches = executor.map(
+                lambda numbered: self._embed_chunk(embedding_service, numbered[1], numbered[0]),
+                enumerate(chunks, 1),
+            )
+            for batch in batches:
+                for i, vector in batch:
+                    results[i] = vector
+        return results
+
+    def _generate_embeddings_until(self, texts: List[str], deadline: float) -> List[Optional[List[float]]]:
+        """
+        在時間預算內分輪生成向量
+
+        每輪最多 EMBEDDING_CONCURRENCY 個批次（同時進行），每輪開始前檢查時間，
+        超過 deadline 即停止，不再發出新的 API 調用。
+
+        參數：
+            texts: 要轉換的文本內容列表
+            deadline: 截止時間（time.time() 時間戳）
+
+        返回：
+            texts 前綴的向量列表（長度即已處理的文本數）；空文本或所在批次失敗時對應位置為 None
+        """
+        import time
+
+        round_size = EMBEDDING_BATCH_SIZE * max(1, EMBEDDING_CONCURRENCY)
+        results: List[Optional[List[float]]] = []
+        for start in range(0, len(texts), round_size):
+            if time.time() >= deadline:
+                logger.info(f"Time limit reached while generating embeddings. Embedded {start}/{len(texts)} texts")
+                break
+            results.extend(self.generate_embeddings_batch(texts[start:start + round_size]))
+        return results
+
     def create_people_text_for_embedding(self, person: Dict[str, Any]) -> str:
         """
         Create text representation of person data for embedding generation
@@ -306,6 +506,97 @@ class PeopleWeaponManager:
         
         return " | ".join(text_parts)
     
+    def _copy_upsert_rows(self, conn, cursor, statements: _UpsertStatements, rows: List[tuple]) -> None:
+        """
+        Bulk-load rows with COPY into a temporary staging table, then merge them
+        into the target table with one INSERT ... SELECT ... ON CONFLICT
+        
+        Commits on success; the staging table is dropped at commit.
+        
+        Args:
+            conn: Database connection
+            cursor: Cursor of conn
+            statements (_UpsertStatements): Statements of the target table
+            rows (List[tuple]): Rows in the statements' column order
+        """
+        vector_positions = statements.vector_positions
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(
+                _copy_value(value, position in vector_positions) for position, value in enumerate(row)
+            ))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor.execute(statements.stage)
+        cursor.copy_expert(statements.copy, buffer)
+        cursor.execute(statements.merge)
+        conn.commit()
+    
+    def _write_rows(self, conn, cursor, statements: _UpsertStatements, rows: List[tuple], label: str,
+                    key_index: int = 0) -> List[int]:
+        """
+        UPSERT rows, using COPY and falling back to batched execute_values
+        
+        Args:
+            conn: Database connection
+            cursor: Cursor of conn
+            statements (_UpsertStatements): Statements of the target table
+            rows (List[tuple]): Rows in the statements' column order
+            label (str): Record type used in log messages
+            key_index (int): Position of the column identifying a row in log messages
+            
+        Returns:
+            List[int]: Indexes of the rows that were written
+        """
+        if not rows:
+            return []
+        try:
+            self._copy_upsert_rows(conn, cursor, statements, rows)
+            return list(range(len(rows)))
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"COPY upsert of {len(rows)} {label} records failed, falling back to batched INSERT: {str(e)}")
+        return self._upsert_rows(conn, cursor, statements.values, rows, label, key_index)
+    
+    def _upsert_rows(self, conn, cursor, query: str, rows: List[tuple], label: str, key_index: int = 0) -> List[int]:
+        """
+        Write rows with execute_values, one multi-row statement per UPSERT_PAGE_SIZE rows
+        
+        Each page is committed on its own. If a page fails, it is rolled back and
+        retried row by row so a single bad record does not drop the whole page.
+        
+        Args:
+            conn: Database connection
+            cursor: Cursor of conn
+            query (str): INSERT ... VALUES %s ... statement
+            rows (List[tuple]): Rows in the statement's column order
+            label (str): Record type used in log messages
+            key_index (int): Position of the column identifying a row in log messages
+            
+        Returns:
+            List[int]: Indexes of the rows that were written
+        """
+        written: List[int] = []
+        for start in range(0, len(rows), UPSERT_PAGE_SIZE):
+            page = rows[start:start + UPSERT_PAGE_SIZE]
+            try:
+                execute_values(cursor, query, page, page_size=UPSERT_PAGE_SIZE)
+                conn.commit()
+                written.extend(range(start, start + len(page)))
+                continue
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Batch upsert of {len(page)} {label} records failed, retrying one by one: {str(e)}")
+            for offset, row in enumerate(page):
+                try:
+                    execute_values(cursor, query, [row])
+                    conn.commit()
+                    written.append(start + offset)
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Failed to process {label} {row[key_index]}: {str(e)}")
+        return written
+    
     def update_people_table(self, people_data: List[Dict[str, Any]], max_time_seconds: int = 60) -> int:
         """
         Update people table with fetched data and embeddings
@@ -320,9 +611,9 @@ class PeopleWeaponManager:
         import time
         
         conn = None
+        cursor = None
         updated_count = 0
         embedding_count = 0
-        skipped_count = 0
         start_time = time.time()
         total_records = len(people_data)
         
@@ -332,241 +623,52 @@ class PeopleWeaponManager:
             conn = self.pool_manager.get_people_postgres_connection()
             cursor = conn.cursor()
             
-            for i, person in enumerate(people_data):
-                # Check time limit
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= max_time_seconds:
-                    logger.info(f"Time limit reached ({elapsed_time:.1f}s). Processed {i}/{total_records} records")
-                    break
+            # 一次查詢所有已有 embedding 的人員，其餘人員的 embedding 分批生成
+            names = [person.get('name', 'unknown') for person in people_data]
+            cursor.execute("SELECT name FROM people WHERE name = ANY(%s) AND embedding IS NOT NULL", (names,))
+            existing_names = {row[0] for row in cursor.fetchall()}
+            pending = [i for i, name in enumerate(names) if name not in existing_names]
+            # 時間用盡時，從第一個未生成 embedding 的人員起不再處理
+            cutoff = total_records
+            if pending:
+                logger.info(f"Generating embeddings for {len(pending)} people in batches of {EMBEDDING_BATCH_SIZE}")
+                vectors = self._generate_embeddings_until(
+                    [self.create_people_text_for_embedding(people_data[i]) for i in pending],
+                    start_time + max_time_seconds
+                )
+                new_embeddings = dict(zip(pending, vectors))
+                if len(vectors) < len(pending):
+                    cutoff = pending[len(vectors)]
+            else:
+                new_embeddings = {}
+            
+            # 依名稱分組成批量寫入的數據行（同名記錄以最後一筆為準，同一語句內不可重複衝突鍵）
+            # 已有 embedding 的人員只更新其他欄位
+            existing_rows: Dict[str, tuple] = {}
+            new_rows: Dict[str, tuple] = {}
+            processed = 0
+            for i, person in enumerate(people_data[:cutoff]):
+                processed += 1
                 
-                try:
-                    person_name = person.get('name', 'unknown')
-                    
-                    # 檢查是否已有 embedding
-                    cursor.execute("SELECT embedding FROM people WHERE name = %s", (person_name,))
-                    existing_record = cursor.fetchone()
-                    
-                    if existing_record and existing_record[0] is not None:
-                        # 已有 embedding，跳過生成新的
-                        logger.debug(f"Skipping embedding generation for {person_name} - already exists")
-                        skipped_count += 1
-                        
-                        # 只更新其他資料，不更新 embedding
-                        data = {
-                            'name_original': person.get('nameOriginal'),
-                            'code_name': person.get('codeName'),
-                            'name': person.get('name'),
-                            'physic_power': person.get('physicPower'),
-                            'magic_power': person.get('magicPower'),
-                            'utility_power': person.get('utilityPower'),
-                            'dob': person.get('dob'),
-                            'race': person.get('race'),
-                            'attributes': person.get('attributes'),
-                            'gender': person.get('gender'),
-                            'ass_size': person.get('assSize'),
-                            'boobs_size': person.get('boobsSize'),
-                            'height_cm': person.get('heightCm'),
-                            'weight_kg': person.get('weightKg'),
-                            'profession': person.get('profession'),
-                            'combat': person.get('combat'),
-                            'favorite_foods': person.get('favoriteFoods'),
-                            'job': person.get('job'),
-                            'physics': person.get('physics'),
-                            'known_as': person.get('knownAs'),
-                            'personality': person.get('personality'),
-                            'interest': person.get('interest'),
-                            'likes': person.get('likes'),
-                            'dislikes': person.get('dislikes'),
-                            'concubine': person.get('concubine'),
-                            'faction': person.get('faction'),
-                            'army_id': person.get('armyId'),
-                            'army_name': person.get('armyName'),
-                            'dept_id': person.get('deptId'),
-                            'dept_name': person.get('deptName'),
-                            'origin_army_id': person.get('originArmyId'),
-                            'origin_army_name': person.get('originArmyName'),
-                            'gave_birth': person.get('gaveBirth'),
-                            'email': person.get('email'),
-                            'age': person.get('age'),
-                            'proxy': person.get('proxy'),
-                            'updated_at': datetime.now()
-                        }
-                        
-                        # 只更新非 embedding 欄位
-                        query = """
-                        UPDATE people SET
-                            name_original = %(name_original)s,
-                            code_name = %(code_name)s,
-                            physic_power = %(physic_power)s,
-                            magic_power = %(magic_power)s,
-                            utility_power = %(utility_power)s,
-                            dob = %(dob)s,
-                            race = %(race)s,
-                            attributes = %(attributes)s,
-                            gender = %(gender)s,
-                            ass_size = %(ass_size)s,
-                            boobs_size = %(boobs_size)s,
-                            height_cm = %(height_cm)s,
-                            weight_kg = %(weight_kg)s,
-                            profession = %(profession)s,
-                            combat = %(combat)s,
-                            favorite_foods = %(favorite_foods)s,
-                            job = %(job)s,
-                            physics = %(physics)s,
-                            known_as = %(known_as)s,
-                            personality = %(personality)s,
-                            interest = %(interest)s,
-                            likes = %(likes)s,
-                            dislikes = %(dislikes)s,
-                            concubine = %(concubine)s,
-                            faction = %(faction)s,
-                            army_id = %(army_id)s,
-                            army_name = %(army_name)s,
-                            dept_id = %(dept_id)s,
-                            dept_name = %(dept_name)s,
-                            origin_army_id = %(origin_army_id)s,
-                            origin_army_name = %(origin_army_name)s,
-                            gave_birth = %(gave_birth)s,
-                            email = %(email)s,
-                            age = %(age)s,
-                            proxy = %(proxy)s,
-                            updated_at = %(updated_at)s
-                        WHERE name = %(name)s
-                        """
-                        
-                    else:
-                        # 沒有 embedding，需要生成新的
-                        logger.debug(f"Generating new embedding for {person_name}")
-                        
-                        # Generate embedding text
-                        embedding_text = self.create_people_text_for_embedding(person)
-                        logger.debug(f"Generated embedding text for {person_name}: {len(embedding_text)} chars")
-                        
-                        embedding = self.generate_embedding(embedding_text)
-                        
-                        if embedding:
-                            embedding_count += 1
-                            logger.debug(f"Successfully generated embedding for {person_name}: {len(embedding)} dimensions")
-                        else:
-                            logger.warning(f"Failed to generate embedding for {person_name} - embedding is None")
-                        
-                        # Prepare data for insertion/update with embedding
-                        data = {
-                            'name_original': person.get('nameOriginal'),
-                            'code_name': person.get('codeName'),
-                            'name': person.get('name'),
-                            'physic_power': person.get('physicPower'),
-                            'magic_power': person.get('magicPower'),
-                            'utility_power': person.get('utilityPower'),
-                            'dob': person.get('dob'),
-                            'race': person.get('race'),
-                            'attributes': person.get('attributes'),
-                            'gender': person.get('gender'),
-                            'ass_size': person.get('assSize'),
-                            'boobs_size': person.get('boobsSize'),
-                            'height_cm': person.get('heightCm'),
-                            'weight_kg': person.get('weightKg'),
-                            'profession': person.get('profession'),
-                            'combat': person.get('combat'),
-                            'favorite_foods': person.get('favoriteFoods'),
-                            'job': person.get('job'),
-                            'physics': person.get('physics'),
-                            'known_as': person.get('knownAs'),
-                            'personality': person.get('personality'),
-                            'interest': person.get('interest'),
-                            'likes': person.get('likes'),
-                            'dislikes': person.get('dislikes'),
-                            'concubine': person.get('concubine'),
-                            'faction': person.get('faction'),
-                            'army_id': person.get('armyId'),
-                            'army_name': person.get('armyName'),
-                            'dept_id': person.get('deptId'),
-                            'dept_name': person.get('deptName'),
-                            'origin_army_id': person.get('originArmyId'),
-                            'origin_army_name': person.get('originArmyName'),
-                            'gave_birth': person.get('gaveBirth'),
-                            'email': person.get('email'),
-                            'age': person.get('age'),
-                            'proxy': person.get('proxy'),
-                            'embedding': embedding,
-                            'updated_at': datetime.now()
-                        }
-                        
-                        # Use UPSERT (INSERT ... ON CONFLICT UPDATE)
-                        query = """
-                        INSERT INTO people (
-                            name_original, code_name, name, physic_power, magic_power, utility_power,
-                            dob, race, attributes, gender, ass_size, boobs_size, height_cm, weight_kg,
-                            profession, combat, favorite_foods, job, physics, known_as, personality,
-                            interest, likes, dislikes, concubine, faction, army_id, army_name,
-                            dept_id, dept_name, origin_army_id, origin_army_name, gave_birth,
-                            email, age, proxy, embedding, updated_at
-                        ) VALUES (
-                            %(name_original)s, %(code_name)s, %(name)s, %(physic_power)s, %(magic_power)s, %(utility_power)s,
-                            %(dob)s, %(race)s, %(attributes)s, %(gender)s, %(ass_size)s, %(boobs_size)s, %(height_cm)s, %(weight_kg)s,
-                            %(profession)s, %(combat)s, %(favorite_foods)s, %(job)s, %(physics)s, %(known_as)s, %(personality)s,
-                            %(interest)s, %(likes)s, %(dislikes)s, %(concubine)s, %(faction)s, %(army_id)s, %(army_name)s,
-                            %(dept_id)s, %(dept_name)s, %(origin_army_id)s, %(origin_army_name)s, %(gave_birth)s,
-                            %(email)s, %(age)s, %(proxy)s, %(embedding)s, %(updated_at)s
-                        )
-                        ON CONFLICT (name) DO UPDATE SET
-                            name_original = EXCLUDED.name_original,
-                            code_name = EXCLUDED.code_name,
-                            physic_power = EXCLUDED.physic_power,
-                            magic_power = EXCLUDED.magic_power,
-                            utility_power = EXCLUDED.utility_power,
-                            dob = EXCLUDED.dob,
-                            race = EXCLUDED.race,
-                            attributes = EXCLUDED.attributes,
-                            gender = EXCLUDED.gender,
-                            ass_size = EXCLUDED.ass_size,
-                            boobs_size = EXCLUDED.boobs_size,
-                            height_cm = EXCLUDED.height_cm,
-                            weight_kg = EXCLUDED.weight_kg,
-                            profession = EXCLUDED.profession,
-                            combat = EXCLUDED.combat,
-                            favorite_foods = EXCLUDED.favorite_foods,
-                            job = EXCLUDED.job,
-                            physics = EXCLUDED.physics,
-                            known_as = EXCLUDED.known_as,
-                            personality = EXCLUDED.personality,
-                            interest = EXCLUDED.interest,
-                            likes = EXCLUDED.likes,
-                            dislikes = EXCLUDED.dislikes,
-                            concubine = EXCLUDED.concubine,
-                            faction = EXCLUDED.faction,
-                            army_id = EXCLUDED.army_id,
-                            army_name = EXCLUDED.army_name,
-                            dept_id = EXCLUDED.dept_id,
-                            dept_name = EXCLUDED.dept_name,
-                            origin_army_id = EXCLUDED.origin_army_id,
-                            origin_army_name = EXCLUDED.origin_army_name,
-                            gave_birth = EXCLUDED.gave_birth,
-                            email = EXCLUDED.email,
-                            age = EXCLUDED.age,
-                            proxy = EXCLUDED.proxy,
-                            embedding = EXCLUDED.embedding,
-                            updated_at = EXCLUDED.updated_at
-                        """
-                    
-                    cursor.execute(query, data)
-                    updated_count += 1
-                    
-                    # Log progress every 10 records or every 10 seconds
-                    if (i + 1) % 10 == 0 or elapsed_time % 10 < 1:
-                        progress = (i + 1) / total_records * 100
-                        logger.info(f"Progress: {i + 1}/{total_records} ({progress:.1f}%) - {elapsed_time:.1f}s elapsed (embeddings: {embedding_count}, skipped: {skipped_count})")
-                    
-                except Exception as e:
-                    # Roll back the current transaction so we can continue processing
-                    if conn:
-                        conn.rollback()
-                    logger.error(f"Failed to process person {person.get('name', 'unknown')}: {str(e)}")
-                    continue  # Continue with next record instead of failing completely
+                values = tuple(person.get(key) for _, key in PEOPLE_FIELDS)
+                if i not in new_embeddings:
+                    # 已有 embedding，跳過生成新的
+                    existing_rows[names[i]] = values + (datetime.now(),)
+                    continue
+                
+                embedding = new_embeddings[i]
+                if embedding:
+                    embedding_count += 1
+                else:
+                    logger.warning(f"Failed to generate embedding for {names[i]} - embedding is None")
+                new_rows[names[i]] = values + (embedding, datetime.now())
+            
+            skipped_count = len(existing_rows)
+            updated_count += len(self._write_rows(conn, cursor, _PEOPLE_UPDATE, list(existing_rows.values()), "person", _PEOPLE_NAME_INDEX))
+            updated_count += len(self._write_rows(conn, cursor, _PEOPLE_UPSERT, list(new_rows.values()), "person", _PEOPLE_NAME_INDEX))
             
-            conn.commit()
             final_time = time.time() - start_time
-            logger.info(f"People sync completed: {updated_count}/{total_records} records processed in {final_time:.1f}s with {embedding_count} new embeddings and {skipped_count} skipped")
+            logger.info(f"People sync completed: {updated_count}/{total_records} records processed ({processed} read) in {final_time:.1f}s with {embedding_count} new embeddings and {skipped_count} skipped")
             
         except Exception as e:
             if conn:
@@ -597,6 +699,7 @@ class PeopleWeaponManager:
         import time
         
         conn = None
+        cursor = None
         updated_count = 0
         embedding_count = 0
         start_time = time.time()
@@ -605,79 +708,40 @@ class PeopleWeaponManager:
         try:
             logger.info(f"Starting to process {total_records} weapons records (max time: {max_time_seconds}s)")
             
+            # 分批生成武器的 embedding（每批一次 API 調用），時間用盡時只處理已生成的部分
+            embeddings = self._generate_embeddings_until(
+                [self.create_weapon_text_for_embedding(weapon) for weapon in weapons_data],
+                start_time + max_time_seconds
+            )
+            if len(embeddings) < total_records:
+                logger.info(f"Time limit reached. Processing {len(embeddings)}/{total_records} records")
+            
+            # 依 owner 分組成批量寫入的數據行（同一 owner 以最後一筆為準）
+            rows: Dict[Any, tuple] = {}
+            payloads: Dict[Any, Optional[Dict[str, Any]]] = {}
+            for i, weapon in enumerate(weapons_data[:len(embeddings)]):
+                embedding = embeddings[i]
+                if embedding:
+                    embedding_count += 1
+                
+                owner = weapon.get('owner')
+                now = datetime.now()
+                rows[owner] = tuple(weapon.get(key) for _, key in WEAPON_FIELDS) + (embedding, now, now)
+                payloads[owner] = {**weapon, 'embedding': embedding} if embedding else None
+            
             conn = self.pool_manager.get_people_postgres_connection()
             cursor = conn.cursor()
             
-            for i, weapon in enumerate(weapons_data):
-                # Check time limit
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= max_time_seconds:
-                    logger.info(f"Time limit reached ({elapsed_time:.1f}s). Processed {i}/{total_records} records")
-                    break
-                
-                try:
-                    # Generate embedding text
-                    embedding_text = self.create_weapon_text_for_embedding(weapon)
-                    embedding = self.generate_embedding(embedding_text)
-                    
-                    if embedding:
-                        embedding_count += 1
-                    
-                    # Prepare data for insertion/update
-                    data = {
-                        'owner': weapon.get('owner'),
-                        'weapon': weapon.get('weapon'),
-                        'attributes': weapon.get('attributes'),
-                        'base_damage': weapon.get('baseDamage'),
-                        'bonus_damage': weapon.get('bonusDamage'),
-                        'bonus_attributes': weapon.get('bonusAttributes'),
-                        'state_attributes': weapon.get('stateAttributes'),
-                        'embedding': embedding,
-                        'created_at': datetime.now(),
-                        'updated_at': datetime.now()
-                    }
-                    
-                    # Use UPSERT (INSERT ... ON CONFLICT UPDATE)
-                    query = """
-                    INSERT INTO weapon (
-                        owner, weapon, attributes, base_damage, bonus_damage,
-                        bonus_attributes, state_attributes, embedding, created_at, updated_at
-                    ) VALUES (
-                        %(owner)s, %(weapon)s, %(attributes)s, %(base_damage)s, %(bonus_damage)s,
-                        %(bonus_attributes)s, %(state_attributes)s, %(embedding)s, %(created_at)s, %(updated_at)s
-                    )
-                    ON CONFLICT (owner) DO UPDATE SET
-                        weapon = EXCLUDED.weapon,
-                        attributes = EXCLUDED.attributes,
-                        base_damage = EXCLUDED.base_damage,
-                        bonus_damage = EXCLUDED.bonus_damage,
-                        bonus_attributes = EXCLUDED.bonus_attributes,
-                        state_attributes = EXCLUDED.state_attributes,
-                        embedding = EXCLUDED.embedding,
-                        updated_at = EXCLUDED.updated_at
-                    """
-                    
-                    cursor.execute(query, data)
-                    # Post updated embedding back to API (non-blocking best-effort)
-                    if embedding:
-                        weapon_payload = weapon.copy()
-                        weapon_payload['embedding'] = embedding
-                        self._send_weapon_update(weapon_payload)
-                    updated_count += 1
-                    
-                    # Log progress every 10 records or every 10 seconds
-                    if (i + 1) % 10 == 0 or elapsed_time % 10 < 1:
-                        progress = (i + 1) / total_records * 100
-                        logger.info(f"Progress: {i + 1}/{total_records} ({progress:.1f}%) - {elapsed_time:.1f}s elapsed")
-                    
-                except Exception as e:
-                    # Roll back the current transaction so we can continue processing
-                    if conn:
-                        conn.rollback()
-                    logger.error(f"Failed to process weapon {weapon.get('weapon', 'unknown')}: {str(e)}")
-                    continue  # Continue with next record instead of failing completely
+            owners = list(rows)
+            written = self._write_rows(conn, cursor, _WEAPON_UPSERT, [rows[owner] for owner in owners], "weapon")
+            updated_count = len(written)
+            
+            # Post updated embedding back to API (best-effort)
+            for index in written:
+                payload = payloads[owners[index]]
+                if payload:
+                    self._send_weapon_update(payload)
             
-            conn.commit()
             final_time = time.time() - start_time
             logger.info(f"Weapons sync completed: {updated_count}/{total_records} records processed in {final_time:.1f}s with {embedding_count} embeddings")
             
@@ -46,9 +46,11 @@ vectors = service.batch_generate_embeddings(["你好", "世界"])
 
 import os
 import logging
+import threading
 from typing import List, Optional, Dict, Any
 
 try:
+    import httpx
     from langchain_openai import OpenAIEmbeddings
 except ImportError as e:
     raise ImportError(f"langchain_openai is required but not installed. Please install with: poetry install") from e
@@ -84,6 +86,7 @@ class EmbeddingService:
     # 類變數：單例實例
     _instance: Optional['EmbeddingService'] = None
     _embeddings: Optional[OpenAIEmbeddings] = None
+    _embeddings_lock = threading.Lock()
     
     def __new__(cls):
         """
@@ -111,6 +114,8 @@ class EmbeddingService:
             # 嵌入模型配置
             self.model_name = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
             self.embedding_dimensions = int(os.getenv("OPENAI_EMBEDDING_DIMENSIONS", "1536"))
+            # 共用 HTTP 連接池大小（keep-alive 連線在請求之間重用，省去 TLS 握手）
+            self.http_pool_size = int(os.getenv("OPENAI_HTTP_POOL_SIZE", "32"))
             
             self._initialized = True
             logger.info(f"EmbeddingService initialized with model: {self.model_name}")
@@ -126,16 +131,26 @@ class EmbeddingService:
             OpenAIEmbeddings 實例，用於生成向量嵌入
         
         提示：首次呼叫會建立實例，後續重用以避免重複初始化。
+        並發的首次呼叫以鎖保護，只會建立一個客戶端（及其 HTTP 連接池）。
         """
         if self._embeddings is None:
-            # 初始化 OpenAI 嵌入模型
-            self._embeddings = OpenAIEmbeddings(
-                base_url=self.api_base,
-                api_key=self.api_key,
-                openai_organization=self.organization,
-                model=self.model_name
-            )
-            logger.info(f"OpenAI Embeddings model initialized: {self.model_name}")
+            with self._embeddings_lock:
+                if self._embeddings is None:
+                    # 初始化 OpenAI 嵌入模型，使用顯式的 keep-alive 連接池
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=self.http_pool_size,
+                            max_keepalive_connections=self.http_pool_size,
+                        )
+                    )
+                    self._embeddings = OpenAIEmbeddings(
+                        base_url=self.api_base,
+                        api_key=self.api_key,
+                        openai_organization=self.organization,
+                        model=self.model_name,
+                        http_client=http_client
+                    )
+                    logger.info(f"OpenAI Embeddings model initialized: {self.model_name}")
         return self._embeddings
     
     def generate_embedding(self, text: str) -> List[float]:
@@ -133,7 +133,7 @@ class MetricsConsumer:
 
     def _run_websocket(self):
         """Run WebSocket client loop"""
-        websocket_url = Config.get_voyeur_websocket_url()
+        websocket_url = Config.VOYEUR_WS_URL
         if not websocket_url:
             logger.error("WebSocket URL not configured, stopping MetricsConsumer")
             self._running = False
@@ -172,7 +172,7 @@ class MetricsConsumer:
             logger.warning("MetricsConsumer is already running")
             return
             
-        websocket_url = Config.get_voyeur_websocket_url()
+        websocket_url = Config.VOYEUR_WS_URL
         if not websocket_url:
             logger.warning("WEBSOCKET_TYMB or WEBSOCKET_HOST/PORT not configured. MetricsConsumer cannot start.")
             return
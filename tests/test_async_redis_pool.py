@@ -0,0 +1,16 @@
+from maya_sawa.core.database import connection_pool
+from maya_sawa.core.database.connection_pool import ConnectionPoolManager
+
+
+def test_async_redis_pool_is_sized_and_bounded_separately():
+    manager = ConnectionPoolManager()
+    client = manager.get_async_redis_connection()
+    pool = client.connection_pool
+
+    assert pool.max_connections == connection_pool.REDIS_ASYNC_POOL_SIZE
+    assert pool.max_connections > connection_pool.REDIS_POOL_SIZE
+    # Waiting for a free connection and socket I/O both give up quickly, so
+    # the rate limiter fails open instead of adding latency to the request.
+    assert pool.timeout == connection_pool.REDIS_ASYNC_POOL_TIMEOUT
+    assert pool.connection_kwargs["socket_timeout"] == connection_pool.REDIS_ASYNC_SOCKET_TIMEOUT
+    assert pool.connection_kwargs["socket_connect_timeout"] == connection_pool.REDIS_ASYNC_CONNECT_TIMEOUT
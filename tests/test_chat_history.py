@@ -0,0 +1,218 @@
+import fakeredis
+import pytest
+
+from maya_sawa.core.services import chat_history
+from maya_sawa.core.services.chat_history import ChatHistoryManager
+
+# 背景寫入線程在進程內只啟動一次並綁定首個管理器，所有測試共用同一個假 Redis 服務
+_SERVER = fakeredis.FakeServer()
+
+
+@pytest.fixture
+def manager():
+    client = fakeredis.FakeRedis(server=_SERVER, decode_responses=True)
+    client.flushall()
+    chat_history._STATS_CACHE.clear()
+    manager = ChatHistoryManager.__new__(ChatHistoryManager)
+    manager.redis_client = client
+    manager._append_script = client.register_script(chat_history._APPEND_SCRIPT)
+    yield manager
+    chat_history.flush()
+
+
+def test_synchronous_save_is_visible_immediately(manager):
+    assert chat_history._ASYNC_SAVE is False
+
+    assert manager.save_conversation("hi", "hello", user_id="u1")
+
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["hi"]
+
+
+def test_clear_does_not_resurrect_queued_records(manager, monkeypatch):
+    monkeypatch.setattr(chat_history, "_ASYNC_SAVE", True)
+
+    assert manager.save_conversation("hi", "hello", user_id="u1")
+    assert manager.clear_conversation_history("u1")
+    chat_history.flush()
+
+    assert manager.get_conversation_history("u1") == []
+
+
+def test_pop_includes_queued_records(manager, monkeypatch):
+    monkeypatch.setattr(chat_history, "_ASYNC_SAVE", True)
+
+    assert manager.save_conversation("hi", "hello", user_id="u1")
+    popped = manager.pop_conversation_history("u1")
+    chat_history.flush()
+
+    assert [record["user_message"] for record in popped] == ["hi"]
+    assert manager.get_conversation_history("u1") == []
+
+
+def test_save_conversations_splits_batches_in_order(manager, monkeypatch):
+    monkeypatch.setattr(chat_history, "_BATCH_SIZE", 2)
+    items = [{"user_message": f"q{i}", "ai_answer": f"a{i}"} for i in range(5)]
+
+    assert manager.save_conversations(items, user_id="u1") == 5
+
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["q4", "q3", "q2", "q1", "q0"]
+
+
+def test_saving_invalidates_cached_stats(manager):
+    assert manager.get_conversation_stats("u1")["total_conversations"] == 0
+
+    manager.save_conversation("hi", "hello", user_id="u1")
+    assert manager.get_conversation_stats("u1")["total_conversations"] == 1
+
+    manager.save_conversations([{"user_message": "q", "ai_answer": "a"}] * 2, user_id="u1")
+    assert manager.get_conversation_stats("u1")["total_conversations"] == 3
+
+
+def _legacy_record(message, timestamp):
+    return chat_history._dumps({
+        "user_message": message,
+        "ai_answer": "a",
+        "timestamp": timestamp,
+        "user_id": "u1",
+        "reference_data": [],
+    })
+
+
+def test_legacy_list_is_read_then_migrated_on_write(manager):
+    chat_key = chat_history._chat_key_for("u1")
+    manager.redis_client.rpush(
+        chat_key,
+        _legacy_record("old", "2024-01-01T00:00:00.000000Z"),
+        _legacy_record("later", "2024-01-02T00:00:00.000000Z"),
+    )
+    manager.redis_client.expire(chat_key, 600)
+
+    # 只讀時保持 List 格式，最新的在前
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["later", "old"]
+    assert manager.redis_client.type(chat_key) == "list"
+
+    assert manager.save_conversation("new", "a", user_id="u1")
+
+    assert manager.redis_client.type(chat_key) == "zset"
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["new", "later", "old"]
+    assert 0 < manager.redis_client.ttl(chat_key) <= 3600
+
+
+def test_history_is_newest_first_and_limited(manager):
+    manager.save_conversations(
+        [{"user_message": f"q{i}", "ai_answer": "a"} for i in range(3)], user_id="u1"
+    )
+
+    history = manager.get_conversation_history("u1", limit=2)
+    assert [record["user_message"] for record in history] == ["q2", "q1"]
+
+
+def test_references_are_stored_separately_and_reattached(manager):
+    refs = [{"title": "doc", "url": "https://example.com"}]
+    manager.save_conversation("hi", "hello", user_id="u1", reference_data=refs)
+
+    compact = manager.get_conversation_history("u1", include_references=False)
+    assert "reference_data" not in compact[0]
+    assert manager.get_reference_data("u1", compact[0]["message_id"]) == refs
+    assert manager.get_conversation_history("u1")[0]["reference_data"] == refs
+
+
+def test_pop_returns_history_with_references_and_deletes_keys(manager):
+    refs = [{"title": "doc"}]
+    # 批量寫入保證遞增的 score，兩筆記錄不會落在同一毫秒
+    manager.save_conversations([
+        {"user_message": "first", "ai_answer": "a", "reference_data": refs},
+        {"user_message": "second", "ai_answer": "a"},
+    ], user_id="u1")
+
+    popped = manager.pop_conversation_history("u1")
+
+    assert [record["user_message"] for record in popped] == ["second", "first"]
+    assert popped[0]["reference_data"] == []
+    assert popped[1]["reference_data"] == refs
+    chat_key = chat_history._chat_key_for("u1")
+    assert manager.redis_client.exists(chat_key, chat_history._refs_key_for(chat_key)) == 0
+    assert manager.pop_conversation_history("u1") == []
+
+
+def test_pop_reads_legacy_list(manager):
+    chat_key = chat_history._chat_key_for("u1")
+    manager.redis_client.rpush(
+        chat_key,
+        _legacy_record("first", "2024-01-01T00:00:00.000000Z"),
+        _legacy_record("second", "2024-01-02T00:00:00.000000Z"),
+    )
+
+    popped = manager.pop_conversation_history("u1")
+
+    assert [record["user_message"] for record in popped] == ["second", "first"]
+    assert manager.redis_client.exists(chat_key) == 0
+
+
+def test_get_all_users_ignores_reference_hashes(manager):
+    manager.save_conversation("hi", "a", user_id="alice", reference_data=[{"title": "doc"}])
+    manager.save_conversation("hi", "a", user_id="bob")
+    manager.redis_client.set("unrelated", "1")
+
+    assert sorted(manager.get_all_users()) == ["alice", "bob"]
+
+
+def test_migration_keeps_identical_legacy_records(manager):
+    chat_key = chat_history._chat_key_for("u1")
+    record = _legacy_record("same", "2024-01-01T00:00:00.000000Z")
+    manager.redis_client.rpush(chat_key, record, record)
+
+    assert manager.save_conversation("new", "a", user_id="u1")
+
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["new", "same", "same"]
+
+
+def test_late_migration_does_not_overwrite_migrated_key(manager):
+    chat_key = chat_history._chat_key_for("u1")
+    manager.redis_client.rpush(chat_key, _legacy_record("old", "2024-01-01T00:00:00.000000Z"))
+    manager.save_conversation("new", "a", user_id="u1")
+
+    # 另一個寫入者在 key 已被遷移後才執行遷移
+    manager._migrate_legacy_list(chat_key)
+
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["new", "old"]
+
+
+def test_other_redis_errors_do_not_trigger_migration(manager, monkeypatch):
+    def out_of_memory(*args, **kwargs):
+        raise chat_history.redis.ResponseError("OOM command not allowed when used memory > 'maxmemory'")
+
+    migrations = []
+    monkeypatch.setattr(manager, "_append_records", out_of_memory)
+    monkeypatch.setattr(manager, "_migrate_legacy_list", migrations.append)
+
+    assert manager.save_conversation("hi", "a", user_id="u1") is False
+    assert migrations == []
+
+
+def test_migration_retries_when_key_changes_midway(manager, monkeypatch):
+    chat_key = chat_history._chat_key_for("u1")
+    manager.redis_client.rpush(chat_key, _legacy_record("old", "2024-01-01T00:00:00.000000Z"))
+    other_writer = fakeredis.FakeRedis(server=_SERVER, decode_responses=True)
+    legacy_members = ChatHistoryManager._legacy_members
+    calls = []
+
+    def interleaved(raw_history):
+        if not calls:
+            # 另一個寫入者在讀取與寫入之間追加了一筆舊格式記錄
+            other_writer.rpush(chat_key, _legacy_record("concurrent", "2024-01-02T00:00:00.000000Z"))
+        calls.append(raw_history)
+        return legacy_members(raw_history)
+
+    monkeypatch.setattr(manager, "_legacy_members", interleaved)
+    manager._migrate_legacy_list(chat_key)
+
+    assert len(calls) == 2
+    history = manager.get_conversation_history("u1")
+    assert [record["user_message"] for record in history] == ["concurrent", "old"]
@@ -0,0 +1,38 @@
+from maya_sawa.core.services.llm_cache import SemanticLLMCache
+
+THRESHOLD = 0.95
+
+
+def test_dissimilar_content_below_threshold_misses():
+    cache = SemanticLLMCache()
+    namespace = cache.namespace("summary", "chinese")
+    cache.put(namespace, [1.0, 0.0, 0.0], "answer for page A")
+
+    # cos = 0.8: related but different content must not reuse page A's answer
+    assert cache.lookup(namespace, [0.8, 0.6, 0.0], THRESHOLD) is None
+    assert cache.lookup(namespace, [0.0, 1.0, 0.0], THRESHOLD) is None
+
+
+def test_near_duplicate_content_hits_the_most_similar_entry():
+    cache = SemanticLLMCache()
+    namespace = cache.namespace("summary", "chinese")
+    cache.put(namespace, [1.0, 0.0, 0.0], "answer for page A")
+    cache.put(namespace, [0.0, 1.0, 0.0], "answer for page B")
+
+    # Vector length does not affect cosine similarity
+    assert cache.lookup(namespace, [2.0, 0.05, 0.0], THRESHOLD) == "answer for page A"
+
+
+def test_namespaces_are_isolated():
+    cache = SemanticLLMCache()
+    cache.put(cache.namespace("summary", "chinese"), [1.0, 0.0], "summary")
+
+    assert cache.lookup(cache.namespace("keywords", "chinese"), [1.0, 0.0], THRESHOLD) is None
+
+
+def test_expired_entries_miss():
+    cache = SemanticLLMCache(ttl_seconds=0)
+    namespace = cache.namespace("summary", "chinese")
+    cache.put(namespace, [1.0, 0.0], "stale")
+
+    assert cache.lookup(namespace, [1.0, 0.0], THRESHOLD) is None
@@ -0,0 +1,41 @@
+import pytest
+
+from maya_sawa.people.name_detector import NameDetector
+
+
+class _LLM:
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return self.answer
+
+
+def _detector(answer, known_names=("Maya", "Sorane")):
+    llm = _LLM(answer)
+    names = list(known_names)
+    return NameDetector(llm=llm, get_known_names_func=lambda: names), llm
+
+
+@pytest.mark.parametrize("question", ["小明的身高是多少", "小明是誰"])
+def test_unknown_cjk_name_reaches_the_llm(question):
+    detector, llm = _detector("小明")
+
+    assert detector.extract_names_with_ai(question) == ["小明"]
+    assert len(llm.prompts) == 1
+
+
+def test_lowercase_name_reaches_the_llm_without_a_known_names_list():
+    detector, llm = _detector("bob", known_names=())
+
+    assert detector.extract_names_with_ai("what is the height of bob") == ["bob"]
+    assert len(llm.prompts) == 1
+
+
+def test_question_without_candidate_names_skips_the_llm():
+    detector, llm = _detector("")
+
+    assert detector.extract_names_with_ai("what is the average height") == []
+    assert llm.prompts == []
@@ -0,0 +1,35 @@
+from datetime import date, datetime
+
+from maya_sawa.people.people import _copy_value
+
+
+def test_null_and_scalars():
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(None, vector=True) == "\\N"
+    assert _copy_value(True) == "t"
+    assert _copy_value(False) == "f"
+    assert _copy_value(42) == "42"
+    assert _copy_value(date(2024, 1, 2)) == "2024-01-02"
+    assert _copy_value(datetime(2024, 1, 2, 3, 4, 5)) == "2024-01-02T03:04:05"
+
+
+def test_text_escapes_copy_delimiters():
+    assert _copy_value("a\tb\nc\rd\\e") == "a\\tb\\nc\\rd\\\\e"
+    # A literal backslash-N must not be read back as NULL
+    assert _copy_value("\\N") == "\\\\N"
+
+
+def test_vector_literal():
+    assert _copy_value([0.5, -1.0, 2], vector=True) == "[0.5,-1.0,2]"
+
+
+def test_array_literal_quotes_and_escapes_elements():
+    # Array escaping is applied first, then COPY escaping on top of it
+    assert _copy_value(["plain", 'say "hi"', "back\\slash", None]) == (
+        '{"plain","say \\\\"hi\\\\"","back\\\\\\\\slash",NULL}'
+    )
+    assert _copy_value([]) == "{}"
+
+
+def test_json_keeps_unicode_and_escapes_newlines():
+    assert _copy_value({"名字": "a\nb"}) == '{"名字": "a\\\\nb"}'
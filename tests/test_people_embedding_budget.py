@@ -0,0 +1,81 @@
+import time
+
+from maya_sawa.people import people
+from maya_sawa.people.people import PeopleWeaponManager
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _manager(monkeypatch, clock, seconds_per_call):
+    calls = []
+
+    def fake_batch(texts, *args, **kwargs):
+        calls.append(list(texts))
+        clock.now += seconds_per_call
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(time, "time", clock)
+    monkeypatch.setattr(people, "EMBEDDING_BATCH_SIZE", 2)
+    monkeypatch.setattr(people, "EMBEDDING_CONCURRENCY", 1)
+    manager = PeopleWeaponManager.__new__(PeopleWeaponManager)
+    monkeypatch.setattr(manager, "generate_embeddings_batch", fake_batch)
+    return manager, calls
+
+
+def test_embedding_stops_once_the_deadline_passes(monkeypatch):
+    clock = _Clock()
+    manager, calls = _manager(monkeypatch, clock, seconds_per_call=10)
+
+    vectors = manager._generate_embeddings_until(["a", "bb", "ccc", "dddd", "e"], clock.now + 15)
+
+    # Two rounds start before the deadline; the third is never sent
+    assert calls == [["a", "bb"], ["ccc", "dddd"]]
+    assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+
+
+def test_embedding_within_budget_covers_every_text(monkeypatch):
+    clock = _Clock()
+    manager, calls = _manager(monkeypatch, clock, seconds_per_call=1)
+
+    vectors = manager._generate_embeddings_until(["a", "bb", "ccc"], clock.now + 60)
+
+    assert len(calls) == 2
+    assert vectors == [[1.0], [2.0], [3.0]]
+
+
+def test_weapons_sync_only_writes_embedded_weapons(monkeypatch):
+    clock = _Clock()
+    manager, _ = _manager(monkeypatch, clock, seconds_per_call=10)
+    written = []
+
+    class _Conn:
+        def cursor(self):
+            return self
+
+        def close(self):
+            pass
+
+    class _PoolManager:
+        def get_people_postgres_connection(self):
+            return _Conn()
+
+        def return_people_postgres_connection(self, conn):
+            pass
+
+    def fake_write_rows(conn, cursor, statements, rows, label, key_index=0):
+        written.extend(rows)
+        return []
+
+    manager.pool_manager = _PoolManager()
+    monkeypatch.setattr(manager, "_write_rows", fake_write_rows)
+    weapons = [{"owner": f"owner{i}", "weapon": f"w{i}"} for i in range(5)]
+
+    manager.update_weapons_table(weapons, max_time_seconds=15)
+
+    assert [row[0] for row in written] == ["owner0", "owner1", "owner2", "owner3"]
@@ -0,0 +1,149 @@
+import threading
+
+import psycopg2.extensions
+
+from maya_sawa.core.database import connection_pool
+from maya_sawa.core.database.connection_pool import ConnectionPoolManager
+
+
+class _Info:
+    def __init__(self):
+        self.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class _Conn:
+    def __init__(self):
+        self.closed = 0
+        self.info = _Info()
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class _Pool:
+    """Stand-in for ThreadedConnectionPool that records checkouts."""
+
+    def __init__(self):
+        self.checked_out = []
+        self.returned = []
+
+    def getconn(self):
+        conn = _Conn()
+        self.checked_out.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+
+def _manager(monkeypatch):
+    monkeypatch.setattr(connection_pool, "_THREAD_AFFINITY", True)
+    manager = ConnectionPoolManager()
+    manager._people_postgres_pool = _Pool()
+    manager._initialized.add("people")
+    return manager
+
+
+def test_pool_class_is_threaded_in_every_mode():
+    assert connection_pool._POOL_CLASS is connection_pool.pool.ThreadedConnectionPool
+
+
+def test_thread_keeps_its_connection_across_returns(monkeypatch):
+    manager = _manager(monkeypatch)
+    pg_pool = manager._people_postgres_pool
+
+    first = manager.get_people_postgres_connection()
+    first.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    manager.return_people_postgres_connection(first)
+    second = manager.get_people_postgres_connection()
+
+    assert second is first
+    assert first.rollbacks == 1
+    assert pg_pool.checked_out == [first]
+    assert pg_pool.returned == []
+
+
+def test_threads_get_separate_connections(monkeypatch):
+    manager = _manager(monkeypatch)
+    main_conn = manager.get_people_postgres_connection()
+    other = []
+
+    worker = threading.Thread(target=lambda: other.append(manager.get_people_postgres_connection()))
+    worker.start()
+    worker.join()
+
+    assert other[0] is not main_conn
+    assert len(manager._people_postgres_pool.checked_out) == 2
+
+
+def test_release_thread_connections_returns_binding_to_pool(monkeypatch):
+    manager = _manager(monkeypatch)
+    pg_pool = manager._people_postgres_pool
+
+    conn = manager.get_people_postgres_connection()
+    manager.release_thread_connections()
+
+    assert pg_pool.returned == [(conn, False)]
+    assert manager.get_people_postgres_connection() is not conn
+
+
+def test_closed_binding_is_discarded_and_replaced(monkeypatch):
+    manager = _manager(monkeypatch)
+    pg_pool = manager._people_postgres_pool
+
+    conn = manager.get_people_postgres_connection()
+    conn.closed = 1
+    replacement = manager.get_people_postgres_connection()
+
+    assert replacement is not conn
+    assert pg_pool.returned == [(conn, True)]
+
+
+def test_release_forgets_connections_closed_by_the_pool():
+    manager = ConnectionPoolManager()
+    kept, surplus = _Conn(), _Conn()
+
+    class _ClosingPool(_Pool):
+        def putconn(self, conn, close=False):
+            super().putconn(conn, close)
+            if conn is surplus:
+                conn.closed = 1
+
+    pg_pool = _ClosingPool()
+    manager._release(pg_pool, kept)
+    manager._release(pg_pool, surplus)
+
+    assert kept in manager._last_used
+    assert surplus not in manager._last_used
+
+
+def test_idle_timestamps_do_not_outlive_their_connection():
+    manager = ConnectionPoolManager()
+    conn = _Conn()
+    manager._release(_Pool(), conn)
+    assert len(manager._last_used) == 1
+
+    del conn
+
+    assert len(manager._last_used) == 0
+
+
+def test_failed_pool_initialisation_is_retried(monkeypatch):
+    attempts = []
+
+    def flaky_pool(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) == 1:
+            raise connection_pool.psycopg2.OperationalError("database starting up")
+        return _Pool()
+
+    monkeypatch.setattr(connection_pool, "_POOL_CLASS", flaky_pool)
+    monkeypatch.setattr(connection_pool.Config, "PEOPLE_DB_CONNECTION_STRING", "postgresql://example/db")
+    manager = ConnectionPoolManager()
+
+    assert manager.get_people_postgres_connection() is None
+    assert "people" not in manager._initialized
+    assert manager.get_people_postgres_connection() is not None
+    assert len(attempts) == 2